@@ -106,8 +106,15 @@ def auto_update():
 # Ejecutar auto_update SIEMPRE al inicio del bot
 auto_update()
 
+"""
+Main Trading Bot Module - Mr.Cashondo
+Automated FOREX trading bot with scalping and day trading strategies
+"""
 import time
 import logging
+import dataclasses
+import queue
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta, timezone
 import os
 import schedule
@@ -115,23 +122,23 @@ from dotenv import load_dotenv
 from env_loader import load_env
 load_env()
 from subscription_api import validate_subscription
-from typing import Dict, List, Optional
-import time
-import logging
-from datetime import datetime, timedelta, timezone
-import os
+from typing import Dict, List, Optional, Tuple
 import schedule
+import os
 from dotenv import load_dotenv
 from env_loader import load_env
 load_env()
-from subscription_api import validate_subscription
-from typing import Dict, List, Optional
 
 # Import custom modules
 from mt5_connector import MT5Connector, OrderRequest
 from signal_generator import SignalGenerator, TradingSignal
 from risk_manager import RiskManager, RiskParameters
 from telegram_alerts import TelegramAlerts
+from trade_database import TradeDatabase
+from risk_config_loader import get_risk_params
+import getpass
+import threading
+import sys
 
 # Load environment variables
 load_dotenv()
@@ -147,624 +154,135 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-import threading
-import getpass
-
-from trade_database import TradeDatabase
+# Máximo de tickets no rastreados recordados para no repetir el log "Found untracked position"
+MAX_KNOWN_UNTRACKED_POSITIONS = 512
+# Segundos durante los que get_bot_status reutiliza balance y resumen de riesgo
+STATUS_CACHE_TTL = 2.0
+# Máximo de alertas de error pendientes de envío a Telegram
+ALERT_QUEUE_SIZE = 256
+# Ventana (segundos) en la que una alerta idéntica (mismo contexto y mensaje) no se reenvía
+ALERT_DEDUP_WINDOW_SECONDS = 300.0
+# Intervalo de escaneo adaptativo (minutos): se acorta con actividad y se alarga en mercado quieto
+SCAN_INTERVAL_MINUTES = 15
+MIN_SCAN_INTERVAL_MINUTES = 2
+MAX_SCAN_INTERVAL_MINUTES = 30
+# Escaneos recientes considerados y señales por escaneo que llevan el intervalo al mínimo
+SCAN_ACTIVITY_WINDOW = 10
+TARGET_SIGNALS_PER_SCAN = 2.0
+# Espera tras un error en el bucle principal (segundos): se duplica en cada fallo consecutivo
+ERROR_BACKOFF_SECONDS = 5
+MAX_ERROR_BACKOFF_SECONDS = 300
+# Errores del bucle principal tras los que no se puede seguir (entorno roto): detienen el bot.
+# El resto se reintenta con backoff: detenerse dejaría sin monitorear las posiciones abiertas
+FATAL_LOOP_ERRORS = (MemoryError, ImportError)
+# Intervalo de monitoreo de posiciones abiertas (segundos), independiente del escaneo
+MONITOR_INTERVAL_SECONDS = 60
 
 class MrCashondoBot:
-    def __init__(self, *args, **kwargs):
-        # ...existing code...
-        self.trade_db = TradeDatabase()
-        # ...existing code...
-
-    def process_signal(self, signal: TradingSignal) -> None:
-        """
-        Procesa una señal de trading: registra, filtra duplicados, ajusta trailing y ejecuta si corresponde.
-        Args:
-            signal: Objeto TradingSignal generado por el SignalGenerator
-        """
-        # --- FILTRO DE DUPLICIDAD EN BASE DE DATOS (siempre, incluso tras reinicio) ---
-        duplicate = None
-        if self.trade_db:
-            duplicate = self.trade_db.find_duplicate_signal(
-                symbol=signal.symbol,
-                timeframe=getattr(signal, 'timeframe', 'UNKNOWN'),
-                signal_type=signal.signal_type,
-                window_minutes=60
-            )
-        if duplicate:
-            diff_entry = abs(signal.entry_price - duplicate.get('entry_price', 0)) > 0.0005 * signal.entry_price
-            diff_sl = abs(signal.stop_loss - duplicate.get('stop_loss', 0)) > 0.0005 * signal.entry_price
-            diff_tp = abs(signal.take_profit - duplicate.get('take_profit', 0)) > 0.0005 * signal.entry_price
-            if diff_sl or diff_tp:
-                logger.info(f"[DUPLICATE][TRAILING] Señal duplicada detectada, pero SL/TP cambiaron. Sugerir actualización de trailing o parámetros para la señal original (ID {duplicate['id']}).")
-                return
-            else:
-                logger.info(f"[DUPLICATE][DISCARDED] Señal duplicada detectada para {signal.symbol} {signal.signal_type} en {getattr(signal, 'timeframe', 'UNKNOWN')}. Se descarta la nueva señal y se mantiene la original (ID {duplicate['id']}).")
-                return
-
-        # --- FILTRO DE DUPLICIDAD EN POSICIONES ABIERTAS EN MT5 (siempre, incluso tras reinicio) ---
-        open_positions = []
-        if self.mt5_connector and hasattr(self.mt5_connector, 'get_open_positions'):
-            try:
-                open_positions = self.mt5_connector.get_open_positions()
-            except Exception as e:
-                logger.error(f"[MT5] Error al obtener posiciones abiertas: {e}")
-        is_duplicate_mt5 = False
-        for pos in open_positions:
-            pos_symbol = pos.get('symbol') if isinstance(pos, dict) else getattr(pos, 'symbol', None)
-            pos_type = pos.get('type') if isinstance(pos, dict) else getattr(pos, 'type', None)
-            pos_timeframe = pos.get('timeframe', 'UNKNOWN') if isinstance(pos, dict) else getattr(pos, 'timeframe', 'UNKNOWN')
-            order_type = 0 if signal.signal_type == "BUY" else 1
-            # Si las posiciones abiertas no tienen timeframe, solo compara símbolo y tipo
-            if pos_symbol == signal.symbol and pos_type == order_type:
-                is_duplicate_mt5 = True
-                break
-        if is_duplicate_mt5:
-            logger.info(f"[DUPLICATE][MT5] Ya existe una posición abierta en MT5 para {signal.symbol} {signal.signal_type}. Se descarta la señal.")
-            if self.trade_db:
-                self.trade_db.log_signal({
-                    'symbol': signal.symbol,
-                    'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                    'signal_type': signal.signal_type,
-                    'entry_price': signal.entry_price,
-                    'stop_loss': signal.stop_loss,
-                    'take_profit': signal.take_profit,
-                    'confidence': getattr(signal, 'confidence', 0.0),
-                    'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                    'status': 'duplicate_mt5',
-                    'generation_params': None
-                }, generation_params={'reason': 'duplicate_mt5'})
-            return
-        try:
-            # FILTRO DE TIPO DE SÍMBOLO: solo operar FOREX, índices y commodities/metales
-            if not self.signal_generator._is_symbol_type_enabled(signal.symbol):
-                logger.warning(f"[SYMBOL FILTER][REJECTED] Señal descartada por tipo de símbolo no permitido: {signal.symbol}")
-                if self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'rejected',
-                        'generation_params': None
-                    }, generation_params={'reason': 'symbol_type_not_allowed'})
-                return
-
-            # FILTRO DE CONFIANZA: solo procesar señales con confianza >= 0.8
-            if hasattr(signal, 'confidence') and signal.confidence < 0.8:
-                logger.info(f"[CONFIDENCE][REJECTED] Señal descartada por confianza insuficiente: {getattr(signal, 'confidence', None):.2f} < 0.80 para {signal.symbol}")
-                if self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'rejected',
-                        'generation_params': None
-                    }, generation_params={'reason': 'confidence_below_threshold'})
-                return
-
-            # --- REGISTRO DE SEÑAL EN BASE DE DATOS ---
-            signal_dict = {
-                'symbol': signal.symbol,
-                'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                'signal_type': signal.signal_type,
-                'entry_price': signal.entry_price,
-                'stop_loss': signal.stop_loss,
-                'take_profit': signal.take_profit,
-                'confidence': getattr(signal, 'confidence', 0.0),
-                'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-            }
-            signal_id = None
-            if self.trade_db:
-                try:
-                    signal_id = self.trade_db.log_signal(signal_dict)
-                    logger.info(f"[DB] Señal registrada en base de datos con ID {signal_id}")
-                except Exception as e:
-                    logger.error(f"[DB] Error al registrar señal: {e}")
-                    signal_id = None
-
-            # --- DOBLE VALIDACIÓN DE DUPLICADOS: POSICIONES ABIERTAS EN MT5 ---
-            # Consultar posiciones abiertas en MT5 antes de ejecutar la orden
-            open_positions = []
-            if self.mt5_connector and hasattr(self.mt5_connector, 'get_open_positions'):
-                try:
-                    open_positions = self.mt5_connector.get_open_positions()
-                except Exception as e:
-                    logger.error(f"[MT5] Error al obtener posiciones abiertas: {e}")
-            # Revisar si ya hay una posición abierta igual (símbolo y tipo)
-            is_duplicate_mt5 = False
-            for pos in open_positions:
-                # pos puede ser dict u objeto, adaptamos
-                pos_symbol = pos.get('symbol') if isinstance(pos, dict) else getattr(pos, 'symbol', None)
-                pos_type = pos.get('type') if isinstance(pos, dict) else getattr(pos, 'type', None)
-                # type: 0=BUY, 1=SELL en MT5
-                order_type = 0 if signal.signal_type == "BUY" else 1
-                if pos_symbol == signal.symbol and pos_type == order_type:
-                    is_duplicate_mt5 = True
-                    break
-            if is_duplicate_mt5:
-                logger.info(f"[DUPLICATE][MT5] Ya existe una posición abierta en MT5 para {signal.symbol} {signal.signal_type}. Se descarta la señal.")
-                if self.trade_db and signal_id:
-                    self.trade_db.update_signal_status(signal_id, "duplicate_mt5")
-                elif self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'duplicate_mt5',
-                        'generation_params': None
-                    }, generation_params={'reason': 'duplicate_mt5'})
-                return
+    # Plantilla de orden reutilizada: cada señal solo sustituye los campos variables
+    _order_template = OrderRequest(symbol="", action=0, volume=0.0, price=0.0, sl=0.0, tp=0.0, comment="MrcashondoV2")
 
-            # 1. Validar stops antes de procesar la señal
-            order_type = 0 if signal.signal_type == "BUY" else 1  # Convertir a tipo MT5
-            sl, tp, stops_valid = self.mt5_connector.validate_and_adjust_stops(
-                signal.symbol, order_type, signal.entry_price, signal.stop_loss, signal.take_profit
-            )
-            if not stops_valid:
-                logger.warning(f"[STOPS][REJECTED] Señal descartada para {signal.symbol}: Stops inválidos")
-                if self.trade_db and signal_id:
-                    self.trade_db.update_signal_status(signal_id, "invalid_stops")
-                elif self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'invalid_stops',
-                        'generation_params': None
-                    }, generation_params={'reason': 'invalid_stops'})
-                return
-            logger.info(f"[RISK] Stops validados para {signal.symbol}: SL={sl}, TP={tp}")
-            # Actualizar la señal con stops válidos
-            signal.stop_loss = sl
-            signal.take_profit = tp
-            # Obtener symbol_info antes de calcular el tamaño de la posición
-            symbol_info = self.mt5_connector.get_symbol_info(signal.symbol)
-            if not symbol_info:
-                logger.error(f"[MT5][ERROR] No se pudo obtener información del símbolo {signal.symbol}")
-                if self.trade_db and signal_id:
-                    self.trade_db.update_signal_status(signal_id, "no_symbol_info")
-                elif self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'no_symbol_info',
-                        'generation_params': None
-                    }, generation_params={'reason': 'no_symbol_info'})
-                return
-            logger.info(f"[INFO] symbol_info obtenido para {signal.symbol}: {symbol_info}")
-            # 2. Calcular volumen basado en gestión de riesgo configurable (fixed_usd o percent_margin)
-            from risk_config import RISK_MODE, FIXED_RISK_USD
-            account_info = self.mt5_connector.get_account_info()
-            free_margin = account_info.get('margin_free', 0)
-            balance = account_info.get('balance', 0)
-            position_size = None
-            if RISK_MODE == "fixed_usd":
-                try:
-                    position_size = self.risk_manager.calculate_position_size_fixed_usd(
-                        signal.symbol,
-                        signal.entry_price,
-                        signal.stop_loss,
-                        symbol_info,
-                        FIXED_RISK_USD
-                    )
-                    logger.info(f"[RISK] Modo FIXED_USD: arriesgando {FIXED_RISK_USD} USD por operación para {signal.symbol}")
-                except Exception as e:
-                    logger.error(f"[RISK] Error en cálculo de lotaje FIXED_USD: {e}")
-                    position_size = None
-            else:
-                # Usar el mayor entre 1% de free_margin y 1% de balance como monto de riesgo
-                try:
-                    risk_amount = max(
-                        self.risk_manager.calculate_risk_amount(free_margin, 0.01),
-                        self.risk_manager.calculate_risk_amount(balance, 0.01)
-                    )
-                    position_size = self.risk_manager.calculate_position_size(
-                        signal.symbol,
-                        signal.entry_price,
-                        signal.stop_loss,
-                        risk_amount,
-                        symbol_info,
-                        free_margin=free_margin,
-                        take_profit=signal.take_profit,
-                        signal_type=signal.signal_type
-                    )
-                    logger.info(f"[RISK] Modo percent_margin: arriesgando {risk_amount} USD para {signal.symbol}")
-                except Exception as e:
-                    logger.error(f"[RISK] Error en cálculo de lotaje percent_margin: {e}")
-                    position_size = None
-            # Si el cálculo falla, fallback a mínimo volumen permitido
-            if position_size is None or getattr(position_size, 'volume', None) is None or position_size.volume <= 0:
-                logger.warning(f"[POSITION SIZE][ADJUSTED] Fallo el cálculo de tamaño de posición para {signal.symbol}, usando mínimo permitido")
-                if self.trade_db:
-                    self.trade_db.log_signal({
-                        'symbol': signal.symbol,
-                        'timeframe': getattr(signal, 'timeframe', 'UNKNOWN'),
-                        'signal_type': signal.signal_type,
-                        'entry_price': signal.entry_price,
-                        'stop_loss': signal.stop_loss,
-                        'take_profit': signal.take_profit,
-                        'confidence': getattr(signal, 'confidence', 0.0),
-                        'timestamp': getattr(signal, 'timestamp', datetime.now(timezone.utc).isoformat()),
-                        'status': 'adjusted_min_volume',
-                        'generation_params': None
-                    }, generation_params={'reason': 'position_size_min_volume'})
-                min_vol = symbol_info.get('min_volume', 0.01)
-                position_size = type('PositionSize', (), {'volume': min_vol})
-            logger.info(f"[RISK] Volumen final calculado para {signal.symbol}: {position_size.volume}")
-
-            # 3. Enviar la señal a Telegram (solo si confianza >= 0.8, ya filtrado arriba)
-            if self.telegram_alerts:
-                self.telegram_alerts.send_signal_alert(signal)
-
-            # 4. Intentar ejecutar la orden SOLO si hay fondos y exposición suficiente, pero corrigiendo el cálculo de volumen y margen
-            min_volume = symbol_info.get('min_volume', 0.01)
-            test_volume = max(position_size.volume, min_volume)
-            margin_required = self.risk_manager.calculate_margin_required(
-                signal.symbol, test_volume, signal.entry_price, symbol_info
-            )
-            exposure_limit = self.risk_manager.get_exposure_limit(symbol_info, account_info)
-            logger.info(f"[RISK] margin_required={margin_required}, exposure_limit={exposure_limit}, min_volume={min_volume}")
-            can_execute = test_volume >= min_volume and margin_required <= exposure_limit
-            # Ejecutar orden solo si es posible
-            if can_execute:
-                try:
-                    order_request = OrderRequest(
-                        symbol=signal.symbol,
-                        action=order_type,
-                        volume=test_volume,
-                        price=signal.entry_price,
-                        sl=signal.stop_loss,
-                        tp=signal.take_profit,
-                        comment="MrcashondoV2"
-                    )
-                    result = self.mt5_connector.send_order(order_request)
-                    if result and result.get('retcode', 0) == 10009:
-                        logger.info(f"Orden ejecutada correctamente para {signal.symbol}")
-                        # --- REGISTRO DE TRADE EN BASE DE DATOS ---
-                        if self.trade_db and signal_id:
-                            trade_dict = {
-                                'signal_id': signal_id,
-                                'order_id': result.get('order', None),
-                                'symbol': signal.symbol,
-                                'action': signal.signal_type,
-                                'volume': test_volume,
-                                'price': signal.entry_price,
-                                'sl': signal.stop_loss,
-                                'tp': signal.take_profit,
-                                'comment': "MrcashondoV2",
-                                'open_time': datetime.now(timezone.utc).isoformat(),
-                                'close_time': None,
-                                'close_price': None,
-                                'profit': None,
-                                'status': 'open',
-                            }
-                            self.trade_db.log_trade(trade_dict)
-                            self.trade_db.update_signal_status(signal_id, "executed")
-                        logger.info(f"[DB] Trade registrado para {signal.symbol} (order_id={result.get('order', None)})")
-                    else:
-                        logger.warning(f"No se pudo ejecutar la orden para {signal.symbol}: {result}")
-                        if self.trade_db and signal_id:
-                            self.trade_db.update_signal_status(signal_id, "not_executed")
-                except Exception as e:
-                    logger.error(f"Error ejecutando orden para {signal.symbol}: {e}")
-                    if self.trade_db and signal_id:
-                        self.trade_db.update_signal_status(signal_id, "error")
-            else:
-                logger.info(f"Señal para {signal.symbol} NO ejecutada en MT5 por fondos/exposición, pero enviada a Telegram")
-                if self.trade_db and signal_id:
-                    self.trade_db.update_signal_status(signal_id, "not_executed")
-            logger.info(f"[RISK] Proceso de ejecución finalizado para {signal.symbol}")
-        except Exception as e:
-            logger.error(f"Error en process_signal: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
-    def scan_and_execute(self) -> None:
-        """
-        Escanea todos los símbolos configurados y ejecuta señales de trading.
-        """
-        try:
-            logger.info("Escaneando señales de trading...")
-            if not self.signal_generator or not self.mt5_connector:
-                logger.error("Componentes no inicializados para escaneo de señales.")
-                return
-            signals = self.signal_generator.scan_all_symbols(self.mt5_connector, self.timeframes)
-            if not signals:
-                logger.info("No se encontraron señales de trading en este escaneo.")
-                return
-            logger.info(f"Se encontraron {len(signals)} señales de trading.")
-            for signal in signals:
-                self.process_signal(signal)
-            self.last_scan_time = datetime.now()
-        except Exception as e:
-            logger.error(f"Error en scan_and_execute: {str(e)}")
-
-    def monitor_positions(self) -> None:
-        """
-        Monitorea y gestiona las posiciones abiertas en MT5.
-        """
-        try:
-            if not self.mt5_connector:
-                logger.warning("MT5Connector no inicializado para monitoreo de posiciones.")
-                return
-            # Gestión activa de posiciones: trailing stop y cierre parcial
-            for pos in self.open_positions:
-                # Se asume que cada 'pos' es un dict u objeto con los siguientes atributos:
-                # position_id, entry_price, stop_loss, take_profit, current_price, signal_type, volume, close_prices, atr
-                try:
-                    self.risk_manager.manage_partial_and_trailing(
-                        pos['position_id'],
-                        pos['entry_price'],
-                        pos['stop_loss'],
-                        pos['take_profit'],
-                        pos['current_price'],
-                        pos['signal_type'],
-                        pos['volume'],
-                        pos['close_prices'],
-                        pos['atr'],
-                        self.mt5_connector
-                    )
-                except Exception as e:
-                    logger.error(f"Error gestionando posición {pos}: {str(e)}")
-            logger.debug("Monitoreo de posiciones activas: gestión activa ejecutada")
-        except Exception as e:
-            logger.error(f"Error en monitor_positions: {str(e)}")
-
-    def stop_trading(self) -> None:
-        """
-        Detiene el bot de trading y desconecta de MT5.
-        """
-        try:
-            self.running = False
-            if hasattr(self, 'mt5_connector') and self.mt5_connector:
-                self.mt5_connector.disconnect()
-            logger.info("Mr.Cashondo Bot detenido correctamente.")
-        except Exception as e:
-            logger.error(f"Error al detener el bot: {str(e)}")
-    def reset_daily_stats(self) -> None:
-        """
-        Resetea las estadísticas diarias del bot y del risk_manager. Envía notificación a Telegram si está configurado.
-        """
-        try:
-            if hasattr(self, 'risk_manager') and self.risk_manager:
-                self.risk_manager.reset_daily_stats()
-                logger.info("Estadísticas diarias reseteadas correctamente.")
-            if hasattr(self, 'telegram_alerts') and self.telegram_alerts:
-                self.telegram_alerts.send_info_alert("Estadísticas diarias reseteadas.")
-        except Exception as e:
-            logger.error(f"Error al resetear estadísticas diarias: {str(e)}")
-            if hasattr(self, 'telegram_alerts') and self.telegram_alerts:
-                self.telegram_alerts.send_error_alert(str(e), "reset_daily_stats")
     def __init__(self):
-        self.running = False
         self.subscription_email = None
         self.subscription_token = None
+        self.start_time = datetime.now()
         self.last_scan_time = None
         self.mt5_connector = None
         self.signal_generator = None
         self.risk_manager = None
         self.telegram_alerts = None
         self.trade_db = None
-        self.timeframes = ['M5', 'M15', 'H1']  # Ejemplo, puedes ajustar
-        self.open_positions = []  # Inicializa la lista de posiciones abiertas para evitar errores
-
-    def send_daily_summary(self):
+        self.timeframes = ['M5', 'M15', 'H1']
+        self.active_positions = OrderedDict()
+        self.known_untracked_positions = OrderedDict()
+        # Única fuente de verdad del estado del bot: activado = detenido.
+        # Arranca activado y start_trading lo limpia al entrar en el bucle principal.
+        self._stop_event = threading.Event()
+        self._stop_event.set()
+        # Caché de corta duración para get_bot_status
+        self._balance_cache = 0
+        self._risk_summary_cache = {}
+        self._invalidate_status_cache()
+        self._uptime_cached_secs = -1
+        self._uptime_cached_str = ""
+        # Las alertas de error se envían desde un hilo aparte para no bloquear el bucle principal
+        self._alert_queue = queue.Queue(maxsize=ALERT_QUEUE_SIZE)
+        # (contexto, hash del mensaje) -> último envío (monotónico) y alertas suprimidas desde entonces
+        self._alert_last_sent: Dict[tuple, float] = {}
+        self._alert_suppressed: Dict[tuple, int] = {}
+        threading.Thread(target=self._alert_worker, daemon=True).start()
+        # Señales encontradas en los últimos escaneos, para adaptar el intervalo
+        self._recent_signal_counts = deque(maxlen=SCAN_ACTIVITY_WINDOW)
+
+    def _alert_worker(self) -> None:
         """
-        Envía el resumen diario de operaciones a Telegram usando los datos del risk_manager.
+        Consume la cola de alertas de error y las envía a Telegram.
         """
-        if self.risk_manager and self.telegram_alerts:
-            daily_stats = self.risk_manager.get_risk_summary()
-            self.telegram_alerts.send_daily_summary(daily_stats)
+        while True:
+            error_message, context = self._alert_queue.get()
+            try:
+                if self.telegram_alerts:
+                    self.telegram_alerts.send_error_alert(error_message, context)
+            except Exception as e:
+                logger.error(f"Error enviando alerta de error a Telegram: {str(e)}")
 
-    def initialize_components(self) -> bool:
+    def _queue_error_alert(self, error_message: str, context: str = "") -> None:
         """
-        Inicializa los módulos principales del bot. Devuelve True si todo fue exitoso, False si hubo algún error.
+        Encola una alerta de error sin bloquear. Si la cola está llena descarta la más antigua.
+        Las alertas idénticas dentro de ALERT_DEDUP_WINDOW_SECONDS se suprimen y se informa
+        cuántas fueron suprimidas en la siguiente alerta enviada.
+        Args:
+            error_message: Mensaje de error
+            context: Contexto donde ocurrió el error
         """
+        key = (context, hash(error_message))
+        now = time.monotonic()
+        last_sent = self._alert_last_sent.get(key)
+        if last_sent is not None and now - last_sent < ALERT_DEDUP_WINDOW_SECONDS:
+            self._alert_suppressed[key] = self._alert_suppressed.get(key, 0) + 1
+            return
+        suppressed = self._alert_suppressed.pop(key, 0)
+        if suppressed:
+            error_message = f"{error_message} (se suprimieron {suppressed} alertas idénticas)"
+        self._alert_last_sent[key] = now
+        if len(self._alert_last_sent) > ALERT_QUEUE_SIZE:
+            # Olvidar claves cuya ventana ya expiró para no crecer indefinidamente
+            for stale in [k for k, t in self._alert_last_sent.items() if now - t >= ALERT_DEDUP_WINDOW_SECONDS]:
+                del self._alert_last_sent[stale]
+                self._alert_suppressed.pop(stale, None)
         try:
-            self.mt5_connector = MT5Connector()
-            # Conectar a MT5 antes de cualquier operación que requiera conexión
-            if hasattr(self.mt5_connector, 'connect') and not getattr(self.mt5_connector, 'connected', False):
-                if not self.mt5_connector.connect():
-                    logger.error("No se pudo conectar a MT5. Verifica credenciales y conexión.")
-                    return False
-            self.signal_generator = SignalGenerator()
-            self.risk_manager = RiskManager()
-            self.telegram_alerts = TelegramAlerts()
-            # Si tienes un módulo de base de datos de trades:
+            self._alert_queue.put_nowait((error_message, context))
+        except queue.Full:
             try:
-                from trade_database import TradeDatabase
-                self.trade_db = TradeDatabase()
-            except ImportError:
-                self.trade_db = None
-                logger.warning("No se pudo importar TradeDatabase. El registro de señales/trades estará deshabilitado.")
-            # --- Inicializar todos los símbolos disponibles en MT5 (sin rotación) ---
-            if hasattr(self.signal_generator, 'initialize_symbols'):
-                # Si existe el método, inicializa todos los símbolos (sin argumento rotation)
-                self.signal_generator.initialize_symbols(self.mt5_connector)
-            elif hasattr(self.signal_generator, 'symbols'):
-                import MetaTrader5 as mt5
-                all_symbols = mt5.symbols_get()
-                self.signal_generator.symbols = [s.name for s in all_symbols]
-            return True
-        except Exception as e:
-            logger.error(f"Error inicializando componentes: {e}")
-            return False
-
-    def start_trading(self) -> None:
-        """Inicia el bot de trading con validación robusta de suscripción y monitoreo periódico."""
-        try:
-            print("\n=== VALIDACIÓN DE SUSCRIPCIÓN ===")
-            email = input("Correo de suscripción: ").strip()
-            token = getpass.getpass("Token de suscripción: ").strip()
-            # Validar suscripción en Supabase (requiere active==True)
-            if not validate_subscription(email, token):
-                logger.error("No se pudo validar la suscripción o no está activa. El bot no se iniciará.")
-                print("\nSUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE\n")
-                return  # Detener el flujo si la suscripción es inválida
-            self.subscription_email = email
-            self.subscription_token = token
-
-            # Iniciar monitor de suscripción en hilo aparte
-            def monitor():
-                while True:
-                    if not validate_subscription(self.subscription_email, self.subscription_token):
-                        logger.error("Suscripción inválida o expirada. Deteniendo bot.")
-                        self.running = False
-                        break
-                    time.sleep(600)  # 10 minutos
-            t = threading.Thread(target=monitor, daemon=True)
-            t.start()
-
-            # Inicializar componentes
-            if not self.initialize_components():
-                logger.error("Failed to initialize components")
-                return
-            self.running = True
-            logger.info("Mr.Cashondo Bot started successfully")
-
-            # Schedule daily summary
-            schedule.every().day.at("23:59").do(self.send_daily_summary)
-            # Schedule daily reset
-            schedule.every().day.at("00:00").do(self.reset_daily_stats)
-
-            # Ejecutar el primer escaneo inmediatamente
-            logger.info("Executing initial scan...")
-            self.scan_and_execute()
-            self.monitor_positions()
-            self.last_scan_time = datetime.now()
-            logger.info("Initial scan completed")
-
-            # Main trading loop: escanea TODOS los símbolos cada 15 minutos
-            scan_interval_minutes = 15
-            while self.running:
-                try:
-                    schedule.run_pending()
-                    current_time = datetime.now()
-                    time_since_last_scan = (current_time - self.last_scan_time).total_seconds() / 60
-                    if int(time_since_last_scan) % 1 == 0 and time_since_last_scan < scan_interval_minutes:
-                        logger.debug(f"Bot active, waiting for scan ({time_since_last_scan:.1f}/{scan_interval_minutes} minutes passed)")
-                    if time_since_last_scan >= scan_interval_minutes:
-                        logger.info(f"Scan interval reached ({time_since_last_scan:.1f} minutes). Starting scan...")
-                        self.scan_and_execute()
-                        self.monitor_positions()
-                        self.last_scan_time = datetime.now()
-
-                        # --- FASE 7: Registro automático de métricas de performance globales y por símbolo ---
-                        try:
-                            # Global metrics
-                            metrics = self.signal_generator.calculate_performance_metrics()
-                            if hasattr(self, 'trade_db') and self.trade_db:
-                                self.trade_db.log_metrics(metrics)
-                            self.signal_generator.save_performance_metrics(filename='performance_metrics.csv')
-                            logger.info("[METRICS] Métricas globales registradas en DB y CSV.")
-
-                            # Por símbolo
-                            symbol_metrics = self.signal_generator.analyze_symbol_performance()
-                            if hasattr(self, 'trade_db') and self.trade_db:
-                                for symbol, m in symbol_metrics.items():
-                                    m['timestamp'] = None  # Se asigna en log_metrics
-                                    self.trade_db.log_metrics(m, symbol=symbol)
-                            logger.info("[METRICS] Métricas por símbolo registradas en DB.")
-                        except Exception as e:
-                            logger.error(f"[METRICS] Error al registrar métricas: {e}")
-                    time.sleep(5)
-                except KeyboardInterrupt:
-                    logger.info("Received keyboard interrupt, stopping bot...")
-                    self.stop_trading()
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main trading loop: {str(e)}")
-                    if self.telegram_alerts:
-                        self.telegram_alerts.send_error_alert(str(e), "Main trading loop")
-                    time.sleep(60)
-        except Exception as e:
-            logger.error(f"Critical error in start_trading: {str(e)}")
-            if hasattr(self, 'telegram_alerts') and self.telegram_alerts:
-                self.telegram_alerts.send_error_alert(str(e), "Critical error")
-            if hasattr(self, 'mt5_connector') and self.mt5_connector:
-                self.mt5_connector.disconnect()
-            logger.info("Mr.Cashondo Bot stopped")
-
-    # ...otros métodos de MrCashondoBot (scan_and_execute, process_signal, etc)...
-
-# Entrypoint para ejecución directa
-if __name__ == "__main__":
-    try:
-        logger.info("Starting Mr.Cashondo Trading Bot...")
-        bot = MrCashondoBot()
-        bot.start_trading()
-    except Exception as e:
-        logger.error(f"Critical error in main: {str(e)}")
-    finally:
-        logger.info("Bot execution completed")
-"""
-Main Trading Bot Module - Mr.Cashondo
-Automated FOREX trading bot with scalping and day trading strategies
-"""
-import time
-import logging
-from datetime import datetime, timedelta, timezone
-import os
-import schedule
-from dotenv import load_dotenv
-from env_loader import load_env
-load_env()
-from subscription_api import validate_subscription
-from typing import Dict, List, Optional
-import schedule
-import os
-from dotenv import load_dotenv
-from env_loader import load_env
-load_env()
-
-# Import custom modules
-from mt5_connector import MT5Connector, OrderRequest
-from signal_generator import SignalGenerator, TradingSignal
-from risk_manager import RiskManager, RiskParameters
-from telegram_alerts import TelegramAlerts
+                self._alert_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._alert_queue.put_nowait((error_message, context))
+            except queue.Full:
+                logger.warning("Cola de alertas llena, alerta descartada")
 
-# Load environment variables
-load_dotenv()
+    @property
+    def running(self) -> bool:
+        """True mientras el bucle principal de trading está activo."""
+        return not self._stop_event.is_set()
 
-# Configure logging with UTF-8 encoding
-logging.basicConfig(
-    level=logging.DEBUG,  # Cambiado a DEBUG para ver más detalles
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mr_cashondo_bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+    def stop_trading(self) -> None:
+        """
+        Detiene el bot de trading y desconecta de MT5.
+        Si el bucle principal está activo solo lo despierta: el finally de start_trading
+        es quien desconecta, así la parada se hace una sola vez.
+        """
+        try:
+            if self.running:
+                self._stop_event.set()
+                return
+            if self.mt5_connector:
+                self.mt5_connector.disconnect()
+            logger.info("Mr.Cashondo Bot detenido correctamente.")
+        except Exception as e:
+            logger.error(f"Error al detener el bot: {str(e)}")
 
-class MrCashondoBot:
     def send_daily_summary(self):
         """
         Envía el resumen diario de operaciones a Telegram usando los datos del risk_manager.
@@ -772,6 +290,51 @@ class MrCashondoBot:
         if self.risk_manager and self.telegram_alerts:
             daily_stats = self.risk_manager.get_risk_summary()
             self.telegram_alerts.send_daily_summary(daily_stats)
+
+    def reset_daily_stats(self) -> None:
+        """
+        Resetea las estadísticas diarias del bot y del risk_manager. Envía notificación a Telegram si está configurado.
+        """
+        try:
+            if hasattr(self, 'risk_manager') and self.risk_manager:
+                self.risk_manager.reset_daily_stats()
+                logger.info("Estadísticas diarias reseteadas correctamente.")
+            if hasattr(self, 'telegram_alerts') and self.telegram_alerts:
+                self.telegram_alerts.send_info_alert("Estadísticas diarias reseteadas.")
+        except Exception as e:
+            logger.error(f"Error al resetear estadísticas diarias: {str(e)}")
+            if hasattr(self, 'telegram_alerts') and self.telegram_alerts:
+                self.telegram_alerts.send_error_alert(str(e), "reset_daily_stats")
+
+    def initialize_components(self) -> bool:
+        """
+        Inicializa los módulos principales del bot. Devuelve True si todo fue exitoso, False si hubo algún error.
+        """
+        try:
+            self.mt5_connector = MT5Connector()
+            # Conectar a MT5 antes de cualquier operación que requiera conexión
+            if hasattr(self.mt5_connector, 'connect') and not getattr(self.mt5_connector, 'connected', False):
+                if not self.mt5_connector.connect():
+                    logger.error("No se pudo conectar a MT5. Verifica credenciales y conexión.")
+                    return False
+            self.signal_generator = SignalGenerator()
+            self.risk_manager = RiskManager()
+            self.telegram_alerts = TelegramAlerts()
+            # Si tienes un módulo de base de datos de trades:
+            self.trade_db = TradeDatabase()
+            # --- Inicializar todos los símbolos disponibles en MT5 (sin rotación) ---
+            if hasattr(self.signal_generator, 'initialize_symbols'):
+                # Si existe el método, inicializa todos los símbolos (sin argumento rotation)
+                self.signal_generator.initialize_symbols(self.mt5_connector)
+            elif hasattr(self.signal_generator, 'symbols'):
+                import MetaTrader5 as mt5
+                all_symbols = mt5.symbols_get()
+                self.signal_generator.symbols = [s.name for s in all_symbols]
+            return True
+        except Exception as e:
+            logger.error(f"Error inicializando componentes: {e}")
+            return False
+
     def prompt_subscription_credentials(self):
         """
         Solicita email y token de suscripción al usuario por consola.
@@ -833,20 +396,21 @@ class MrCashondoBot:
                 self.trade_db.update_signal_status(signal_id, "no_symbol_info")
                 return
             # 2. Calcular volumen basado en gestión de riesgo configurable (fixed_usd o percent_margin)
-            from risk_config import RISK_MODE, FIXED_RISK_USD
             account_info = self.mt5_connector.get_account_info()
             free_margin = account_info.get('margin_free', 0)
             balance = account_info.get('balance', 0)
             position_size = None
-            if RISK_MODE == "fixed_usd":
+            # Configuración de riesgo vigente (se relee solo si risk_config.py cambió)
+            risk_mode, fixed_risk_usd, _ = get_risk_params()
+            if risk_mode == "fixed_usd":
                 position_size = self.risk_manager.calculate_position_size_fixed_usd(
                     signal.symbol,
                     signal.entry_price,
                     signal.stop_loss,
                     symbol_info,
-                    FIXED_RISK_USD
+                    fixed_risk_usd
                 )
-                logger.info(f"[RISK] Modo FIXED_USD: arriesgando {FIXED_RISK_USD} USD por operación para {signal.symbol}")
+                logger.info(f"[RISK] Modo FIXED_USD: arriesgando {fixed_risk_usd} USD por operación para {signal.symbol}")
             else:
                 # Usar el mayor entre 1% de free_margin y 1% de balance como monto de riesgo
                 risk_amount = max(
@@ -935,17 +499,8 @@ class MrCashondoBot:
             # Ejecutar orden solo si es posible
             if can_execute:
                 try:
-                    order_request = OrderRequest(
-                        symbol=signal.symbol,
-                        action=order_type,
-                        volume=test_volume,
-                        price=signal.entry_price,
-                        sl=signal.stop_loss,
-                        tp=signal.take_profit,
-                        comment="MrcashondoV2"
-                    )
-                    result = self.mt5_connector.send_order(order_request)
-                    if result and result.get('retcode', 0) == 10009:
+                    executed, result = self._submit_order(signal, test_volume, order_type)
+                    if executed:
                         logger.info(f"Orden ejecutada correctamente para {signal.symbol}")
                         # --- REGISTRO DE TRADE EN BASE DE DATOS ---
                         trade_dict = {
@@ -1029,6 +584,7 @@ class MrCashondoBot:
 
             # Get signals from signal generator
             signals = self.signal_generator.scan_all_symbols(self.mt5_connector, self.timeframes)
+            self._recent_signal_counts.append(len(signals) if signals else 0)
 
             if not signals:
                 logger.info("No trading signals found in this scan")
@@ -1044,6 +600,9 @@ class MrCashondoBot:
 
         except Exception as e:
             logger.error(f"Error in scan_and_execute: {str(e)}")
+        finally:
+            # Tras un scan el balance y el riesgo pueden haber cambiado
+            self._invalidate_status_cache()
     
     def process_signal(self, signal: TradingSignal) -> None:
         """
@@ -1101,20 +660,21 @@ class MrCashondoBot:
                 self.trade_db.update_signal_status(signal_id, "no_symbol_info")
                 return
             # 2. Calcular volumen basado en gestión de riesgo configurable (fixed_usd o percent_margin)
-            from risk_config import RISK_MODE, FIXED_RISK_USD
             account_info = self.mt5_connector.get_account_info()
             free_margin = account_info.get('margin_free', 0)
             balance = account_info.get('balance', 0)
             position_size = None
-            if RISK_MODE == "fixed_usd":
+            # Configuración de riesgo vigente (se relee solo si risk_config.py cambió)
+            risk_mode, fixed_risk_usd, _ = get_risk_params()
+            if risk_mode == "fixed_usd":
                 position_size = self.risk_manager.calculate_position_size_fixed_usd(
                     signal.symbol,
                     signal.entry_price,
                     signal.stop_loss,
                     symbol_info,
-                    FIXED_RISK_USD
+                    fixed_risk_usd
                 )
-                logger.info(f"[RISK] Modo FIXED_USD: arriesgando {FIXED_RISK_USD} USD por operación para {signal.symbol}")
+                logger.info(f"[RISK] Modo FIXED_USD: arriesgando {fixed_risk_usd} USD por operación para {signal.symbol}")
             else:
                 # Usar el mayor entre 1% de free_margin y 1% de balance como monto de riesgo
                 risk_amount = max(
@@ -1167,17 +727,8 @@ class MrCashondoBot:
             # Ejecutar orden solo si es posible
             if can_execute:
                 try:
-                    order_request = OrderRequest(
-                        symbol=signal.symbol,
-                        action=order_type,
-                        volume=test_volume,
-                        price=signal.entry_price,
-                        sl=signal.stop_loss,
-                        tp=signal.take_profit,
-                        comment="MrcashondoV2"
-                    )
-                    result = self.mt5_connector.send_order(order_request)
-                    if result and result.get('retcode', 0) == 10009:
+                    executed, result = self._submit_order(signal, test_volume, order_type)
+                    if executed:
                         logger.info(f"Orden ejecutada correctamente para {signal.symbol}")
                         # --- REGISTRO DE TRADE EN BASE DE DATOS ---
                         trade_dict = {
@@ -1212,109 +763,27 @@ class MrCashondoBot:
         except Exception as e:
             logger.error(f"Error en process_signal: {str(e)}")
     
-    def execute_trade(self, signal: TradingSignal, volume: float) -> None:
+    def _submit_order(self, signal: TradingSignal, volume: float, order_type: int) -> Tuple[bool, Optional[Dict]]:
         """
-        Execute a trade based on signal
-        
+        Envía a MT5 la orden correspondiente a una señal ya validada.
         Args:
-            signal: TradingSignal object
-            volume: Position volume
+            signal: TradingSignal con stops ya ajustados
+            volume: Volumen final de la orden
+            order_type: Tipo de orden MT5 (0=BUY, 1=SELL)
+        Returns:
+            Tupla (ejecutada, resultado de send_order)
         """
-        try:
-            # Get dynamic trading parameters for the symbol
-            trading_params = self.mt5_connector.get_dynamic_trading_params(signal.symbol)
-            # Aquí puedes agregar la lógica de ejecución real del trade
-        except Exception as e:
-            logger.error(f"Error in execute_trade: {e}")
-    def start_trading(self) -> None:
-        """Inicia el bot de trading con validación robusta de suscripción y monitoreo periódico. Pausa si el mercado está cerrado."""
-        import getpass
-        import threading
-        import sys
-        try:
-            print("\n=== VALIDACIÓN DE SUSCRIPCIÓN ===")
-            email = input("Correo de suscripción: ").strip()
-            token = getpass.getpass("Token de suscripción: ").strip()
-            # Validar suscripción en Supabase (requiere active==True y token no vacío)
-            if not email or not token:
-                logger.error("Debes ingresar correo y token de suscripción.")
-                print("\nSUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE\n")
-                return
-            if not validate_subscription(email, token):
-                logger.error("No se pudo validar la suscripción o no está activa. El bot no se iniciará.")
-                print("\nSUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE\n")
-                return
-            self.subscription_email = email
-            self.subscription_token = token
-
-            # Iniciar monitor de suscripción en hilo aparte
-            def monitor():
-                while True:
-                    if not validate_subscription(self.subscription_email, self.subscription_token):
-                        print("\nSUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE\n")
-                        logger.error("SUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE")
-                        sys.exit(0)
-                    time.sleep(600)  # 10 minutos
-            t = threading.Thread(target=monitor, daemon=True)
-            t.start()
-
-            # Inicializar componentes
-            if not self.initialize_components():
-                logger.error("Failed to initialize components")
-                return
-            self.running = True
-            logger.info("Mr.Cashondo Bot started successfully")
-
-            # Schedule daily summary
-            schedule.every().day.at("23:59").do(self.send_daily_summary)
-            # Schedule daily reset
-            schedule.every().day.at("00:00").do(self.reset_daily_stats)
-
-            # Ejecutar el primer escaneo inmediatamente
-            logger.info("Executing initial scan...")
-            self.scan_and_execute()
-            self.monitor_positions()
-            self.last_scan_time = datetime.now()
-            logger.info("Initial scan completed")
-
-            # Main trading loop: escanea TODOS los símbolos cada 15 minutos
-            scan_interval_minutes = 15
-            while self.running:
-                try:
-                    schedule.run_pending()
-                    # --- PAUSA SI EL MERCADO ESTÁ CERRADO ---
-                    if not self.is_market_open():
-                        logger.info("Mercado cerrado. El bot está en pausa. Esperando apertura...")
-                        time.sleep(60)
-                        continue
-                    current_time = datetime.now()
-                    time_since_last_scan = (current_time - self.last_scan_time).total_seconds() / 60
-                    # Log para confirmar que el bot está activo
-                    if int(time_since_last_scan) % 1 == 0 and time_since_last_scan < scan_interval_minutes:
-                        logger.debug(f"Bot active, waiting for scan ({time_since_last_scan:.1f}/{scan_interval_minutes} minutes passed)")
-                    # Ejecutar scan si han pasado 15 minutos desde el último
-                    if time_since_last_scan >= scan_interval_minutes:
-                        self.scan_and_execute()
-                        self.monitor_positions()
-                        self.last_scan_time = datetime.now()
-                    time.sleep(5)
-                except KeyboardInterrupt:
-                    logger.info("Received keyboard interrupt, stopping bot...")
-                    self.stop_trading()
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main trading loop: {str(e)}")
-                    if hasattr(self, 'telegram_alerts'):
-                        self.telegram_alerts.send_error_alert(str(e), "Main trading loop")
-                    time.sleep(60)
-        except Exception as e:
-            logger.error(f"Critical error in start_trading: {str(e)}")
-            if hasattr(self, 'telegram_alerts'):
-                self.telegram_alerts.send_error_alert(str(e), "Critical error")
-            # Disconnect from MT5
-            if hasattr(self, 'mt5_connector') and self.mt5_connector:
-                self.mt5_connector.disconnect()
-            logger.info("Mr.Cashondo Bot stopped")
+        order_request = dataclasses.replace(
+            self._order_template,
+            symbol=signal.symbol,
+            action=order_type,
+            volume=volume,
+            price=signal.entry_price,
+            sl=signal.stop_loss,
+            tp=signal.take_profit
+        )
+        result = self.mt5_connector.send_order(order_request)
+        return bool(result and result.get('retcode', 0) == 10009), result
 
     def is_market_open(self) -> bool:
         """
@@ -1338,6 +807,8 @@ class MrCashondoBot:
                 return True  # Viernes justo a las 21:00 UTC
             return True  # Lunes a viernes
         return False
+
+    def monitor_positions(self) -> None:
         """Monitor existing positions for management"""
         try:
             # Get current positions from MT5
@@ -1346,7 +817,7 @@ class MrCashondoBot:
             if not current_positions:
                 # No positions, clear active positions
                 self.active_positions.clear()
-                self.risk_manager.positions_count = 0
+                self.risk_manager.reset_positions()
                 return
             
             # Check each position
@@ -1358,12 +829,11 @@ class MrCashondoBot:
                 else:
                     # Position not in our tracking, add it with placeholder data
                     # Limitamos el logging de posiciones no rastreadas solo a nuevas en esta ejecución
-                    if not hasattr(self, 'known_untracked_positions'):
-                        self.known_untracked_positions = set()
-                        
                     if ticket not in self.known_untracked_positions:
                         logger.info(f"Found untracked position: {ticket}")
-                        self.known_untracked_positions.add(ticket)
+                        self.known_untracked_positions[ticket] = None
+                        if len(self.known_untracked_positions) > MAX_KNOWN_UNTRACKED_POSITIONS:
+                            self.known_untracked_positions.popitem(last=False)
                         
                     symbol = position.get('symbol', 'unknown')
                     
@@ -1385,14 +855,20 @@ class MrCashondoBot:
                         'execution_price': position.get('price_open', 0.0),
                         'open_time': datetime.now() - timedelta(days=1)  # Asumir que es de ayer
                     }
+                    max_tracked = self.risk_manager.risk_params.max_open_positions * 4
+                    while len(self.active_positions) > max_tracked:
+                        self.active_positions.popitem(last=False)
             
             # Remove closed positions from tracking
-            current_tickets = [pos['ticket'] for pos in current_positions]
+            current_tickets = {pos['ticket'] for pos in current_positions}
             for ticket in list(self.active_positions.keys()):
                 if ticket not in current_tickets:
                     logger.info(f"Position {ticket} closed")
                     del self.active_positions[ticket]
                     self.risk_manager.decrement_positions()
+            for ticket in list(self.known_untracked_positions.keys()):
+                if ticket not in current_tickets:
+                    del self.known_untracked_positions[ticket]
             
         except Exception as e:
             logger.error(f"Error monitoring positions: {str(e)}")
@@ -1444,10 +920,6 @@ class MrCashondoBot:
         except Exception as e:
             logger.error(f"Error monitoring position {ticket}: {str(e)}")
     
-    import threading
-    import time
-    from subscription_api import validate_subscription
-
     def _start_subscription_monitor(self, email: str, interval: int = 600):
         """
         Inicia un hilo que valida periódicamente la suscripción en Supabase.
@@ -1456,7 +928,6 @@ class MrCashondoBot:
             email: Email de suscripción
             interval: Intervalo de validación en segundos (default: 600s = 10min)
         """
-        import sys
         def monitor():
             while True:
                 if not validate_subscription(email):
@@ -1466,101 +937,89 @@ class MrCashondoBot:
         t = threading.Thread(target=monitor, daemon=True)
         t.start()
 
-    def start_trading(self) -> None:
-        """Start the trading bot with un escaneo completo y validación periódica de suscripción."""
-        # ...existing code...
-        # Validar email de suscripción desde el inicio
-        email = getattr(self, 'subscription_email', None)
-        if email:
-            self._start_subscription_monitor(email)
-        # ...resto del método start_trading...
-        try:
-            # Validar suscripción SOLO UNA VEZ antes de iniciar el bot
-            if not validate_subscription(self.subscription_email, self.subscription_token):
-                logger.error("No se pudo validar la suscripción. El bot no se iniciará.")
-                return
-            # Validar email de suscripción desde el inicio para monitoreo periódico
-            self._start_subscription_monitor(self.subscription_email)
-            logger.info("Mr.Cashondo Bot started successfully")
-            # ...resto del método start_trading...
-            if not self.initialize_components():
-                logger.error("Failed to initialize components")
-                return
-            self.running = True
-            logger.info("Mr.Cashondo Bot started successfully")
-
-            # Schedule daily summary
-            schedule.every().day.at("23:59").do(self.send_daily_summary)
-            # Schedule daily reset
-            schedule.every().day.at("00:00").do(self.reset_daily_stats)
-
-            # Ejecutar el primer escaneo inmediatamente
-            logger.info("Executing initial scan...")
-            self.scan_and_execute()
-            self.monitor_positions()
-            self.last_scan_time = datetime.now()
-            logger.info("Initial scan completed")
-
-            # Main trading loop: escanea TODOS los símbolos cada 15 minutos
-            scan_interval_minutes = 15
-            while self.running:
-                try:
-                    schedule.run_pending()
-                    current_time = datetime.now()
-                    time_since_last_scan = (current_time - self.last_scan_time).total_seconds() / 60
-                    # Log para confirmar que el bot está activo
-                    if int(time_since_last_scan) % 1 == 0 and time_since_last_scan < scan_interval_minutes:
-                        logger.debug(f"Bot active, waiting for scan ({time_since_last_scan:.1f}/{scan_interval_minutes} minutes passed)")
-                    # Ejecutar scan si han pasado 15 minutos desde el último
-                    if time_since_last_scan >= scan_interval_minutes:
-                        self.scan_and_execute()
-                        self.monitor_positions()
-                        self.last_scan_time = datetime.now()
-                    time.sleep(5)
-                except KeyboardInterrupt:
-                    logger.info("Received keyboard interrupt, stopping bot...")
-                    self.stop_trading()
-                    break
-                except Exception as e:
-                    logger.error(f"Error in main trading loop: {str(e)}")
-                    self.telegram_alerts.send_error_alert(str(e), "Main trading loop")
-                    time.sleep(60)
-        except Exception as e:
-            logger.error(f"Critical error in start_trading: {str(e)}")
-            self.telegram_alerts.send_error_alert(str(e), "Critical error")
-            
-            # Disconnect from MT5
-            if self.mt5_connector:
-                self.mt5_connector.disconnect()
-            
-            logger.info("Mr.Cashondo Bot stopped")
-            
-        except Exception as e:
-            logger.error(f"Error stopping bot: {str(e)}")
-    
     def get_bot_status(self) -> Dict:
         """
         Get current bot status
         
         Returns:
-            Dictionary with bot status information
+            Dictionary with bot status information (uptime in seconds, for machine consumers)
         """
-        uptime = datetime.now() - self.start_time
-        
         return {
             'running': self.running,
-            'uptime': str(uptime),
+            'uptime_seconds': (datetime.now() - self.start_time).total_seconds(),
             'last_scan': self.last_scan_time,
             'active_positions': len(self.active_positions),
-            'account_balance': self.mt5_connector.get_account_balance() if self.mt5_connector else 0,
-            'risk_stats': self.risk_manager.get_risk_summary() if self.risk_manager else {}
+            'account_balance': self._cached_balance(),
+            'risk_stats': self._cached_risk_summary()
         }
 
+    def get_bot_status_human(self) -> Dict:
+        """
+        Estado del bot con el uptime formateado como texto, para mostrarlo a una persona.
+        Returns:
+            Mismo diccionario que get_bot_status, con 'uptime' en lugar de 'uptime_seconds'
+        """
+        status = self.get_bot_status()
+        # Reformatear solo cuando cambia el segundo entero
+        secs = int(status.pop('uptime_seconds'))
+        if secs != self._uptime_cached_secs:
+            self._uptime_cached_str = str(timedelta(seconds=secs))
+            self._uptime_cached_secs = secs
+        status['uptime'] = self._uptime_cached_str
+        return status
+
+    def _cached_balance(self) -> float:
+        """
+        Balance de la cuenta, reutilizado durante STATUS_CACHE_TTL segundos para no
+        consultar MT5 en cada sondeo de estado.
+        """
+        now = time.monotonic()
+        if now - self._balance_cache_ts >= STATUS_CACHE_TTL:
+            self._balance_cache = self.mt5_connector.get_account_balance() if self.mt5_connector else 0
+            self._balance_cache_ts = now
+        return self._balance_cache
+
+    def _cached_risk_summary(self) -> Dict:
+        """
+        Resumen de riesgo del risk_manager, reutilizado durante STATUS_CACHE_TTL segundos.
+        """
+        now = time.monotonic()
+        if now - self._risk_summary_cache_ts >= STATUS_CACHE_TTL:
+            self._risk_summary_cache = self.risk_manager.get_risk_summary() if self.risk_manager else {}
+            self._risk_summary_cache_ts = now
+        return self._risk_summary_cache
+
+    def _invalidate_status_cache(self) -> None:
+        """Fuerza a que el próximo get_bot_status vuelva a consultar balance y riesgo."""
+        self._balance_cache_ts = float('-inf')
+        self._risk_summary_cache_ts = float('-inf')
+
+    def _adaptive_scan_interval(self) -> float:
+        """
+        Calcula el intervalo hasta el próximo escaneo según la actividad reciente.
+        Más señales por escaneo acortan el intervalo; una ventana completa sin señales lo lleva al máximo.
+        Returns:
+            Intervalo en minutos dentro de [MIN_SCAN_INTERVAL_MINUTES, MAX_SCAN_INTERVAL_MINUTES]
+        """
+        counts = self._recent_signal_counts
+        if len(counts) == counts.maxlen and not any(counts):
+            return MAX_SCAN_INTERVAL_MINUTES
+        rate = sum(counts) / counts.maxlen
+        interval = SCAN_INTERVAL_MINUTES * (1 - rate / TARGET_SIGNALS_PER_SCAN)
+        return min(MAX_SCAN_INTERVAL_MINUTES, max(MIN_SCAN_INTERVAL_MINUTES, interval))
+
+    def _scan_and_monitor(self) -> None:
+        """
+        Monitorea las posiciones y después escanea, uno tras otro en el hilo principal.
+        No se solapan: ambos comparten active_positions y el contador de posiciones del
+        RiskManager, y el terminal MT5 no admite órdenes concurrentes. Monitorear primero
+        deja el contador al día antes de que can_open_position lo consulte.
+        """
+        self.monitor_positions()
+        self.scan_and_execute()
+
     def start_trading(self) -> None:
         """Inicia el bot de trading con validación robusta de suscripción y monitoreo periódico."""
-        import getpass
-        import threading
-        import sys
         try:
             print("\n=== VALIDACIÓN DE SUSCRIPCIÓN ===")
             email = input("Correo de suscripción: ").strip()
@@ -1579,7 +1038,9 @@ class MrCashondoBot:
                     if not validate_subscription(self.subscription_email, self.subscription_token):
                         print("\nSUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE\n")
                         logger.error("SUSCRIPCION NO ACTIVA, RENUEVA O CONTACTA A SOPORTE")
-                        sys.exit(0)
+                        # sys.exit() en un hilo secundario no detiene el bot: se señaliza al bucle principal
+                        self._stop_event.set()
+                        return
                     time.sleep(600)  # 10 minutos
             t = threading.Thread(target=monitor, daemon=True)
             t.start()
@@ -1588,7 +1049,7 @@ class MrCashondoBot:
             if not self.initialize_components():
                 logger.error("Failed to initialize components")
                 return
-            self.running = True
+            self._stop_event.clear()
             logger.info("Mr.Cashondo Bot started successfully")
 
             # Schedule daily summary
@@ -1598,41 +1059,90 @@ class MrCashondoBot:
 
             # Ejecutar el primer escaneo inmediatamente
             logger.info("Executing initial scan...")
-            self.scan_and_execute()
-            self.monitor_positions()
+            self._scan_and_monitor()
+            # last_scan_time es solo informativo; los intervalos se miden con reloj monotónico
             self.last_scan_time = datetime.now()
             logger.info("Initial scan completed")
 
-            # Main trading loop: escanea TODOS los símbolos cada 15 minutos
-            scan_interval_minutes = 15
-            while self.running:
+            # Main trading loop: escanea TODOS los símbolos con intervalo adaptativo (por defecto 15 minutos)
+            # Las posiciones se monitorean con su propio intervalo, más corto que el de escaneo
+            self._next_scan_deadline = time.monotonic() + self._adaptive_scan_interval() * 60
+            self._next_monitor_deadline = time.monotonic() + MONITOR_INTERVAL_SECONDS
+            self._backoff = ERROR_BACKOFF_SECONDS
+            stop_event = self._stop_event
+            while not stop_event.is_set():
                 try:
                     schedule.run_pending()
-                    current_time = datetime.now()
-                    time_since_last_scan = (current_time - self.last_scan_time).total_seconds() / 60
-                    # Log para confirmar que el bot está activo
-                    if int(time_since_last_scan) % 1 == 0 and time_since_last_scan < scan_interval_minutes:
-                        logger.debug(f"Bot active, waiting for scan ({time_since_last_scan:.1f}/{scan_interval_minutes} minutes passed)")
-                    # Ejecutar scan si han pasado 15 minutos desde el último
-                    if time_since_last_scan >= scan_interval_minutes:
-                        self.scan_and_execute()
-                        self.monitor_positions()
+                    now = time.monotonic()
+                    # Ejecutar scan al alcanzar el deadline monotónico (precedido de un monitoreo)
+                    if now >= self._next_scan_deadline:
+                        self._scan_and_monitor()
                         self.last_scan_time = datetime.now()
-                    time.sleep(5)
+                        scan_interval_s = self._adaptive_scan_interval() * 60
+                        now = time.monotonic()
+                        self._next_scan_deadline += scan_interval_s
+                        # Si el scan se alargó más que el intervalo, no encadenar scans atrasados
+                        if self._next_scan_deadline <= now:
+                            self._next_scan_deadline = now + scan_interval_s
+                        self._next_monitor_deadline = now + MONITOR_INTERVAL_SECONDS
+                        logger.info("Próximo scan en %.1f minutos", scan_interval_s / 60)
+                    elif now >= self._next_monitor_deadline:
+                        self.monitor_positions()
+                        now = time.monotonic()
+                        self._next_monitor_deadline = now + MONITOR_INTERVAL_SECONDS
+                    # Dormir hasta el próximo scan, monitoreo o tarea programada; stop_trading() despierta el bucle
+                    sleep_for = min(self._next_scan_deadline, self._next_monitor_deadline) - now
+                    next_job = schedule.idle_seconds()
+                    if next_job is not None:
+                        sleep_for = min(sleep_for, next_job)
+                    self._backoff = ERROR_BACKOFF_SECONDS
+                    if stop_event.wait(timeout=max(0.0, sleep_for)):
+                        break
                 except KeyboardInterrupt:
+                    # Solo se señaliza: el finally desconecta y registra la parada
                     logger.info("Received keyboard interrupt, stopping bot...")
-                    self.stop_trading()
+                    self._stop_event.set()
+                    break
+                except (ConnectionError, TimeoutError, OSError) as e:
+                    # Fallo transitorio de red/terminal: reintentar con backoff exponencial sin alertar
+                    logger.warning("Transient error in main trading loop, retrying in %ss: %s", self._backoff, e)
+                    if self._stop_event.wait(self._backoff):
+                        break
+                    self._backoff = min(self._backoff * 2, MAX_ERROR_BACKOFF_SECONDS)
+                except FATAL_LOOP_ERRORS as e:
+                    # Sin memoria o sin módulos no hay reintento posible: detener y avisar de inmediato
+                    logger.critical("Fatal error in main trading loop, stopping bot: %s", e, exc_info=True)
+                    if self.telegram_alerts:
+                        self.telegram_alerts.send_error_alert(str(e), "Fatal error")
                     break
                 except Exception as e:
-                    logger.error(f"Error in main trading loop: {str(e)}")
-                    if hasattr(self, 'telegram_alerts'):
-                        self.telegram_alerts.send_error_alert(str(e), "Main trading loop")
-                    time.sleep(60)
+                    # Incluye AttributeError/TypeError por respuestas None de MT5: se sigue con backoff
+                    logger.error("Error in main trading loop, retrying in %ss: %s", self._backoff, e)
+                    logger.debug("Main trading loop traceback", exc_info=True)
+                    self._queue_error_alert(str(e), "Main trading loop")
+                    if self._stop_event.wait(self._backoff):
+                        break
+                    self._backoff = min(self._backoff * 2, MAX_ERROR_BACKOFF_SECONDS)
         except Exception as e:
-            logger.error(f"Critical error in start_trading: {str(e)}")
-            if hasattr(self, 'telegram_alerts'):
+            logger.error("Critical error in start_trading: %s", e)
+            # El bot va a terminar: envío directo para no perder la alerta al cerrar el proceso
+            if self.telegram_alerts:
                 self.telegram_alerts.send_error_alert(str(e), "Critical error")
-            # Disconnect from MT5
-            if hasattr(self, 'mt5_connector') and self.mt5_connector:
+        finally:
+            # Único punto de cierre: se desconecta de MT5 tanto en salida normal como por error
+            self._stop_event.set()
+            if self.mt5_connector:
                 self.mt5_connector.disconnect()
             logger.info("Mr.Cashondo Bot stopped")
+
+
+# Entrypoint para ejecución directa (al final del módulo: usa la versión definitiva de MrCashondoBot)
+if __name__ == "__main__":
+    try:
+        logger.info("Starting Mr.Cashondo Trading Bot...")
+        bot = MrCashondoBot()
+        bot.start_trading()
+    except Exception as e:
+        logger.error("Critical error in main: %s", e)
+    finally:
+        logger.info("Bot execution completed")
@@ -3,14 +3,25 @@ MetaTrader 5 Connector Module
 Manages connection and order execution with MT5 platform
 """
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import heapq
+from bisect import bisect_left
 import logging
-from typing import Dict, List, Optional, Tuple
+import math
+import re
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from operator import itemgetter
 import os
 from dotenv import load_dotenv
+try:
+    from numba import njit
+except ImportError:
+    # numba es opcional: sin él se usa la versión vectorizada con numpy
+    njit = None
 
 # Load environment variables
 load_dotenv()
@@ -26,8 +37,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
-@dataclass
+@dataclass(slots=True)
 class OrderRequest:
     """Data class for order requests"""
     symbol: str
@@ -39,9 +49,793 @@ class OrderRequest:
     comment: str = "MrcashondoV2"  # Cambiado para identificar versión V2
     # filling_mode eliminado: la lógica de filling_mode se gestiona internamente en send_order
 
+# Códigos de monedas ISO 4217 reconocidos en pares FOREX
+_FX_CURRENCIES = frozenset({
+    # Monedas principales
+    "USD", "EUR", "GBP", "JPY", "CHF", "AUD", "CAD", "NZD",
+    # Monedas secundarias
+    "SEK", "NOK", "DKK", "PLN", "CZK", "HUF", "TRY", "ZAR",
+    "MXN", "SGD", "HKD", "CNH", "RUB", "BRL", "KRW", "INR",
+    # Monedas emergentes
+    "CNY", "THB", "MYR", "IDR", "PHP", "VND", "EGP", "ILS",
+    "AED", "SAR", "QAR", "KWD", "BHD", "OMR", "JOD", "LBP"
+})
+
+# Patrones de nombre / path / descripción usados por los clasificadores _is_*_symbol
+_FOREX_PATH_TOKENS = ("forex", "fx", "currenc")
+_FOREX_DESCRIPTION_TERMS = ("forex", "currency pair", "fx rate", "exchange rate")
+_METAL_PATTERNS = ("XAU", "XAG", "XPD", "XPT", "GOLD", "SILVER", "PLATINUM", "PALLADIUM")
+_METAL_PATH_TOKENS = ("metals", "precious", "gold", "silver")
+_INDEX_PATTERNS = ("US30", "US500", "NAS100", "GER30", "UK100", "AUS200", "JPN225", "FRA40", "SPA35", "ITA40")
+_INDEX_PATH_TOKENS = ("indices", "index", "stock")
+_CRYPTO_PATTERNS = ("BTC", "ETH", "LTC", "XRP", "ADA", "DOT", "LINK", "BCH", "USDT", "USDC")
+_CRYPTO_PATH_TOKENS = ("crypto", "digital", "coin", "token")
+# Patrones de acciones comunes
+_STOCK_PATTERNS = (
+    "AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX",
+    "AMD", "INTC", "PYPL", "ADBE", "CRM", "ORCL", "UBER", "LYFT"
+)
+_STOCK_PATH_TOKENS = ("nasdaq", "nyse", "stocks", "shares", "equity", "stock")
+_ETF_PATH_TOKENS = ("etf", "fund", "trust")
+
+@lru_cache(maxsize=None)
+def pip_factor(symbol: str, digits: Optional[int] = None, point: Optional[float] = None) -> float:
+    """
+    Tamaño de un pip del símbolo en precio
+    
+    Con digits/point del broker: 10 puntos si la cotización tiene un decimal fraccional
+    (3 o 5 dígitos, p. ej. EURUSD 0.00001 -> 0.0001, USDJPY 0.001 -> 0.01) y 1 punto en el
+    resto (índices, metales, cripto). Sin ellos, 0.01 si el nombre contiene JPY (incluidos
+    sufijos del broker como USDJPY.m) y 0.0001 en otro caso.
+    """
+    if point:
+        return point * 10 if digits in (3, 5) else point
+    return 0.01 if 'JPY' in symbol else 0.0001
+
+def _alternation(patterns: Tuple[str, ...]) -> re.Pattern:
+    """Compila una tupla de subcadenas en una sola regex 'a|b|c' (una búsqueda en C en lugar de un any())"""
+    return re.compile("|".join(map(re.escape, patterns)))
+
+# Regex de los clasificadores: nombres en mayúsculas, paths y descripciones en minúsculas
+_FX_PATH_RE = _alternation(_FOREX_PATH_TOKENS)
+_FX_DESCRIPTION_RE = _alternation(_FOREX_DESCRIPTION_TERMS)
+_METAL_RE = _alternation(_METAL_PATTERNS)
+_METAL_PATH_RE = _alternation(_METAL_PATH_TOKENS)
+_INDEX_RE = _alternation(_INDEX_PATTERNS)
+_INDEX_PATH_RE = _alternation(_INDEX_PATH_TOKENS)
+_CRYPTO_RE = _alternation(_CRYPTO_PATTERNS)
+_CRYPTO_PATH_RE = _alternation(_CRYPTO_PATH_TOKENS)
+_STOCK_RE = _alternation(_STOCK_PATTERNS)
+_STOCK_PATH_RE = _alternation(_STOCK_PATH_TOKENS)
+_ETF_PATH_RE = _alternation(_ETF_PATH_TOKENS)
+# Par FOREX estándar XXXYYY: un solo match en C en lugar de dos slices + dos búsquedas en el set
+_FX_CURRENCY_GROUP = "(?:" + "|".join(sorted(_FX_CURRENCIES)) + ")"
+_FX_6CHAR_RE = re.compile(_FX_CURRENCY_GROUP + _FX_CURRENCY_GROUP)
+
+# Familias de símbolos de _classify_symbol (estrategia adaptativa)
+_CLASSIFY_MAJOR_RE = _alternation(("EURUSD", "GBPUSD", "USDJPY", "USDCHF"))
+_CLASSIFY_MINOR_RE = _alternation(("AUDUSD", "USDCAD", "NZDUSD", "EURJPY", "GBPJPY", "EURGBP"))
+_CLASSIFY_EXOTIC_RE = _alternation(("ZAR", "TRY", "MXN", "NOK", "SEK", "PLN"))
+
+# Patrones de _determine_instrument_category (paths en minúsculas, símbolos en mayúsculas)
+_CATEGORY_FOREX_PATH_RE = _alternation(("forex", "currencies", "fx", "major", "minor"))
+_CATEGORY_INDEX_PATH_RE = _alternation(("indices", "index", "indice"))
+_CATEGORY_METAL_PATH_RE = _alternation(("metals", "commodities", "xau", "gold", "xag"))
+_CATEGORY_FOREX_CCY = ("USD", "EUR", "JPY", "GBP", "AUD", "NZD", "CAD", "CHF", "CNY", "MXN", "SEK", "NOK")
+_CATEGORY_FOREX_CCY_RE = _alternation(_CATEGORY_FOREX_CCY)
+_CATEGORY_FOREX_EDGE_RE = re.compile("^(?:{0})|(?:{0})$".format("|".join(_CATEGORY_FOREX_CCY)))
+_CATEGORY_METAL_RE = _alternation(("XAU", "GOLD", "XAG", "SILVER", "PLAT", "PLATINUM", "COPPER", "PALLADIUM", "XPD", "XPT"))
+_CATEGORY_INDEX_RE = _alternation(("US30", "SPX", "SP500", "NAS100", "NDX", "DAX", "UK100", "FTSE", "CAC", "IBEX", "N225", "HSI"))
+_CATEGORY_CRYPTO_RE = _alternation(("BTC", "ETH", "LTC", "XRP", "DOGE", "BCH", "BNB", "USDT"))
+
+# Tablas de la estrategia adaptativa (antes cadenas if/elif)
+# Límites superiores (inclusive) de spread en pips: tight, normal, wide; por encima very_wide
+_SPREAD_CLASS_LIMITS = (2, 5, 10)
+_SPREAD_CLASSES = ('tight', 'normal', 'wide', 'very_wide')
+# Liquidez rebajada un escalón cuando el spread es wide o very_wide
+_LIQUIDITY_DOWNGRADE = {'very_high': 'high', 'high': 'medium'}
+# Límites (exclusivos) de ATR diario en pips para clasificar la volatilidad
+_VOLATILITY_LIMITS = (30, 50, 80, 150)
+_VOLATILITY_CLASSES = ('low', 'low-medium', 'normal', 'medium-high', 'high')
+# Multiplicadores de _get_recommended_risk (el valor por defecto cubre el resto de claves)
+_RISK_BY_CATEGORY = {'major_pairs': 1.0, 'minor_pairs': 0.8, 'precious_metals': 0.6, 'exotic_pairs': 0.4}
+_RISK_BY_LIQUIDITY = {'very_high': 1.0, 'high': 0.9, 'medium': 0.7}
+_RISK_BY_SPREAD_CLASS = {'tight': 1.0, 'normal': 0.8, 'wide': 0.6}
+# Parámetros base de _generate_adaptive_params (timeframes y ema_periods son tuplas compartidas)
+_ADAPTIVE_BASE_PARAMS = {
+    'timeframes': ('M15', 'M30', 'H1'),
+    'sl_multiplier': 1.5,
+    'tp_multiplier': 2.5,
+    'min_atr_threshold_multiplier': 2.0,
+    'confidence_threshold': 0.6,
+    'max_spread_threshold': 10,
+    'ema_periods': (20, 50, 200),
+    'rsi_period': 14,
+    'atr_period': 14,
+    'adx_threshold': 25,
+    'volume_filter': False,
+    'session_filter': False,  # Temporarily disabled for testing
+    'news_filter': False
+}
+# Parámetros de _get_default_strategy_params cuando no se puede adaptar la estrategia
+_DEFAULT_STRATEGY_PARAMS = {
+    'timeframes': ('M15', 'M30', 'H1'),
+    'sl_multiplier': 1.5,
+    'tp_multiplier': 2.5,
+    'min_atr_threshold_multiplier': 2.0,
+    'confidence_threshold': 0.6,
+    'max_spread_threshold': 10,
+    'ema_periods': (20, 50, 200),
+    'rsi_period': 14,
+    'atr_period': 14,
+    'adx_threshold': 25,
+    'symbol_category': 'unknown',
+    'recommended_risk_per_trade': 0.01
+}
+# Sobrescrituras por categoría sobre _ADAPTIVE_BASE_PARAMS
+_ADAPTIVE_PARAMS_BY_CATEGORY = {
+    # Pares principales: estrategia estándar con filtros estrictos
+    'major_pairs': {
+        'sl_multiplier': 1.2,
+        'tp_multiplier': 2.0,
+        'confidence_threshold': 0.65,
+        'max_spread_threshold': 3,
+        'adx_threshold': 20,
+        'volume_filter': False  # Temporarily disabled for testing
+    },
+    # Pares menores: parámetros ligeramente más conservadores
+    'minor_pairs': {
+        'sl_multiplier': 1.5,
+        'tp_multiplier': 2.3,
+        'confidence_threshold': 0.6,
+        'max_spread_threshold': 5,
+        'timeframes': ('M30', 'H1'),
+    },
+    # Pares JPY: ajustar por diferente valor de pip
+    'jpy_pairs': {
+        'sl_multiplier': 1.0,  # JPY se mueve más
+        'tp_multiplier': 1.8,
+        'min_atr_threshold_multiplier': 1.5,
+        'confidence_threshold': 0.62,
+        'max_spread_threshold': 4
+    },
+    # Metales: mayor volatilidad, parámetros más amplios
+    'precious_metals': {
+        'sl_multiplier': 2.5,
+        'tp_multiplier': 4.0,
+        'confidence_threshold': 0.7,
+        'max_spread_threshold': 50,
+        'timeframes': ('M30', 'H1', 'H4'),
+        'adx_threshold': 30,
+        'min_atr_threshold_multiplier': 3.0
+    },
+    # Pares exóticos: muy conservador
+    'exotic_pairs': {
+        'sl_multiplier': 2.0,
+        'tp_multiplier': 3.5,
+        'confidence_threshold': 0.75,
+        'max_spread_threshold': 20,
+        'timeframes': ('H1', 'H4'),
+        'adx_threshold': 35,
+        'session_filter': False,  # Temporarily disabled for testing
+        'news_filter': True
+    },
+}
+# Ajustes por volatilidad: (factor SL, factor TP, suma a confianza, suma a ADX)
+_VOLATILITY_ADJUSTMENTS = {
+    'high': (1.4, 1.3, 0.05, 5),    # Alta volatilidad: aumentar SL/TP, mayor prudencia
+    'low': (0.8, 0.9, -0.05, -5),   # Baja volatilidad: reducir SL/TP, ser más agresivo
+}
+# Límites de seguridad (mínimo, máximo) de los parámetros ajustados
+_SL_MULTIPLIER_LIMITS = (0.8, 3.0)
+_TP_MULTIPLIER_LIMITS = (1.2, 5.0)
+_CONFIDENCE_LIMITS = (0.5, 0.8)
+_ADX_LIMITS = (15, 40)
+# Volumen mínimo por categoría (100 para el resto)
+_MIN_VOLUME_BY_CATEGORY = {
+    'major_pairs': 1000,
+    'minor_pairs': 500,
+    'exotic_pairs': 100,
+    'precious_metals': 200,
+    'indices': 300
+}
+# Sesiones óptimas por familia de símbolo, en orden de prioridad; el resto usa _DEFAULT_SESSIONS
+_SESSIONS_BY_FAMILY = (
+    (_alternation(('USDJPY', 'EURJPY', 'GBPJPY', 'AUDJPY')), ('asia', 'london', 'newyork')),
+    (_alternation(('EURUSD', 'GBPUSD', 'EURGBP', 'EURCHF')), ('london', 'newyork')),
+    (_alternation(('AUDUSD', 'NZDUSD', 'AUDNZD')), ('asia', 'london')),
+)
+# Metales y resto de símbolos: más activos en Londres y Nueva York
+_DEFAULT_SESSIONS = ('london', 'newyork')
+
+@lru_cache(maxsize=4096)
+def _symbol_family(symbol: str) -> Tuple[str, str]:
+    """Categoría y liquidez base de _classify_symbol (solo depende del nombre)"""
+    if symbol.startswith('XAU') or 'GOLD' in symbol:
+        return 'precious_metals', 'high'
+    if symbol.startswith('XAG') or 'SILVER' in symbol:
+        return 'precious_metals', 'medium'
+    if _CLASSIFY_MAJOR_RE.search(symbol):
+        return 'major_pairs', 'very_high'
+    if _CLASSIFY_MINOR_RE.search(symbol):
+        return 'minor_pairs', 'high'
+    if symbol.endswith('JPY') or symbol.startswith('JPY'):
+        return 'jpy_pairs', 'medium-high'
+    if _CLASSIFY_EXOTIC_RE.search(symbol):
+        return 'exotic_pairs', 'low-medium'
+    return 'cross_pairs', 'medium'
+
+@lru_cache(maxsize=4096)
+def _recommended_risk(category: str, liquidity: str, spread_class: str) -> float:
+    """Riesgo recomendado por operación (ver MT5Connector._get_recommended_risk)"""
+    base_risk = 0.01  # 1% base
+    
+    # Ajustar por categoría, liquidez y spread
+    final_risk = (base_risk
+                  * _RISK_BY_CATEGORY.get(category, 0.7)
+                  * _RISK_BY_LIQUIDITY.get(liquidity, 0.5)
+                  * _RISK_BY_SPREAD_CLASS.get(spread_class, 0.4))
+    return max(0.002, min(0.015, final_risk))  # Entre 0.2% y 1.5%
+
+@lru_cache(maxsize=4096)
+def _optimal_sessions(symbol: str) -> Tuple[str, ...]:
+    """Sesiones de trading óptimas para el símbolo (tupla compartida)"""
+    # Sesiones principales para diferentes regiones
+    for family_re, sessions in _SESSIONS_BY_FAMILY:
+        if family_re.search(symbol):
+            return sessions
+    return _DEFAULT_SESSIONS
+
+@lru_cache(maxsize=4096)
+def _instrument_category(symbol: str, path: str) -> str:
+    """
+    Categoría del instrumento a partir del símbolo y su path en minúsculas
+    (ver MT5Connector._determine_instrument_category)
+    """
+    # Determinar categoría por path si disponible
+    if path:
+        if _CATEGORY_FOREX_PATH_RE.search(path):
+            return 'forex'
+        elif _CATEGORY_INDEX_PATH_RE.search(path):
+            return 'index'
+        elif _CATEGORY_METAL_PATH_RE.search(path):
+            return 'metal'
+        else:
+            return 'unknown'
+    
+    # Determinar por patrones en el símbolo
+    symbol_upper = symbol.upper()
+    
+    # Detección de FOREX mejorada
+    if len(symbol_upper) <= 8 and _CATEGORY_FOREX_EDGE_RE.search(symbol_upper):
+        # Verificar que tenga al menos dos códigos de moneda distintos
+        if len(set(_CATEGORY_FOREX_CCY_RE.findall(symbol_upper))) >= 2:
+            return "forex"
+    
+    # Detección de metales más robusta
+    if _CATEGORY_METAL_RE.search(symbol_upper):
+        return "metal"
+        
+    # Detección de índices más amplia
+    if _CATEGORY_INDEX_RE.search(symbol_upper):
+        return "index"
+        
+    # Detección de criptomonedas
+    if _CATEGORY_CRYPTO_RE.search(symbol_upper):
+        return "crypto"
+        
+    # Lógica adicional para símbolos específicos
+    if 'USD' in symbol_upper and len(symbol_upper) >= 3 and len(symbol_upper) <= 8:
+        return "forex"  # Probable par de divisas
+        
+    # Por defecto asumimos acciones si no se puede categorizar y parece tener formato de ticker
+    if len(symbol_upper) <= 5 and symbol_upper.isalpha():
+        return "stock"
+        
+    # Último recurso
+    return "unknown"
+
+# Distancia mínima de stops en precio por categoría de instrumento: (normal, force_adjustment)
+_MIN_STOP_DISTANCE = {
+    'forex_jpy': (0.10, 0.20),    # Mínimo 10-20 pips para pares JPY
+    'forex': (0.0010, 0.0020),    # Mínimo 10-20 pips para forex normal
+    'metal': (0.6, 1.0),          # Mínimo 0.6-1.0 USD para oro/plata
+    'index': (3.0, 5.0),          # Mínimo 3-5 puntos para índices
+    'stock': (2.0, 3.0),          # Mínimo 2-3 USD para acciones
+    'crypto': (20.0, 40.0),       # Mínimo 20-40 USD para criptomonedas
+    'unknown': (1.0, 2.0),        # Valor seguro por defecto
+}
+
+def _build_stops_spec(symbol: str, digits: int, point: float, trade_stops_level: int) -> 'StopsSpec':
+    """Construye el StopsSpec de un símbolo (categoría por nombre, ver _instrument_category)"""
+    category = _instrument_category(symbol, '')
+    if category == 'forex' and 'JPY' in symbol:
+        category = 'forex_jpy'
+    return StopsSpec(
+        pow10=10.0 ** int(digits),
+        point=float(point),
+        trade_stops_level=int(trade_stops_level or 0),
+        min_stop_distances=_MIN_STOP_DISTANCE.get(category, _MIN_STOP_DISTANCE['unknown']),
+    )
+
+# Clasificaciones memorizadas: solo dependen del nombre/path del símbolo
+_CLASSIFICATION_CACHES = (_symbol_family, _recommended_risk, _optimal_sessions, _instrument_category)
+
+def classification_cache_info() -> Dict[str, Any]:
+    """Estadísticas (hits/misses) de las cachés de clasificación de símbolos"""
+    return {func.__name__: func.cache_info() for func in _CLASSIFICATION_CACHES}
+
+def clear_classification_caches() -> None:
+    """Vacía las cachés de clasificación (e.g. al cambiar de broker o de configuración de símbolos)"""
+    for func in _CLASSIFICATION_CACHES:
+        func.cache_clear()
+
+def _rates_to_columns(rates) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte los rates de MT5 en un bloque OHLCV contiguo por columnas y un array de tiempos
+    
+    copy_rates_from_pos devuelve un array estructurado (registros intercalados). Se copia una
+    sola vez a un bloque (5, n) para que cada serie (close, high, ...) sea de paso 1 al recorrerla
+    en los indicadores. Se mantiene float64: float32 perdería precisión en cotizaciones de
+    5 dígitos e índices.
+    
+    Returns:
+        (ohlcv, times): ohlcv con filas en el orden de OHLCV_FIELDS y times como int64
+    """
+    ohlcv = np.empty((len(OHLCV_FIELDS), len(rates)), dtype=BAR_DTYPE)
+    for row, field in zip(ohlcv, OHLCV_FIELDS):
+        np.copyto(row, rates[field], casting='same_kind')
+    times = np.ascontiguousarray(rates['time'], dtype=TIME_DTYPE)
+    return ohlcv, times
+
+def _as_dict(mt5_record) -> Dict:
+    """Convierte un registro de MT5 (SymbolInfo, Tick, ...) en dict con una sola llamada"""
+    if hasattr(mt5_record, '_asdict'):
+        return mt5_record._asdict()
+    return dict(vars(mt5_record))
+
+@dataclass(frozen=True, slots=True)
+class TradingParams:
+    """Parámetros de trading de un símbolo (ver MT5Connector.get_trading_params)"""
+    symbol: str
+    min_volume: float
+    max_volume: float
+    volume_step: float
+    digits: int
+    point: float
+    spread: int
+    trade_stops_level: int
+    freeze_level: int
+    execution_mode: int
+    contract_size: float
+    tick_value: float
+    tick_size: float
+    margin_initial: float
+    swap_long: float
+    swap_short: float
+    current_bid: float
+    current_ask: float
+    current_spread: float
+    min_stop_distance: float
+
+    def to_dict(self) -> Dict:
+        """Devuelve los parámetros como dict (formato de get_dynamic_trading_params)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+@dataclass(frozen=True, slots=True)
+class StopsSpec:
+    """Campos de un símbolo que necesita validate_and_adjust_stops (ver MT5Connector._get_stops_spec)"""
+    pow10: float
+    point: float
+    trade_stops_level: int
+    min_stop_distances: Tuple[float, float]
+
+class SymbolClass(NamedTuple):
+    """Clasificación de un símbolo para la estrategia adaptativa (ver MT5Connector._classify_symbol)"""
+    category: str
+    liquidity: str
+    spread_class: str
+    volatility: str
+    spread_pips: float
+
+@dataclass(frozen=True, slots=True)
+class SymbolInfoLite:
+    """Campos de un símbolo que necesita validate_order_parameters (ver MT5Connector._get_symbol_info_lite)"""
+    tradeable: bool
+    min_lot: float
+    max_lot: float
+    lot_step: float
+    trade_stops_level: int
+    point: float
+
+@dataclass(frozen=True, slots=True)
+class SymbolSpec:
+    """Especificaciones de un símbolo sin los campos del tick (ver MT5Connector.get_symbol_spec)"""
+    name: str
+    description: str
+    currency_base: str
+    currency_profit: str
+    currency_margin: str
+    point: float
+    digits: int
+    spread: int
+    spread_float: bool
+    trade_mode: int
+    trade_stops_level: int
+    trade_freeze_level: int
+    min_lot: float
+    max_lot: float
+    lot_step: float
+    contract_size: float
+    tick_value: float
+    tick_size: float
+    swap_long: float
+    swap_short: float
+    margin_initial: float
+    margin_maintenance: float
+    session_deals: int
+    session_buy_orders: int
+    session_sell_orders: int
+    visible: bool
+    select: bool
+    tradeable: bool
+    is_jpy: bool
+    pip_factor: float
+    filling_mode: int
+    valid_filling_modes: List[int]
+
+    def to_dict(self) -> Dict:
+        """Devuelve las especificaciones como dict (formato de get_symbol_specifications sin el tick)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+# Layout de una posición abierta para get_positions_array (símbolo y comentario de MT5 <= 31 caracteres)
+POSITION_DTYPE = np.dtype([
+    ('ticket', 'i8'), ('symbol', 'U32'), ('type', 'i4'), ('volume', 'f8'),
+    ('price_open', 'f8'), ('price_current', 'f8'), ('sl', 'f8'), ('tp', 'f8'),
+    ('profit', 'f8'), ('comment', 'U32')
+])
+
+# Valores por defecto de los campos de SymbolInfo que no todas las versiones/brokers exponen
+_SYMBOL_DEFAULTS = {
+    'trade_stops_level': 0, 'freeze_level': 0, 'volume_limit': 0, 'margin_initial': 0,
+    'margin_maintenance': 0, 'swap_sunday': 0, 'swap_monday': 0, 'swap_tuesday': 0,
+    'swap_wednesday': 0, 'swap_thursday': 0, 'swap_friday': 0, 'swap_saturday': 0,
+    'trade_contract_size': 100000, 'trade_tick_value': 1.0, 'trade_tick_size': 0.00001,
+    'trade_execution_mode': 0, 'expiration_mode': 0, 'order_gtc_mode': 0, 'option_mode': 0,
+    'option_right': 0, 'background_color': 0, 'isin': '', 'category': '', 'exchange': '',
+    'formula': '', 'page': '', 'sector': '', 'industry': '', 'country': '', 'sector_name': '',
+    'industry_name': '', 'country_name': '', 'subscription_delay': 0, 'trade_calc_mode': 0,
+    'trade_freeze_level': 0, 'trade_exemode': 0, 'start_time': 0, 'expiration_time': 0,
+    'sessions_quotes': 0, 'sessions_trades': 0, 'session_deals': 0, 'session_buy_orders': 0,
+    'session_sell_orders': 0, 'volume': 0, 'volumehigh': 0, 'volumelow': 0, 'time': 0,
+}
+
+# (clave devuelta por get_symbol_info, campo de SymbolInfo) para los datos estáticos del símbolo:
+# solo lo que el broker no cambia durante la sesión (dígitos, tamaños de contrato y lote, divisas, ...)
+_STATIC_SYMBOL_KEYS = (
+    ('description', 'description'), ('currency_base', 'currency_base'),
+    ('currency_profit', 'currency_profit'), ('currency_margin', 'currency_margin'),
+    ('digits', 'digits'), ('point', 'point'), ('min_volume', 'volume_min'),
+    ('max_volume', 'volume_max'), ('volume_step', 'volume_step'), ('volume_limit', 'volume_limit'),
+    ('contract_size', 'trade_contract_size'), ('tick_size', 'trade_tick_size'),
+    ('execution_mode', 'trade_execution_mode'),
+    ('expiration_mode', 'expiration_mode'), ('order_gtc_mode', 'order_gtc_mode'),
+    ('option_mode', 'option_mode'), ('option_right', 'option_right'),
+    ('custom', 'custom'), ('background_color', 'background_color'),
+    ('path', 'path'), ('isin', 'isin'), ('category', 'category'), ('exchange', 'exchange'),
+    ('formula', 'formula'), ('page', 'page'), ('sector', 'sector'), ('industry', 'industry'),
+    ('country', 'country'), ('sector_name', 'sector_name'), ('industry_name', 'industry_name'),
+    ('country_name', 'country_name'), ('subscription_delay', 'subscription_delay'),
+    ('trade_calc_mode', 'trade_calc_mode'), ('trade_exemode', 'trade_exemode'),
+    ('start_time', 'start_time'), ('expiration_time', 'expiration_time'),
+    ('sessions_quotes', 'sessions_quotes'), ('sessions_trades', 'sessions_trades'),
+)
+
+# (clave, campo de SymbolInfo) para los datos de cotización, sesión y condiciones de trading que el
+# broker puede cambiar en cualquier momento (tick_value sigue al tipo de cambio; stops, freeze level,
+# márgenes y swaps cambian con noticias y rollover): se releen con cada refresco de get_symbol_info
+_QUOTE_SYMBOL_KEYS = (
+    ('tick_value', 'trade_tick_value'), ('trade_stops_level', 'trade_stops_level'),
+    ('freeze_level', 'freeze_level'), ('trade_freeze_level', 'trade_freeze_level'),
+    ('trade_mode', 'trade_mode'), ('margin_initial', 'margin_initial'),
+    ('margin_maintenance', 'margin_maintenance'), ('swap_long', 'swap_long'),
+    ('swap_short', 'swap_short'), ('swap_sunday', 'swap_sunday'), ('swap_monday', 'swap_monday'),
+    ('swap_tuesday', 'swap_tuesday'), ('swap_wednesday', 'swap_wednesday'),
+    ('swap_thursday', 'swap_thursday'), ('swap_friday', 'swap_friday'),
+    ('swap_saturday', 'swap_saturday'), ('visible', 'visible'), ('select', 'select'),
+    ('spread', 'spread'), ('session_deals', 'session_deals'),
+    ('session_buy_orders', 'session_buy_orders'), ('session_sell_orders', 'session_sell_orders'),
+    ('volume', 'volume'), ('volumehigh', 'volumehigh'), ('volumelow', 'volumelow'),
+    ('time', 'time'), ('bid', 'bid'), ('ask', 'ask'), ('last', 'last'),
+)
+
+# (clave, campo de Tick) para la información del último tick
+_TICK_KEYS = (
+    ('current_bid', 'bid'), ('current_ask', 'ask'), ('current_last', 'last'),
+    ('current_volume', 'volume'), ('current_time', 'time'), ('current_flags', 'flags'),
+    ('current_volume_real', 'volume_real'),
+)
+
+# Campos numéricos de los rates de MT5, en el orden en que se guardan en MarketData
+OHLCV_FIELDS = ('open', 'high', 'low', 'close', 'tick_volume')
+# dtypes de las series de MarketData: precios/volumen en float64 (float32 no conserva 5 decimales
+# en precios de 5 cifras como índices o BTC) y tiempos como segundos epoch en int64
+BAR_DTYPE = np.float64
+TIME_DTYPE = np.int64
+# Validez (segundos) de la información de cotización cacheada por get_symbol_info
+SYMBOL_INFO_TTL_SECONDS = 0.25
+# Validez (segundos) de las especificaciones cacheadas por get_symbol_specifications (el tick se consulta siempre)
+SYMBOL_SPEC_TTL_SECONDS = 0.5
+# Validez (segundos) de account_info y de los ticks cacheados por get_account_balance / get_current_price
+ACCOUNT_INFO_TTL_SECONDS = 0.25
+TICK_TTL_SECONDS = 0.05
+# Validez (segundos) de los datos de stops cacheados por _get_stops_spec: el broker amplía stops level
+# alrededor de noticias y rollover y MT5 no notifica el cambio (además se descartan si una orden
+# se rechaza con TRADE_RETCODE_INVALID_STOPS)
+STOPS_SPEC_TTL_SECONDS = 60.0
+# Límite de sesiones de cotización por día que se consultan en get_market_hours
+MAX_SESSIONS_PER_DAY = 8
+# Velas recientes que se piden para actualizar una serie ya cacheada en get_market_data
+BAR_UPDATE_COUNT = 16
+# EMA que usa TechnicalIndicators.calculate_indicators y que se pueden precalcular al descargar
+DEFAULT_EMA_PERIODS = (20, 50, 200)
+# Velas M15 que descarga _analyze_symbol_volatility para reconstruir H1/H4/D1 (~20 días de mercado 24h)
+VOLATILITY_M15_BARS = 2000
+# Periodo del ATR de _analyze_symbol_volatility
+VOLATILITY_ATR_PERIOD = 14
+
+def _mt5_constant_map(pairs) -> Dict:
+    """Construye un dict {constante MT5: valor} omitiendo constantes que la versión instalada no define"""
+    return {getattr(mt5, name): value for name, value in pairs if hasattr(mt5, name)}
+
+# Timeframes soportados (cadena -> constante MT5), calculados una sola vez al importar
+_TF_MAP = {tf: getattr(mt5, f"TIMEFRAME_{tf}") for tf in ("M1", "M5", "M15", "M30", "H1", "H4", "D1")
+           if hasattr(mt5, f"TIMEFRAME_{tf}")}
+
+# Prioridad de filling modes para send_order: (bit en symbol_info.filling_modes, modo de orden, nombre)
+_FILL_PRIORITY = (
+    (getattr(mt5, 'SYMBOL_FILLING_IOC', 1), getattr(mt5, 'ORDER_FILLING_IOC', 1), 'IOC'),
+    (getattr(mt5, 'SYMBOL_FILLING_RETURN', 2), getattr(mt5, 'ORDER_FILLING_RETURN', 2), 'RETURN'),
+    (getattr(mt5, 'SYMBOL_FILLING_FOK', 4), getattr(mt5, 'ORDER_FILLING_FOK', 4), 'FOK'),
+)
+
+# Descripciones de los códigos de retorno de MT5
+_RETCODE_DESC = _mt5_constant_map((
+    ("TRADE_RETCODE_REQUOTE", "Requote"),
+    ("TRADE_RETCODE_REJECT", "Request rejected"),
+    ("TRADE_RETCODE_CANCEL", "Request canceled"),
+    ("TRADE_RETCODE_PLACED", "Order placed"),
+    ("TRADE_RETCODE_DONE", "Request completed"),
+    ("TRADE_RETCODE_DONE_PARTIAL", "Request partially completed"),
+    ("TRADE_RETCODE_ERROR", "Request processing error"),
+    ("TRADE_RETCODE_TIMEOUT", "Request timeout"),
+    ("TRADE_RETCODE_INVALID", "Invalid request"),
+    ("TRADE_RETCODE_INVALID_VOLUME", "Invalid volume"),
+    ("TRADE_RETCODE_INVALID_PRICE", "Invalid price"),
+    ("TRADE_RETCODE_INVALID_STOPS", "Invalid stops"),
+    ("TRADE_RETCODE_TRADE_DISABLED", "Trade disabled"),
+    ("TRADE_RETCODE_MARKET_CLOSED", "Market closed"),
+    ("TRADE_RETCODE_NO_MONEY", "Insufficient money"),
+    ("TRADE_RETCODE_PRICE_CHANGED", "Price changed"),
+    ("TRADE_RETCODE_PRICE_OFF", "Off quotes"),
+    ("TRADE_RETCODE_INVALID_EXPIRATION", "Invalid expiration"),
+    ("TRADE_RETCODE_ORDER_CHANGED", "Order changed"),
+    ("TRADE_RETCODE_TOO_MANY_REQUESTS", "Too many requests"),
+    ("TRADE_RETCODE_NO_CHANGES", "No changes"),
+    ("TRADE_RETCODE_SERVER_DISABLES_AT", "Auto trading disabled"),
+    ("TRADE_RETCODE_CLIENT_DISABLES_AT", "Auto trading disabled by client"),
+    ("TRADE_RETCODE_LOCKED", "Request locked"),
+    ("TRADE_RETCODE_FROZEN", "Order or position frozen"),
+    ("TRADE_RETCODE_INVALID_FILL", "Invalid order filling type"),
+    ("TRADE_RETCODE_CONNECTION", "No connection"),
+    ("TRADE_RETCODE_ONLY_REAL", "Only real accounts allowed"),
+    ("TRADE_RETCODE_LIMIT_ORDERS", "Orders limit reached"),
+    ("TRADE_RETCODE_LIMIT_VOLUME", "Volume limit reached"),
+    ("TRADE_RETCODE_INVALID_ORDER", "Invalid or prohibited order type"),
+    ("TRADE_RETCODE_POSITION_CLOSED", "Position closed"),
+    ("TRADE_RETCODE_INVALID_CLOSE_VOLUME", "Invalid close volume"),
+    ("TRADE_RETCODE_CLOSE_ORDER_EXIST", "Close order already exists"),
+    ("TRADE_RETCODE_LIMIT_POSITIONS", "Positions limit reached"),
+))
+
+# Retcode de stops inválidos (invalida la caché de _get_stops_spec del símbolo)
+_RETCODE_INVALID_STOPS = getattr(mt5, 'TRADE_RETCODE_INVALID_STOPS', 10016)
+
+# Tabla indexada por (retcode - _RETCODE_BASE): los retcodes de MT5 son enteros consecutivos (~10004-10046)
+_RETCODE_BASE = min(_RETCODE_DESC, default=0)
+_RETCODE_TABLE = tuple(_RETCODE_DESC.get(code) for code in range(_RETCODE_BASE, max(_RETCODE_DESC, default=-1) + 1))
+
+def _precompute_loop(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula en una sola pasada el true range y el retorno simple de cada vela
+    
+    Args:
+        high, low, close: Series de precios contiguas
+    Returns:
+        (tr, ret): Arrays del mismo tamaño que close (tr[0] = high-low, ret[0] = 0)
+    """
+    n = close.shape[0]
+    tr = np.empty(n, dtype=BAR_DTYPE)
+    ret = np.empty(n, dtype=BAR_DTYPE)
+    if n == 0:
+        return tr, ret
+    tr[0] = high[0] - low[0]
+    ret[0] = 0.0
+    for i in range(1, n):
+        prev_close = close[i - 1]
+        tr[i] = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        ret[i] = close[i] / prev_close - 1.0 if prev_close != 0.0 else 0.0
+    return tr, ret
+
+def _precompute_numpy(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Equivalente vectorizado de _precompute_loop cuando numba no está instalado"""
+    tr = np.empty_like(close, dtype=BAR_DTYPE)
+    ret = np.zeros_like(close, dtype=BAR_DTYPE)
+    if close.shape[0] == 0:
+        return tr, ret
+    prev_close = close[:-1]
+    tr[0] = high[0] - low[0]
+    tr[1:] = np.maximum(high[1:] - low[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    np.divide(close[1:], prev_close, out=ret[1:], where=prev_close != 0)
+    ret[1:] = np.where(prev_close != 0, ret[1:] - 1.0, 0.0)
+    return tr, ret
+
+_precompute = njit(cache=True)(_precompute_loop) if njit is not None else _precompute_numpy
+
+def _ema_fused_py(close: np.ndarray, periods: np.ndarray, out: np.ndarray) -> None:
+    """
+    Calcula varias EMA en una sola pasada sobre close (misma definición que indicators.ema.calculate_ema)
+    
+    Args:
+        close: Serie de cierres contigua
+        periods: Periodos de las EMA (todos <= len(close))
+        out: Array (len(periods), len(close)) donde se escribe cada EMA; NaN antes de tener datos
+    """
+    n = close.shape[0]
+    for j in range(periods.shape[0]):
+        period = periods[j]
+        out[j, :period - 1] = np.nan
+        out[j, period - 1] = close[:period].mean()
+    for i in range(1, n):
+        price = close[i]
+        for j in range(periods.shape[0]):
+            period = periods[j]
+            if i >= period:
+                k = 2.0 / (period + 1)
+                out[j, i] = price * k + out[j, i - 1] * (1.0 - k)
+
+_ema_fused = njit(cache=True)(_ema_fused_py) if njit is not None else _ema_fused_py
+
+def _resample_hlc(rates: np.ndarray, seconds: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Agrega velas de MT5 a un timeframe mayor agrupando por time // seconds
+    
+    Los tiempos de MT5 están en hora del servidor, igual que los límites de las velas H1/H4/D1,
+    y los huecos (fines de semana, cierres) no generan velas vacías.
+    
+    Args:
+        rates: Array estructurado de copy_rates_from_pos (ordenado por tiempo)
+        seconds: Duración de la vela destino en segundos
+        
+    Returns:
+        Tuple (high, low, close) del timeframe agregado
+    """
+    bucket = rates['time'] // seconds
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], len(rates)) - 1
+    high = np.maximum.reduceat(np.asarray(rates['high'], dtype=BAR_DTYPE), starts)
+    low = np.minimum.reduceat(np.asarray(rates['low'], dtype=BAR_DTYPE), starts)
+    close = np.ascontiguousarray(rates['close'][ends], dtype=BAR_DTYPE)
+    return high, low, close
+
+def _last_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+              period: int = VOLATILITY_ATR_PERIOD) -> Optional[float]:
+    """
+    Media simple de los últimos `period` True Range (se descarta la primera vela, sin cierre previo)
+    
+    Returns:
+        ATR o None si no hay más de `period` velas
+    """
+    if len(close) <= period:
+        return None
+    tr, _ = _precompute(np.ascontiguousarray(high, dtype=BAR_DTYPE),
+                        np.ascontiguousarray(low, dtype=BAR_DTYPE),
+                        np.ascontiguousarray(close, dtype=BAR_DTYPE))
+    return float(tr[-period:].mean())
+
+# Bits devueltos por _adjust_stops indicando qué ajustes se aplicaron (para el log del llamador)
+STOP_SL_DEFAULTED = 1
+STOP_SL_DISTANCE = 2
+STOP_TP_DEFAULTED = 4
+STOP_TP_DISTANCE = 8
+STOP_TP_RISK_REWARD = 16
+STOP_SL_FORCED = 32
+STOP_TP_FORCED = 64
+
+def _round_price_py(value: float, pow10: float) -> float:
+    """Redondea value a los dígitos del símbolo (pow10 = 10**digits) con aritmética entera"""
+    return math.floor(value * pow10 + 0.5) / pow10
+
+_round_price = njit(cache=True)(_round_price_py) if njit is not None else _round_price_py
+
+def _adjust_stops_py(order_type: int, price: float, sl: float, tp: float,
+                     min_distance_price: float, pow10: float) -> Tuple[float, float, int]:
+    """
+    Núcleo numérico de MT5Connector.validate_and_adjust_stops (sin logging ni llamadas a MT5)
+    
+    Args:
+        order_type: Tipo de orden (BUY=0, SELL=1)
+        price: Precio de referencia ya validado (> 0)
+        sl: Stop Loss propuesto
+        tp: Take Profit propuesto
+        min_distance_price: Distancia mínima permitida en precio
+        pow10: 10**digits del símbolo para el redondeo
+    Returns:
+        (sl, tp, ajustes): stops ajustados y máscara de bits STOP_*
+    """
+    adjustments = 0
+    is_buy = order_type == 0
+    # Prevenir stops negativos para cualquier instrumento
+    if sl <= 0:
+        if is_buy:
+            sl = max(price - min_distance_price, price * 0.90)
+        else:
+            sl = min(price + min_distance_price, price * 1.10)
+        adjustments |= STOP_SL_DEFAULTED
+    # SL por debajo del precio en compras y por encima en ventas, respetando la distancia mínima
+    if is_buy:
+        if sl >= price or price - sl < min_distance_price:
+            sl = max(price - min_distance_price, price * 0.90)
+            adjustments |= STOP_SL_DISTANCE
+    else:
+        if sl <= price or sl - price < min_distance_price:
+            sl = min(price + min_distance_price, price * 1.10)
+            adjustments |= STOP_SL_DISTANCE
+    # TP nulo o negativo: crear uno por defecto basado en el SL (ratio 1.5)
+    if tp <= 0:
+        if is_buy:
+            tp = price + max((price - sl) * 1.5, min_distance_price)
+        else:
+            tp = price - max((sl - price) * 1.5, min_distance_price)
+        adjustments |= STOP_TP_DEFAULTED
+    # TP por encima del precio en compras y por debajo en ventas
+    if is_buy:
+        if tp <= price or tp - price < min_distance_price:
+            tp = price + max(min_distance_price, abs(price - sl) * 1.5)
+            adjustments |= STOP_TP_DISTANCE
+    else:
+        if tp >= price or price - tp < min_distance_price:
+            tp = price - max(min_distance_price, abs(sl - price) * 1.5)
+            adjustments |= STOP_TP_DISTANCE
+    # Mantener la relación riesgo-recompensa
+    if abs(tp - sl) / max(abs(price - sl), 1e-8) < 1.3:
+        if is_buy:
+            tp = price + max(abs(price - sl) * 1.5, min_distance_price)
+        else:
+            tp = price - max(abs(sl - price) * 1.5, min_distance_price)
+        adjustments |= STOP_TP_RISK_REWARD
+    sl = _round_price(sl, pow10)
+    tp = _round_price(tp, pow10)
+    # Chequeo final: nunca retornar stops negativos o cero
+    if sl <= 0:
+        sl = _round_price(price * 0.90 if is_buy else price * 1.10, pow10)
+        adjustments |= STOP_SL_FORCED
+    if tp <= 0:
+        tp = _round_price(price * 1.05 if is_buy else price * 0.95, pow10)
+        adjustments |= STOP_TP_FORCED
+    return sl, tp, adjustments
+
+_adjust_stops = njit(cache=True)(_adjust_stops_py) if njit is not None else _adjust_stops_py
+
 @dataclass
 class MarketData:
-    """Data class for market data"""
+    """
+    Data class for market data
+    
+    Cada serie es un array 1-D contiguo. No se expone el array estructurado de MT5: el código
+    que recorra velas (o un kernel numba) debe recibir las columnas por separado, nunca
+    indexar registros ('rate["close"]') dentro de un bucle.
+    """
     symbol: str
     timeframe: str
     open: np.ndarray
@@ -50,6 +844,11 @@ class MarketData:
     close: np.ndarray
     volume: np.ndarray
     time: np.ndarray
+    # Series derivadas que get_market_data precalcula junto con la descarga (None si no se calcularon)
+    tr: Optional[np.ndarray] = None
+    ret: Optional[np.ndarray] = None
+    # EMA precalculadas por get_market_data_with_features: {periodo: serie}
+    ema: Optional[Dict[int, np.ndarray]] = None
 
     def __init__(self, symbol: str, timeframe: str, open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, time: np.ndarray):
         self.symbol = symbol
@@ -60,6 +859,15 @@ class MarketData:
         self.close = close
         self.volume = volume
         self.time = time
+        self.tr = None
+        self.ret = None
+        self.ema = None
+
+    @cached_property
+    def datetime(self):
+        """Tiempos de las velas como DatetimeIndex UTC (se calcula la primera vez que se pide)"""
+        import pandas as pd
+        return pd.to_datetime(self.time, unit='s', utc=True)
 
 class MT5Connector:
     def get_server_time(self) -> Optional[datetime]:
@@ -69,7 +877,6 @@ class MT5Connector:
             datetime: Hora actual del servidor MT5 en formato UTC, o None si falla.
         """
         try:
-            import MetaTrader5 as mt5
             if not self.connected:
                 logger.warning("No conectado a MT5 para obtener hora del servidor.")
                 return None
@@ -98,6 +905,27 @@ class MT5Connector:
         self.connected = False
         self.account_info = None
         self.account_currency = None
+        # Cache de información de símbolos: estática por sesión y de cotización con TTL corto
+        self._static_symbol_info: Dict[str, Dict] = {}
+        # Datos de stops por símbolo (se precargan al conectar) y sus aciertos/fallos [hits, misses]
+        self._stops_spec_cache: Dict[str, Tuple[float, StopsSpec]] = {}
+        self._stops_spec_stats: List[int] = [0, 0]
+        self._symbol_info_cache: Dict[str, Tuple[float, Dict]] = {}
+        # Últimas velas descargadas por (symbol, timeframe, count) -> (ohlcv, times)
+        self._bar_cache: Dict[Tuple[str, str, int], Tuple[np.ndarray, np.ndarray]] = {}
+        # Especificaciones de get_symbol_spec (sin tick) -> (monotonic, SymbolSpec)
+        self._spec_cache: Dict[str, Tuple[float, SymbolSpec]] = {}
+        # Subconjunto para validate_order_parameters -> (monotonic, SymbolInfoLite)
+        self._symbol_lite_cache: Dict[str, Tuple[float, SymbolInfoLite]] = {}
+        # Respuestas de MT5 de vida muy corta (account_info, ticks) -> (monotonic, valor)
+        self._micro_cache: Dict[tuple, Tuple[float, object]] = {}
+        # Aciertos/fallos de _micro_cache por tipo de clave ("tick", "acct") -> [hits, misses]
+        self._micro_cache_stats: Dict[str, List[int]] = {}
+        # Sesiones de get_market_hours por (symbol, día de la semana) -> (fecha de consulta, sesiones)
+        self._session_cache: Dict[Tuple[str, int], Tuple[date, List[Dict]]] = {}
+        # Esquema de SymbolInfo de la versión instalada (se detecta con el primer símbolo puntuado)
+        self._symbol_has_volume: Optional[bool] = None
+        self._symbol_has_session_deals: Optional[bool] = None
         
     def connect(self) -> bool:
         """
@@ -106,7 +934,6 @@ class MT5Connector:
             bool: True if connection successful, False otherwise
         """
         try:
-            import MetaTrader5 as mt5
             # Initialize MT5 connection
             if not mt5.initialize():
                 logger.error(f"MT5 initialization failed: {mt5.last_error()}")
@@ -127,6 +954,7 @@ class MT5Connector:
             self.account_currency = self.account_info.currency
             logger.info(f"Successfully connected to MT5 - Account: {self.account_info.login}")
             logger.info(f"Balance: {self.account_info.balance}, Equity: {self.account_info.equity}")
+            self.preload_stops_specs()
             return True
         except Exception as e:
             logger.error(f"Connection error: {str(e)}")
@@ -137,6 +965,19 @@ class MT5Connector:
         if self.connected:
             mt5.shutdown()
             self.connected = False
+            self._static_symbol_info.clear()
+            self._stops_spec_cache.clear()
+            self._stops_spec_stats = [0, 0]
+            self._symbol_info_cache.clear()
+            self._bar_cache.clear()
+            self._spec_cache.clear()
+            self._symbol_lite_cache.clear()
+            self._micro_cache.clear()
+            self._micro_cache_stats.clear()
+            self._session_cache.clear()
+            self._symbol_has_volume = None
+            self._symbol_has_session_deals = None
+            clear_classification_caches()
             logger.info("Disconnected from MT5")
     
     def get_market_data(self, symbol: str, timeframe: str, count: int = 500) -> Optional[MarketData]:
@@ -157,55 +998,141 @@ class MT5Connector:
         
         try:
             # Convert timeframe string to MT5 constant
-            tf_map = {
-                "M1": mt5.TIMEFRAME_M1,
-                "M5": mt5.TIMEFRAME_M5,
-                "M15": mt5.TIMEFRAME_M15,
-                "M30": mt5.TIMEFRAME_M30,
-                "H1": mt5.TIMEFRAME_H1,
-                "H4": mt5.TIMEFRAME_H4,
-                "D1": mt5.TIMEFRAME_D1
-            }
-            
-            tf = tf_map.get(timeframe)
+            tf = _TF_MAP.get(timeframe)
             if tf is None:
                 logger.error(f"Invalid timeframe: {timeframe}")
                 return None
             
-            # Get rates
-            rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
-            if rates is None or len(rates) == 0:
-                logger.error(f"Failed to get rates for {symbol}: {mt5.last_error()}")
-                return None
-
-            # Convert rates to numpy arrays using field access
-            open_prices = np.array([rate['open'] for rate in rates])
-            high_prices = np.array([rate['high'] for rate in rates])
-            low_prices = np.array([rate['low'] for rate in rates])
-            close_prices = np.array([rate['close'] for rate in rates])
-            volumes = np.array([rate['tick_volume'] for rate in rates])
-            times = np.array([rate['time'] for rate in rates])
+            # Actualizar desde la caché pidiendo solo las últimas velas; si no es posible, descarga completa
+            key = (symbol, timeframe, count)
+            columns = self._update_cached_bars(symbol, tf, count, self._bar_cache.get(key))
+            if columns is None:
+                rates = mt5.copy_rates_from_pos(symbol, tf, 0, count)
+                if rates is None or len(rates) == 0:
+                    logger.error(f"Failed to get rates for {symbol}: {mt5.last_error()}")
+                    return None
+                columns = _rates_to_columns(rates)
+            self._bar_cache[key] = columns
+            ohlcv, times = columns
+            open_prices, high_prices, low_prices, close_prices, volumes = ohlcv
 
             # Convert to MarketData object
             market_data = MarketData(symbol, timeframe, open_prices, high_prices, low_prices, close_prices, volumes, times)
 
-            logger.info(f"Retrieved {len(rates)} bars for {symbol} {timeframe}")
+            logger.info(f"Retrieved {len(times)} bars for {symbol} {timeframe}")
 
             # Validar datos insuficientes
             if len(market_data.close) < 2:
                 logger.warning(f"Skipping {symbol} due to insufficient data: {len(market_data.close)} bars")
                 return None
 
+            market_data.tr, market_data.ret = _precompute(high_prices, low_prices, close_prices)
             return market_data
 
         except Exception as e:
             logger.error(f"Error getting market data: {str(e)}")
             return None
+
+    def get_market_data_with_features(self, symbol: str, timeframe: str, count: int = 500,
+                                      ema_periods: Tuple[int, ...] = DEFAULT_EMA_PERIODS) -> Optional[MarketData]:
+        """
+        Get market data and compute the EMAs in the same call, in one pass over close
+        
+        Args:
+            symbol: Trading symbol (e.g., "EURUSD")
+            timeframe: Timeframe (e.g., "M1", "M5", "M15")
+            count: Number of bars to retrieve
+            ema_periods: Periodos de EMA a precalcular (se omiten los mayores que el número de velas)
+            
+        Returns:
+            MarketData con market_data.ema = {periodo: serie}, o None si error
+        """
+        market_data = self.get_market_data(symbol, timeframe, count)
+        if market_data is None:
+            return None
+        periods = np.array([p for p in ema_periods if 0 < p <= len(market_data.close)], dtype=np.int64)
+        emas = np.empty((len(periods), len(market_data.close)), dtype=BAR_DTYPE)
+        if len(periods):
+            _ema_fused(market_data.close, periods, emas)
+        market_data.ema = dict(zip(periods.tolist(), emas))
+        return market_data
+
+    def _update_cached_bars(self, symbol: str, tf: int, count: int,
+                            cached: Optional[Tuple[np.ndarray, np.ndarray]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Actualiza las velas cacheadas descargando solo las BAR_UPDATE_COUNT más recientes
+        
+        Args:
+            symbol: Trading symbol
+            tf: Constante de timeframe de MT5
+            count: Número máximo de velas a conservar
+            cached: (ohlcv, times) de la descarga anterior o None
+            
+        Returns:
+            (ohlcv, times) actualizados, o None si hace falta una descarga completa
+            (sin caché, error o más velas nuevas de las que cubre la actualización)
+        """
+        if cached is None:
+            return None
+        recent = mt5.copy_rates_from_pos(symbol, tf, 0, BAR_UPDATE_COUNT)
+        if recent is None or len(recent) == 0:
+            return None
+        cached_ohlcv, cached_times = cached
+        new_ohlcv, new_times = _rates_to_columns(recent)
+        if new_times[0] > cached_times[-1]:
+            # Hueco entre la caché y las velas nuevas
+            return None
+        # Conservar las velas cacheadas anteriores a la primera recibida (la vela en formación se reemplaza)
+        keep = int(np.searchsorted(cached_times, new_times[0]))
+        start = max(0, keep + len(new_times) - count)
+        # Se crean arrays nuevos: los MarketData ya entregados siguen apuntando a los anteriores
+        ohlcv = np.concatenate((cached_ohlcv[:, start:keep], new_ohlcv), axis=1)
+        times = np.concatenate((cached_times[start:keep], new_times))
+        return ohlcv, times
+
+    def get_market_data_many(self, symbols: List[str], timeframes: List[str], count: int = 500,
+                             ema_periods: Tuple[int, ...] = ()) -> Dict[Tuple[str, str], Optional[MarketData]]:
+        """
+        Obtiene datos de mercado para varios símbolos y timeframes
+        
+        Las peticiones se hacen una tras otra en el hilo que llama: el paquete MetaTrader5 no
+        garantiza que sea seguro llamarlo desde varios hilos, y last_error() es global. El ahorro
+        de IPC viene de la caché de velas de get_market_data, que en régimen estable solo pide
+        las BAR_UPDATE_COUNT más recientes.
+        
+        Args:
+            symbols: Lista de símbolos
+            timeframes: Lista de timeframes (e.g., ["M5", "M15"])
+            count: Number of bars to retrieve
+            ema_periods: Si se indica, se precalculan estas EMA (ver get_market_data_with_features)
+            
+        Returns:
+            Dict {(symbol, timeframe): MarketData o None si hubo error}
+        """
+        if not self.connected:
+            logger.error("Not connected to MT5")
+            return {}
+        results = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                try:
+                    if ema_periods:
+                        results[(symbol, timeframe)] = self.get_market_data_with_features(symbol, timeframe, count, ema_periods)
+                    else:
+                        results[(symbol, timeframe)] = self.get_market_data(symbol, timeframe, count)
+                except Exception as e:
+                    logger.error("Error getting market data for %s %s: %s", symbol, timeframe, e)
+                    results[(symbol, timeframe)] = None
+        return results
     
     def get_symbol_info(self, symbol: str) -> Dict:
         """
         Get detailed symbol information including trading parameters
         
+        Los campos estáticos del símbolo se cachean por sesión y las cotizaciones
+        durante SYMBOL_INFO_TTL_SECONDS para evitar llamadas repetidas a MT5.
+        El dict devuelto es el de la caché (compartido): no debe modificarse.
+        
         Args:
             symbol: Symbol name to get information for
         Returns:
@@ -215,6 +1142,10 @@ class MT5Connector:
             if not self.connected:
                 logger.error("MT5 not connected")
                 return {}
+            now = time.monotonic()
+            cached = self._symbol_info_cache.get(symbol)
+            if cached is not None and now - cached[0] < SYMBOL_INFO_TTL_SECONDS:
+                return cached[1]
             # Get symbol info
             symbol_info = mt5.symbol_info(symbol)
             if not symbol_info:
@@ -225,160 +1156,117 @@ class MT5Connector:
             if not tick_info:
                 logger.warning(f"Failed to get tick info for {symbol}")
                 tick_info = None
-            # Asegurar que 'leverage' esté presente y válido
-            leverage = getattr(symbol_info, 'leverage', None)
-            if leverage is None or leverage <= 0:
-                # Intentar obtener leverage de la cuenta si no está disponible o es inválido
-                account_info = mt5.account_info()
-                leverage = getattr(account_info, 'leverage', 100) if account_info and getattr(account_info, 'leverage', 0) > 0 else 100
-            # Si sigue sin estar presente, forzar 100 como valor seguro
-            if leverage is None or leverage <= 0:
-                leverage = 100
-            # Prepare symbol information dictionary
-            info = {
-                'leverage': leverage,
-                'symbol': symbol,
-                'description': symbol_info.description,
-                'currency_base': symbol_info.currency_base,
-                'currency_profit': symbol_info.currency_profit,
-                'currency_margin': symbol_info.currency_margin,
-                'digits': symbol_info.digits,
-                'point': symbol_info.point,
-                'spread': symbol_info.spread,
-                'trade_stops_level': getattr(symbol_info, 'trade_stops_level', 0),
-                'freeze_level': getattr(symbol_info, 'freeze_level', 0),
-                'trade_mode': symbol_info.trade_mode,
-                'min_volume': symbol_info.volume_min,
-                'max_volume': symbol_info.volume_max,
-                'volume_step': symbol_info.volume_step,
-                'volume_limit': getattr(symbol_info, 'volume_limit', 0),
-                'margin_initial': getattr(symbol_info, 'margin_initial', 0),
-                'margin_maintenance': getattr(symbol_info, 'margin_maintenance', 0),
-                'session_deals': getattr(symbol_info, 'session_deals', 0),
-                'session_buy_orders': getattr(symbol_info, 'session_buy_orders', 0),
-                'session_sell_orders': getattr(symbol_info, 'session_sell_orders', 0),
-                'volume': getattr(symbol_info, 'volume', 0),
-                'volumehigh': getattr(symbol_info, 'volumehigh', 0),
-                'volumelow': getattr(symbol_info, 'volumelow', 0),
-                'time': getattr(symbol_info, 'time', 0),
-                'bid': symbol_info.bid,
-                'ask': symbol_info.ask,
-                'last': symbol_info.last,
-                'swap_long': symbol_info.swap_long,
-                'swap_short': symbol_info.swap_short,
-                'swap_sunday': getattr(symbol_info, 'swap_sunday', 0),
-                'swap_monday': getattr(symbol_info, 'swap_monday', 0),
-                'swap_tuesday': getattr(symbol_info, 'swap_tuesday', 0),
-                'swap_wednesday': getattr(symbol_info, 'swap_wednesday', 0),
-                'swap_thursday': getattr(symbol_info, 'swap_thursday', 0),
-                'swap_friday': getattr(symbol_info, 'swap_friday', 0),
-                'swap_saturday': getattr(symbol_info, 'swap_saturday', 0),
-                'contract_size': getattr(symbol_info, 'trade_contract_size', 100000),
-                'tick_value': getattr(symbol_info, 'trade_tick_value', 1.0),
-                'tick_size': getattr(symbol_info, 'trade_tick_size', 0.00001),
-                'execution_mode': getattr(symbol_info, 'trade_execution_mode', 0),
-                # 'filling_mode' eliminado: la lógica de filling_mode se gestiona internamente
-                'expiration_mode': getattr(symbol_info, 'expiration_mode', 0),
-                'order_gtc_mode': getattr(symbol_info, 'order_gtc_mode', 0),
-                'option_mode': getattr(symbol_info, 'option_mode', 0),
-                'option_right': getattr(symbol_info, 'option_right', 0),
-                'visible': symbol_info.visible,
-                'select': symbol_info.select,
-                'custom': symbol_info.custom,
-                'background_color': getattr(symbol_info, 'background_color', 0),
-                'path': symbol_info.path,
-                'isin': getattr(symbol_info, 'isin', ''),
-                'category': getattr(symbol_info, 'category', ''),
-                'exchange': getattr(symbol_info, 'exchange', ''),
-                'formula': getattr(symbol_info, 'formula', ''),
-                'page': getattr(symbol_info, 'page', ''),
-                'sector': getattr(symbol_info, 'sector', ''),
-                'industry': getattr(symbol_info, 'industry', ''),
-                'country': getattr(symbol_info, 'country', ''),
-                'sector_name': getattr(symbol_info, 'sector_name', ''),
-                'industry_name': getattr(symbol_info, 'industry_name', ''),
-                'country_name': getattr(symbol_info, 'country_name', ''),
-                'subscription_delay': getattr(symbol_info, 'subscription_delay', 0),
-                'trade_calc_mode': getattr(symbol_info, 'trade_calc_mode', 0),
-                'trade_stops_level': getattr(symbol_info, 'trade_stops_level', 0),
-                'trade_freeze_level': getattr(symbol_info, 'trade_freeze_level', 0),
-                'trade_exemode': getattr(symbol_info, 'trade_exemode', 0),
-                'start_time': getattr(symbol_info, 'start_time', 0),
-                'expiration_time': getattr(symbol_info, 'expiration_time', 0),
-                'sessions_quotes': getattr(symbol_info, 'sessions_quotes', 0),
-                'sessions_trades': getattr(symbol_info, 'sessions_trades', 0)
-            }
+            fields = {**_SYMBOL_DEFAULTS, **_as_dict(symbol_info)}
+            static_info = self._static_symbol_info.get(symbol)
+            if static_info is None:
+                static_info = self._get_static_symbol_info(symbol, fields)
+                self._static_symbol_info[symbol] = static_info
+            # Campos que cambian con cada cotización / sesión o que el broker puede modificar
+            info = dict(static_info)
+            info['leverage'] = self._symbol_leverage(fields)
+            info.update({key: fields[field] for key, field in _QUOTE_SYMBOL_KEYS})
             
             # Add current tick information if available
             if tick_info:
-                info.update({
-                    'current_bid': tick_info.bid,
-                    'current_ask': tick_info.ask,
-                    'current_last': tick_info.last,
-                    'current_volume': tick_info.volume,
-                    'current_time': tick_info.time,
-                    'current_flags': tick_info.flags,
-                    'current_volume_real': tick_info.volume_real
-                })
+                tick_fields = _as_dict(tick_info)
+                info.update({key: tick_fields[field] for key, field in _TICK_KEYS})
             
+            self._symbol_info_cache[symbol] = (now, info)
             return info
             
         except Exception as e:
             logger.error(f"Error getting symbol info for {symbol}: {str(e)}")
             return {}
     
-    def get_dynamic_trading_params(self, symbol: str) -> Dict:
+    def _get_static_symbol_info(self, symbol: str, fields: Dict) -> Dict:
         """
-        Get dynamic trading parameters for a symbol
+        Construye los campos del símbolo que no cambian durante la sesión
+        
+        Args:
+            symbol: Symbol name
+            fields: Campos de mt5.symbol_info(symbol) combinados con _SYMBOL_DEFAULTS
+        Returns:
+            Dictionary with static symbol information
+        """
+        info = {'symbol': symbol}
+        info.update({key: fields[field] for key, field in _STATIC_SYMBOL_KEYS})
+        return info
+
+    def _symbol_leverage(self, fields: Dict) -> float:
+        """
+        Apalancamiento del símbolo; si MT5 no lo informa, el de la cuenta (cacheado con
+        ACCOUNT_INFO_TTL_SECONDS) y, si tampoco, 100 como valor seguro
+        
+        Args:
+            fields: Campos de mt5.symbol_info(symbol) combinados con _SYMBOL_DEFAULTS
+        """
+        leverage = fields.get('leverage')
+        if leverage is None or leverage <= 0:
+            account_info = self._cached(("acct",), ACCOUNT_INFO_TTL_SECONDS, mt5.account_info)
+            leverage = getattr(account_info, 'leverage', 0) if account_info else 0
+        return leverage if leverage and leverage > 0 else 100
+    
+    def get_trading_params(self, symbol: str) -> Optional[TradingParams]:
+        """
+        Get dynamic trading parameters for a symbol as a TradingParams object
         
         Args:
             symbol: Symbol name
             
         Returns:
-            Dictionary with dynamic trading parameters
+            TradingParams or None if error
         """
         try:
             symbol_info = self.get_symbol_info(symbol)
             if not symbol_info:
-                return {}
+                return None
             
-            # Calculate dynamic parameters
-            params = {
-                'symbol': symbol,
-                'min_volume': symbol_info.get('min_volume', 0.01),
-                'max_volume': symbol_info.get('max_volume', 100.0),
-                'volume_step': symbol_info.get('volume_step', 0.01),
-                'digits': symbol_info.get('digits', 5),
-                'point': symbol_info.get('point', 0.00001),
-                'spread': symbol_info.get('spread', 0),
-                'trade_stops_level': symbol_info.get('trade_stops_level', 0),
-                'freeze_level': symbol_info.get('freeze_level', 0),
+            current_bid = symbol_info.get('current_bid', 0)
+            current_ask = symbol_info.get('current_ask', 0)
+            return TradingParams(
+                symbol=symbol,
+                min_volume=symbol_info.get('min_volume', 0.01),
+                max_volume=symbol_info.get('max_volume', 100.0),
+                volume_step=symbol_info.get('volume_step', 0.01),
+                digits=symbol_info.get('digits', 5),
+                point=symbol_info.get('point', 0.00001),
+                spread=symbol_info.get('spread', 0),
+                trade_stops_level=symbol_info.get('trade_stops_level', 0),
+                freeze_level=symbol_info.get('freeze_level', 0),
                 # 'filling_mode' eliminado: la lógica de filling_mode se gestiona internamente
-                'execution_mode': symbol_info.get('execution_mode', mt5.SYMBOL_TRADE_EXECUTION_INSTANT),
-                'contract_size': symbol_info.get('contract_size', 100000),
-                'tick_value': symbol_info.get('tick_value', 1.0),
-                'tick_size': symbol_info.get('tick_size', 0.00001),
-                'margin_initial': symbol_info.get('margin_initial', 0),
-                'swap_long': symbol_info.get('swap_long', 0),
-                'swap_short': symbol_info.get('swap_short', 0),
-                'current_bid': symbol_info.get('current_bid', 0),
-                'current_ask': symbol_info.get('current_ask', 0),
-                'current_spread': abs(symbol_info.get('current_ask', 0) - symbol_info.get('current_bid', 0))
-            }
-            
-            # Calculate minimum stop loss/take profit distance
-            min_stop_distance = max(
-                symbol_info.get('trade_stops_level', 0) * symbol_info.get('point', 0.00001),
-                symbol_info.get('current_spread', 0) * 2
+                execution_mode=symbol_info.get('execution_mode', mt5.SYMBOL_TRADE_EXECUTION_INSTANT),
+                contract_size=symbol_info.get('contract_size', 100000),
+                tick_value=symbol_info.get('tick_value', 1.0),
+                tick_size=symbol_info.get('tick_size', 0.00001),
+                margin_initial=symbol_info.get('margin_initial', 0),
+                swap_long=symbol_info.get('swap_long', 0),
+                swap_short=symbol_info.get('swap_short', 0),
+                current_bid=current_bid,
+                current_ask=current_ask,
+                current_spread=abs(current_ask - current_bid),
+                # Calculate minimum stop loss/take profit distance
+                min_stop_distance=max(
+                    symbol_info.get('trade_stops_level', 0) * symbol_info.get('point', 0.00001),
+                    symbol_info.get('current_spread', 0) * 2
+                )
             )
             
-            params['min_stop_distance'] = min_stop_distance
-            
-            return params
-            
         except Exception as e:
             logger.error(f"Error getting dynamic trading params for {symbol}: {str(e)}")
-            return {}
+            return None
+    
+    def get_dynamic_trading_params(self, symbol: str) -> Dict:
+        """
+        Get dynamic trading parameters for a symbol
+        
+        Args:
+            symbol: Symbol name
+            
+        Returns:
+            Dictionary with dynamic trading parameters
+        """
+        params = self.get_trading_params(symbol)
+        return params.to_dict() if params else {}
     
     def send_order(self, order: OrderRequest) -> Optional[Dict]:
         """
@@ -389,18 +1277,20 @@ class MT5Connector:
         if not self.connected:
             logger.error("Not connected to MT5")
             return None
+        # Evitar formatear los mensajes INFO cuando ese nivel está deshabilitado
+        log_info = logger.isEnabledFor(logging.INFO)
         try:
-            symbol_specs = self.get_dynamic_trading_params(order.symbol)
+            symbol_specs = self.get_trading_params(order.symbol)
             if not symbol_specs:
                 logger.error(f"Cannot get symbol specifications for {order.symbol}")
                 return None
-            digits = symbol_specs['digits']
+            digits = symbol_specs.digits
             price = round(order.price, digits)
             sl = round(order.sl, digits)
             tp = round(order.tp, digits)
-            min_volume = symbol_specs.get('min_volume', 0.01)
-            max_volume = symbol_specs.get('max_volume', 100.0)
-            volume_step = symbol_specs.get('volume_step', 0.01)
+            min_volume = symbol_specs.min_volume
+            max_volume = symbol_specs.max_volume
+            volume_step = symbol_specs.volume_step
             adjusted_volume = max(min_volume, min(order.volume, max_volume))
             volume_steps = round(adjusted_volume / volume_step)
             final_volume = volume_steps * volume_step
@@ -425,12 +1315,12 @@ class MT5Connector:
                 if not stops_valid:
                     logger.error(f"No se pudieron validar stops ni con ajuste agresivo para {order.symbol}")
                     return None
-                else:
+                elif log_info:
                     logger.info(f"Stops ajustados agresivamente para {order.symbol}: SL={sl}, TP={tp}")
             sl = round(sl, digits)
             tp = round(tp, digits)
-            current_spread = symbol_specs.get('current_spread', 0.00002)
-            spread_points = int(current_spread / symbol_specs.get('point', 0.00001))
+            current_spread = symbol_specs.current_spread
+            spread_points = int(current_spread / symbol_specs.point)
             deviation = max(5, min(50, spread_points * 2))
             request_base = {
                 "action": mt5.TRADE_ACTION_DEAL,
@@ -451,34 +1341,32 @@ class MT5Connector:
                 filling_modes = getattr(symbol_info, 'filling_modes', None)
                 filling_mode = None
                 filling_mode_name = None
-                logger.info(f"[FILLING MODES] {order.symbol}: filling_mode={getattr(symbol_info, 'filling_mode', None)}, filling_modes={filling_modes}")
+                if log_info:
+                    logger.info(f"[FILLING MODES] {order.symbol}: filling_mode={getattr(symbol_info, 'filling_mode', None)}, filling_modes={filling_modes}")
                 request = dict(request_base)
                 if filling_modes is not None:
-                    # Si el broker expone filling_modes, usar la lógica habitual
-                    if filling_modes & getattr(mt5, 'SYMBOL_FILLING_IOC', 1):
-                        filling_mode = getattr(mt5, 'ORDER_FILLING_IOC', 1)
-                        filling_mode_name = 'IOC'
-                    elif filling_modes & getattr(mt5, 'SYMBOL_FILLING_RETURN', 2):
-                        filling_mode = getattr(mt5, 'ORDER_FILLING_RETURN', 2)
-                        filling_mode_name = 'RETURN'
-                    elif filling_modes & getattr(mt5, 'SYMBOL_FILLING_FOK', 4):
-                        filling_mode = getattr(mt5, 'ORDER_FILLING_FOK', 4)
-                        filling_mode_name = 'FOK'
+                    # Si el broker expone filling_modes, tomar el primero soportado según _FILL_PRIORITY
+                    for mask, filling_mode, filling_mode_name in _FILL_PRIORITY:
+                        if filling_modes & mask:
+                            break
                     else:
                         logger.warning(f"No filling mode válido detectado para {order.symbol}, usando IOC por defecto")
-                        filling_mode = getattr(mt5, 'ORDER_FILLING_IOC', 1)
-                        filling_mode_name = 'IOC'
+                        _, filling_mode, filling_mode_name = _FILL_PRIORITY[0]
                     request["type_filling"] = filling_mode
-                    logger.info(f"Enviando orden con filling mode {filling_mode_name} para {order.symbol}")
+                    if log_info:
+                        logger.info(f"Enviando orden con filling mode {filling_mode_name} para {order.symbol}")
                 else:
                     # Si el broker NO expone filling_modes, NO incluir type_filling (Market Execution puro)
                     logger.warning(f"No se pudo obtener filling_modes para {order.symbol}, NO se incluirá type_filling (Market Execution)")
-                    logger.info(f"Enviando orden SIN type_filling para {order.symbol}")
+                    if log_info:
+                        logger.info(f"Enviando orden SIN type_filling para {order.symbol}")
                 try:
                     result = mt5.order_send(request)
+                    self.invalidate_tick_cache(order.symbol)
                     if result is not None and hasattr(result, 'retcode'):
                         if result.retcode == mt5.TRADE_RETCODE_DONE or result.retcode == mt5.TRADE_RETCODE_PLACED:
-                            logger.info(f"Order sent successfully for {order.symbol} with filling mode {filling_mode_name or 'None'}. Retcode: {result.retcode}")
+                            if log_info:
+                                logger.info(f"Order sent successfully for {order.symbol} with filling mode {filling_mode_name or 'None'}. Retcode: {result.retcode}")
                             return {
                                 'retcode': result.retcode,
                                 'order': result.order,
@@ -488,6 +1376,9 @@ class MT5Connector:
                                 'result': result
                             }
                         else:
+                            if result.retcode == _RETCODE_INVALID_STOPS:
+                                # El stops level del broker cambió: la próxima validación lo relee
+                                self.invalidate_stops_spec(order.symbol)
                             logger.warning(f"Order failed for {order.symbol} with filling mode {filling_mode_name or 'None'}. Retcode: {result.retcode} - {self._get_retcode_description(result.retcode)}")
                     else:
                         logger.warning(f"No result or retcode for {order.symbol} with filling mode {filling_mode_name or 'None'}.")
@@ -512,45 +1403,10 @@ class MT5Connector:
         Returns:
             Human readable description
         """
-        retcode_descriptions = {
-            mt5.TRADE_RETCODE_REQUOTE: "Requote",
-            mt5.TRADE_RETCODE_REJECT: "Request rejected",
-            mt5.TRADE_RETCODE_CANCEL: "Request canceled",
-            mt5.TRADE_RETCODE_PLACED: "Order placed",
-            mt5.TRADE_RETCODE_DONE: "Request completed",
-            mt5.TRADE_RETCODE_DONE_PARTIAL: "Request partially completed",
-            mt5.TRADE_RETCODE_ERROR: "Request processing error",
-            mt5.TRADE_RETCODE_TIMEOUT: "Request timeout",
-            mt5.TRADE_RETCODE_INVALID: "Invalid request",
-            mt5.TRADE_RETCODE_INVALID_VOLUME: "Invalid volume",
-            mt5.TRADE_RETCODE_INVALID_PRICE: "Invalid price",
-            mt5.TRADE_RETCODE_INVALID_STOPS: "Invalid stops",
-            mt5.TRADE_RETCODE_TRADE_DISABLED: "Trade disabled",
-            mt5.TRADE_RETCODE_MARKET_CLOSED: "Market closed",
-            mt5.TRADE_RETCODE_NO_MONEY: "Insufficient money",
-            mt5.TRADE_RETCODE_PRICE_CHANGED: "Price changed",
-            mt5.TRADE_RETCODE_PRICE_OFF: "Off quotes",
-            mt5.TRADE_RETCODE_INVALID_EXPIRATION: "Invalid expiration",
-            mt5.TRADE_RETCODE_ORDER_CHANGED: "Order changed",
-            mt5.TRADE_RETCODE_TOO_MANY_REQUESTS: "Too many requests",
-            mt5.TRADE_RETCODE_NO_CHANGES: "No changes",
-            mt5.TRADE_RETCODE_SERVER_DISABLES_AT: "Auto trading disabled",
-            mt5.TRADE_RETCODE_CLIENT_DISABLES_AT: "Auto trading disabled by client",
-            mt5.TRADE_RETCODE_LOCKED: "Request locked",
-            mt5.TRADE_RETCODE_FROZEN: "Order or position frozen",
-            mt5.TRADE_RETCODE_INVALID_FILL: "Invalid order filling type",
-            mt5.TRADE_RETCODE_CONNECTION: "No connection",
-            mt5.TRADE_RETCODE_ONLY_REAL: "Only real accounts allowed",
-            mt5.TRADE_RETCODE_LIMIT_ORDERS: "Orders limit reached",
-            mt5.TRADE_RETCODE_LIMIT_VOLUME: "Volume limit reached",
-            mt5.TRADE_RETCODE_INVALID_ORDER: "Invalid or prohibited order type",
-            mt5.TRADE_RETCODE_POSITION_CLOSED: "Position closed",
-            mt5.TRADE_RETCODE_INVALID_CLOSE_VOLUME: "Invalid close volume",
-            mt5.TRADE_RETCODE_CLOSE_ORDER_EXIST: "Close order already exists",
-            mt5.TRADE_RETCODE_LIMIT_POSITIONS: "Positions limit reached"
-        }
-        
-        return retcode_descriptions.get(retcode, f"Unknown retcode: {retcode}")
+        index = retcode - _RETCODE_BASE
+        if 0 <= index < len(_RETCODE_TABLE) and _RETCODE_TABLE[index] is not None:
+            return _RETCODE_TABLE[index]
+        return f"Unknown retcode: {retcode}"
     
     def get_positions(self) -> List[Dict]:
         """
@@ -589,6 +1445,34 @@ class MT5Connector:
             logger.error(f"Error getting positions: {str(e)}")
             return []
     
+    def get_positions_array(self) -> np.ndarray:
+        """
+        Get current open positions as a NumPy structured array (dtype POSITION_DTYPE)
+        
+        Permite operar por columnas (e.g. arr['profit'].sum()) sin construir un dict por posición.
+        
+        Returns:
+            Structured array with one row per position (vacío si no hay posiciones o hay error)
+        """
+        if not self.connected:
+            logger.error("Not connected to MT5")
+            return np.empty(0, dtype=POSITION_DTYPE)
+        
+        try:
+            positions = mt5.positions_get()
+            if not positions:
+                return np.empty(0, dtype=POSITION_DTYPE)
+            return np.fromiter(
+                ((p.ticket, p.symbol, p.type, p.volume, p.price_open, p.price_current,
+                  p.sl, p.tp, p.profit, p.comment) for p in positions),
+                dtype=POSITION_DTYPE,
+                count=len(positions)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error getting positions: {str(e)}")
+            return np.empty(0, dtype=POSITION_DTYPE)
+    
     def modify_position(self, ticket: int, sl: float, tp: float) -> bool:
         """
         Modify position SL/TP
@@ -630,6 +1514,8 @@ class MT5Connector:
                 return False
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
+                if result.retcode == _RETCODE_INVALID_STOPS:
+                    self.invalidate_stops_spec(position.symbol)
                 logger.error(f"Modify failed with retcode: {result.retcode}")
                 return False
             
@@ -662,44 +1548,96 @@ class MT5Connector:
                 return False
             
             position = positions[0]
-            
-            # Determine opposite order type
-            if position.type == mt5.ORDER_TYPE_BUY:
-                order_type = mt5.ORDER_TYPE_SELL
-            else:
-                order_type = mt5.ORDER_TYPE_BUY
-            
-            # Create close request
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": position.symbol,
-                "volume": position.volume,
-                "type": order_type,
-                "position": ticket,
-                "price": mt5.symbol_info_tick(position.symbol).bid if order_type == mt5.ORDER_TYPE_SELL else mt5.symbol_info_tick(position.symbol).ask,
-                "deviation": 10,
-                "magic": 12345,
-                "comment": "Close by Mr.Cashondo Bot",
-                "type_time": mt5.ORDER_TIME_GTC,
-                "type_filling": mt5.ORDER_FILLING_IOC,
-            }
-            
-            # Send close request
-            result = mt5.order_send(request)
-            if result is None:
-                logger.error(f"Failed to send close order: {mt5.last_error()}")
+            tick = mt5.symbol_info_tick(position.symbol)
+            if tick is None:
+                logger.error(f"Failed to get tick for {position.symbol}: {mt5.last_error()}")
                 return False
+            return self._send_close_order(position, tick)
             
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                logger.error(f"Close order failed: {result.retcode} - {result.comment}")
-                return False
+        except Exception as e:
+            logger.error(f"Error closing position: {str(e)}")
+            return False
+    
+    def close_positions(self, tickets: List[int]) -> Dict[int, bool]:
+        """
+        Close several positions fetching positions and ticks once
+        
+        Args:
+            tickets: Position tickets to close
             
-            logger.info(f"Position {ticket} closed successfully")
-            return True
+        Returns:
+            Dict {ticket: True if closed, False otherwise}
+        """
+        results = {ticket: False for ticket in tickets}
+        if not self.connected:
+            logger.error("Not connected to MT5")
+            return results
+        
+        try:
+            positions = {p.ticket: p for p in (mt5.positions_get() or ()) if p.ticket in results}
+            # Un tick por símbolo aunque haya varias posiciones del mismo símbolo
+            ticks = {symbol: mt5.symbol_info_tick(symbol) for symbol in {p.symbol for p in positions.values()}}
+            for ticket in tickets:
+                position = positions.get(ticket)
+                if position is None:
+                    logger.error(f"Position {ticket} not found")
+                    continue
+                tick = ticks.get(position.symbol)
+                if tick is None:
+                    logger.error(f"Failed to get tick for {position.symbol}: {mt5.last_error()}")
+                    continue
+                results[ticket] = self._send_close_order(position, tick)
+            return results
             
         except Exception as e:
-            logger.error(f"Error closing position: {str(e)}")
+            logger.error(f"Error closing positions: {str(e)}")
+            return results
+    
+    def _send_close_order(self, position, tick) -> bool:
+        """
+        Send the opposite deal that closes a position
+        
+        Args:
+            position: Position returned by mt5.positions_get
+            tick: Current tick of the position symbol
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        # Determine opposite order type
+        if position.type == mt5.ORDER_TYPE_BUY:
+            order_type = mt5.ORDER_TYPE_SELL
+        else:
+            order_type = mt5.ORDER_TYPE_BUY
+        
+        # Create close request
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": position.symbol,
+            "volume": position.volume,
+            "type": order_type,
+            "position": position.ticket,
+            "price": tick.bid if order_type == mt5.ORDER_TYPE_SELL else tick.ask,
+            "deviation": 10,
+            "magic": 12345,
+            "comment": "Close by Mr.Cashondo Bot",
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": mt5.ORDER_FILLING_IOC,
+        }
+        
+        # Send close request
+        result = mt5.order_send(request)
+        self.invalidate_tick_cache(position.symbol)
+        if result is None:
+            logger.error(f"Failed to send close order: {mt5.last_error()}")
+            return False
+        
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            logger.error(f"Close order failed: {result.retcode} - {result.comment}")
             return False
+        
+        logger.info(f"Position {position.ticket} closed successfully")
+        return True
     
     def get_account_balance(self) -> float:
         """
@@ -712,17 +1650,12 @@ class MT5Connector:
             logger.error("Not connected to MT5")
             return 0.0
         
-        try:
-            account_info = mt5.account_info()
-            if account_info is None:
-                logger.error("Cannot get account info")
-                return 0.0
-            
-            return account_info.balance
-            
-        except Exception as e:
-            logger.error(f"Error getting account balance: {str(e)}")
+        account_info = self._cached(("acct",), ACCOUNT_INFO_TTL_SECONDS, mt5.account_info)
+        if account_info is None:
+            logger.error("Cannot get account info")
             return 0.0
+        
+        return account_info.balance
     
     def get_current_price(self, symbol: str) -> Optional[Tuple[float, float]]:
         """
@@ -738,25 +1671,77 @@ class MT5Connector:
             logger.error("Not connected to MT5")
             return None
         
-        try:
-            tick = mt5.symbol_info_tick(symbol)
-            if tick is None:
-                logger.error(f"Cannot get tick data for {symbol}")
-                return None
-            
-            return (tick.bid, tick.ask)
-            
-        except Exception as e:
-            logger.error(f"Error getting current price: {str(e)}")
+        tick = self._get_tick(symbol)
+        if tick is None:
+            logger.error("Cannot get tick data for %s", symbol)
             return None
         
-    def get_available_symbols(self, filter_type: str = "forex", dynamic_mode: bool = True) -> List[str]:
+        return (tick.bid, tick.ask)
+    
+    def _get_tick(self, symbol: str):
+        """Último tick de symbol desde _micro_cache (vigente TICK_TTL_SECONDS) o None"""
+        return self._cached(("tick", symbol), TICK_TTL_SECONDS, lambda: mt5.symbol_info_tick(symbol))
+    
+    def _cached(self, key: tuple, ttl: float, producer: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor cacheado para key si tiene menos de ttl segundos; si no, llama a producer
+        
+        Los None (error de MT5) no se cachean para que el siguiente intento vuelva a consultar.
+        
+        Args:
+            key: Clave en _micro_cache, e.g. ("tick", symbol)
+            ttl: Validez en segundos
+            producer: Función sin argumentos que consulta MT5
+        Returns:
+            Valor cacheado o el devuelto por producer
+        """
+        now = time.monotonic()
+        cached = self._micro_cache.get(key)
+        stats = self._micro_cache_stats.setdefault(key[0], [0, 0])
+        if cached is not None and now - cached[0] < ttl:
+            stats[0] += 1
+            return cached[1]
+        stats[1] += 1
+        value = producer()
+        if value is not None:
+            self._micro_cache[key] = (now, value)
+        return value
+    
+    def micro_cache_info(self) -> Dict[str, Dict[str, int]]:
+        """
+        Estadísticas de la caché de ticks/account_info por tipo de clave
+        
+        Returns:
+            Diccionario tipo -> {'hits', 'misses', 'size'}, e.g. {'tick': {'hits': 120, 'misses': 8, 'size': 3}}
+        """
+        sizes: Dict[str, int] = {}
+        for key in list(self._micro_cache):
+            sizes[key[0]] = sizes.get(key[0], 0) + 1
+        return {
+            kind: {'hits': hits, 'misses': misses, 'size': sizes.get(kind, 0)}
+            for kind, (hits, misses) in self._micro_cache_stats.items()
+        }
+    
+    def invalidate_tick_cache(self, symbol: str) -> None:
+        """
+        Descarta el tick, la cotización y el account_info cacheados tras ejecutar una operación
+        
+        Args:
+            symbol: Símbolo operado
+        """
+        self._micro_cache.pop(("tick", symbol), None)
+        self._micro_cache.pop(("acct",), None)
+        self._symbol_info_cache.pop(symbol, None)
+        
+    def get_available_symbols(self, filter_type: str = "forex", dynamic_mode: bool = True,
+                              top_k: Optional[int] = None) -> List[str]:
         """
         Get available symbols from MT5 completely dynamically
         
         Args:
             filter_type: Type of symbols to filter ("forex", "metals", "indices", "crypto", "all")
             dynamic_mode: If True, detects all symbols automatically. If False, uses curated list.
+            top_k: Si se indica, devuelve solo los top_k símbolos de mayor calidad
             
         Returns:
             List of available symbol names
@@ -775,33 +1760,36 @@ class MT5Connector:
             available_symbols = []
             
             if dynamic_mode:
-                # COMPLETAMENTE DINÁMICO: detectar automáticamente todos los símbolos
+                # COMPLETAMENTE DINÁMICO: detectar automáticamente todos los símbolos.
+                # El clasificador se resuelve una sola vez antes del bucle
+                if filter_type == "all":
+                    classifier = None
+                else:
+                    classifier = {
+                        "forex": self._is_forex_pair,
+                        "metals": self._is_metal_symbol,
+                        "indices": self._is_index_symbol,
+                        "crypto": self._is_crypto_symbol,
+                        "stocks": self._is_stock_symbol,
+                    }.get(filter_type)
+                    if classifier is None:
+                        logger.warning(f"Unknown symbol filter_type: {filter_type}")
+                
+                trade_mode_full = mt5.SYMBOL_TRADE_MODE_FULL
                 for symbol in symbols:
-                    symbol_name = symbol.name
-                    
                     # Check if symbol is available for trading and visible in Market Watch
-                    if not (symbol.visible and symbol.select and symbol.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL):
+                    if not (symbol.visible and symbol.select and symbol.trade_mode == trade_mode_full):
                         continue
                     
-                    # Filter by category using intelligent detection
-                    if filter_type == "forex":
-                        if self._is_forex_pair(symbol_name, symbol):
-                            available_symbols.append(symbol_name)
-                    elif filter_type == "metals":
-                        if self._is_metal_symbol(symbol_name, symbol):
-                            available_symbols.append(symbol_name)
-                    elif filter_type == "indices":
-                        if self._is_index_symbol(symbol_name, symbol):
-                            available_symbols.append(symbol_name)
-                    elif filter_type == "crypto":
-                        if self._is_crypto_symbol(symbol_name, symbol):
-                            available_symbols.append(symbol_name)
-                    elif filter_type == "stocks":
-                        if self._is_stock_symbol(symbol_name, symbol):
-                            available_symbols.append(symbol_name)
-                    elif filter_type == "all":
+                    symbol_name = symbol.name
+                    if filter_type == "all":
                         # Include all tradeable symbols
                         available_symbols.append(symbol_name)
+                    elif classifier is not None:
+                        # Filter by category using intelligent detection (path en minúsculas una sola vez)
+                        path_lower = symbol.path.lower() if hasattr(symbol, 'path') else ''
+                        if classifier(symbol_name, symbol, path_lower):
+                            available_symbols.append(symbol_name)
             else:
                 # Modo curado original (para compatibilidad)
                 forex_majors = [
@@ -828,8 +1816,9 @@ class MT5Connector:
                     elif filter_type == "all" and symbol.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
                         available_symbols.append(symbol_name)
             
-            # Ordenar por liquidez (volumen) y spread
-            available_symbols = self._rank_symbols_by_quality(available_symbols)
+            # Ordenar por liquidez (volumen) y spread reutilizando los SymbolInfo de symbols_get()
+            symbol_infos = {symbol.name: symbol for symbol in symbols}
+            available_symbols = self._rank_symbols_by_quality(available_symbols, symbol_infos, top_k)
             
             logger.info(f"Found {len(available_symbols)} available {filter_type} symbols (dynamic_mode={dynamic_mode})")
             if available_symbols:
@@ -841,7 +1830,7 @@ class MT5Connector:
             logger.error(f"Error getting available symbols: {str(e)}")
             return []
     
-    def _is_forex_pair(self, symbol_name: str, symbol_info) -> bool:
+    def _is_forex_pair(self, symbol_name: str, symbol_info, path_lower: Optional[str] = None) -> bool:
         """
         Detectar si un símbolo es un par FOREX automáticamente
         
@@ -851,185 +1840,167 @@ class MT5Connector:
         Args:
             symbol_name: Nombre del símbolo
             symbol_info: Información del símbolo de MT5
+            path_lower: Path del símbolo ya en minúsculas (opcional, evita recalcularlo)
             
         Returns:
             True si es un par FOREX
         """
-        # Lista extendida de códigos de monedas ISO 4217
-        currencies = {
-            # Monedas principales
-            "USD", "EUR", "GBP", "JPY", "CHF", "AUD", "CAD", "NZD",
-            # Monedas secundarias
-            "SEK", "NOK", "DKK", "PLN", "CZK", "HUF", "TRY", "ZAR",
-            "MXN", "SGD", "HKD", "CNH", "RUB", "BRL", "KRW", "INR",
-            # Monedas emergentes
-            "CNY", "THB", "MYR", "IDR", "PHP", "VND", "EGP", "ILS",
-            "AED", "SAR", "QAR", "KWD", "BHD", "OMR", "JOD", "LBP"
-        }
-        
-        # Verificar patrones comunes de pares FOREX
-        patterns = [
+        # Verificar patrones comunes de pares FOREX (se evalúan en orden y se corta en el primero)
+        if (
             # Formato estándar: XXXYYY (6 caracteres)
-            len(symbol_name) == 6 and symbol_name[:3] in currencies and symbol_name[3:] in currencies,
+            _FX_6CHAR_RE.fullmatch(symbol_name) is not None
             # Formato con separador: XXX.YYY, XXX/YYY, XXX_YYY
-            '.' in symbol_name and len(symbol_name.replace('.', '')) == 6,
-            '/' in symbol_name and len(symbol_name.replace('/', '')) == 6,
-            '_' in symbol_name and len(symbol_name.replace('_', '')) == 6
-        ]
-        
-        # Verificar criterios adicionales (nueva detección mejorada)
-        if any(patterns):
-            return True            # Verificar por path (categoría) en MT5
-            if hasattr(symbol_info, 'path'):
-                path = symbol_info.path.lower()
-                if 'forex' in path or 'currencies' in path or 'fx' in path:
-                    return True
-            elif isinstance(symbol_info, dict) and 'path' in symbol_info:
-                path = symbol_info['path'].lower()
-                if 'forex' in path or 'currencies' in path or 'fx' in path:
-                    return True
-              # Verificar por descripción
-            if hasattr(symbol_info, 'description'):
-                desc = symbol_info.description.lower()
-                if any(term in desc for term in ['forex', 'currency pair', 'fx rate', 'exchange rate']):
-                    return True
-            elif isinstance(symbol_info, dict) and 'description' in symbol_info:
-                desc = symbol_info['description'].lower()
-                if any(term in desc for term in ['forex', 'currency pair', 'fx rate', 'exchange rate']):
-                    return True
-              # Verificar tamaño de contrato típico de FOREX
-            if hasattr(symbol_info, 'volume_min') and 0.01 <= symbol_info.volume_min <= 0.1:
-                # Tamaño de lote micro/mini típico de FOREX
-                return True
-            elif isinstance(symbol_info, dict) and 'volume_min' in symbol_info:
-                if 0.01 <= symbol_info['volume_min'] <= 0.1:
-                    # Tamaño de lote micro/mini típico de FOREX
-                    return True
-            
-        return False
-        path_indicators = ["forex", "fx", "currency", "currencies", "cur"]
-        category_match = any(indicator in symbol_info.path.lower() for indicator in path_indicators)
-        
-        # Verificar por base/profit currency
-        currency_match = (hasattr(symbol_info, 'currency_base') and 
-                         hasattr(symbol_info, 'currency_profit') and
-                         symbol_info.currency_base in currencies and 
-                         symbol_info.currency_profit in currencies)
-        
-        return any(patterns) or category_match or currency_match
+            or ('.' in symbol_name and len(symbol_name.replace('.', '')) == 6)
+            or ('/' in symbol_name and len(symbol_name.replace('/', '')) == 6)
+            or ('_' in symbol_name and len(symbol_name.replace('_', '')) == 6)
+        ):
+            return True
+        
+        is_dict = isinstance(symbol_info, dict)
+        
+        # Verificar por path (categoría) en MT5
+        if path_lower is None:
+            path = symbol_info.get('path') if is_dict else getattr(symbol_info, 'path', None)
+            path_lower = path.lower() if path else ''
+        if path_lower and _FX_PATH_RE.search(path_lower) is not None:
+            return True
+        
+        # Verificar por descripción
+        desc = symbol_info.get('description') if is_dict else getattr(symbol_info, 'description', None)
+        if desc and _FX_DESCRIPTION_RE.search(desc.lower()) is not None:
+            return True
+        
+        # Verificar por base/profit currency (dos divisas distintas conocidas)
+        if is_dict:
+            currency_base = symbol_info.get('currency_base')
+            currency_profit = symbol_info.get('currency_profit')
+        else:
+            currency_base = getattr(symbol_info, 'currency_base', None)
+            currency_profit = getattr(symbol_info, 'currency_profit', None)
+        return (currency_base in _FX_CURRENCIES and currency_profit in _FX_CURRENCIES
+                and currency_base != currency_profit)
     
-    def _is_metal_symbol(self, symbol_name: str, symbol_info) -> bool:
+    def _is_metal_symbol(self, symbol_name: str, symbol_info, path_lower: Optional[str] = None) -> bool:
         """
         Detectar si un símbolo es un metal precioso
         """
-        metal_patterns = ["XAU", "XAG", "XPD", "XPT", "GOLD", "SILVER", "PLATINUM", "PALLADIUM"]
-        name_match = any(pattern in symbol_name.upper() for pattern in metal_patterns)
+        name_match = _METAL_RE.search(symbol_name.upper()) is not None
         
-        path_indicators = ["metals", "precious", "gold", "silver"]
-        path_match = any(indicator in symbol_info.path.lower() for indicator in path_indicators)
+        if path_lower is None:
+            path_lower = symbol_info.path.lower()
+        path_match = _METAL_PATH_RE.search(path_lower) is not None
         
         return name_match or path_match
     
-    def _is_index_symbol(self, symbol_name: str, symbol_info) -> bool:
+    def _is_index_symbol(self, symbol_name: str, symbol_info, path_lower: Optional[str] = None) -> bool:
         """
         Detectar si un símbolo es un índice
         """
-        index_patterns = ["US30", "US500", "NAS100", "GER30", "UK100", "AUS200", "JPN225", "FRA40", "SPA35", "ITA40"]
-        name_match = any(pattern in symbol_name.upper() for pattern in index_patterns)
+        name_match = _INDEX_RE.search(symbol_name.upper()) is not None
         
-        path_indicators = ["indices", "index", "stock"]
-        path_match = any(indicator in symbol_info.path.lower() for indicator in path_indicators)
+        if path_lower is None:
+            path_lower = symbol_info.path.lower()
+        path_match = _INDEX_PATH_RE.search(path_lower) is not None
         
         return name_match or path_match
     
-    def _is_crypto_symbol(self, symbol_name: str, symbol_info) -> bool:
+    def _is_crypto_symbol(self, symbol_name: str, symbol_info, path_lower: Optional[str] = None) -> bool:
         """
         Detectar si un símbolo es una criptomoneda
         """
-        crypto_patterns = ["BTC", "ETH", "LTC", "XRP", "ADA", "DOT", "LINK", "BCH", "USDT", "USDC"]
-        name_match = any(pattern in symbol_name.upper() for pattern in crypto_patterns)
+        name_match = _CRYPTO_RE.search(symbol_name.upper()) is not None
         
-        path_indicators = ["crypto", "digital", "coin", "token"]
-        path_match = any(indicator in symbol_info.path.lower() for indicator in path_indicators)
+        if path_lower is None:
+            path_lower = symbol_info.path.lower()
+        path_match = _CRYPTO_PATH_RE.search(path_lower) is not None
         
         return name_match or path_match
     
-    def _is_stock_symbol(self, symbol_name: str, symbol_info) -> bool:
+    def _is_stock_symbol(self, symbol_name: str, symbol_info, path_lower: Optional[str] = None) -> bool:
         """
         Detectar si un símbolo es una acción individual
         """
-        # Patrones de acciones comunes
-        stock_patterns = [
-            "AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META", "NFLX",
-            "AMD", "INTC", "PYPL", "ADBE", "CRM", "ORCL", "UBER", "LYFT"
-        ]
-        
         # Verificar si es una acción conocida
-        name_match = any(pattern in symbol_name.upper() for pattern in stock_patterns)
+        name_match = _STOCK_RE.search(symbol_name.upper()) is not None
         
         # Verificar por path/categoría
-        path_indicators = ["nasdaq", "nyse", "stocks", "shares", "equity", "stock"]
         
         # Manejar tanto objetos como diccionarios
         path_match = False
         is_etf = False
         
-        if hasattr(symbol_info, 'path'):
-            path = symbol_info.path.lower()
-            path_match = any(indicator in path for indicator in path_indicators)
-            is_etf = any(etf in path for etf in ["etf", "fund", "trust"])
-        elif isinstance(symbol_info, dict) and 'path' in symbol_info:
-            path = symbol_info['path'].lower()
-            path_match = any(indicator in path for indicator in path_indicators)
-            is_etf = any(etf in path for etf in ["etf", "fund", "trust"])
+        if path_lower is None:
+            if hasattr(symbol_info, 'path'):
+                path_lower = symbol_info.path.lower()
+            elif isinstance(symbol_info, dict) and 'path' in symbol_info:
+                path_lower = symbol_info['path'].lower()
+        
+        if path_lower:
+            path_match = _STOCK_PATH_RE.search(path_lower) is not None
+            is_etf = _ETF_PATH_RE.search(path_lower) is not None
         
         return (name_match or path_match) and not is_etf
 
-    def _rank_symbols_by_quality(self, symbols: List[str]) -> List[str]:
+    def _rank_symbols_by_quality(self, symbols: List[str], symbol_infos: Optional[Dict] = None,
+                                 top_k: Optional[int] = None) -> List[str]:
         """
         Ordenar símbolos por calidad de trading (liquidez, spread, etc.)
         
         Args:
             symbols: Lista de símbolos a ordenar
+            symbol_infos: SymbolInfo ya obtenidos (e.g. de mt5.symbols_get()) por nombre; los símbolos
+                que no estén se consultan a MT5
+            top_k: Si se indica, solo se devuelven los top_k mejores (heap en lugar de ordenar todo)
             
         Returns:
             Lista ordenada por calidad
         """
         try:
-            symbol_quality = []
-            
-            for symbol in symbols:
-                quality_score = self._calculate_symbol_quality(symbol)
-                if quality_score > 0:
-                    symbol_quality.append((symbol, quality_score))
-            
-            # Ordenar por puntuación de calidad (mayor es mejor)
-            symbol_quality.sort(key=lambda x: x[1], reverse=True)
+            symbol_infos = symbol_infos or {}
+            # Los símbolos sin SymbolInfo previo se consultan a MT5 (symbol_info + tick) uno a uno
+            scored = ((symbol, self._calculate_symbol_quality(symbol, symbol_infos.get(symbol)))
+                      for symbol in symbols)
+            symbol_quality = ((symbol, quality_score) for symbol, quality_score in scored if quality_score > 0)
+            
+            # Ordenar por puntuación de calidad (mayor es mejor); a igual puntuación se mantiene el orden
+            if top_k is not None:
+                ranked = heapq.nlargest(top_k, symbol_quality, key=itemgetter(1))
+            else:
+                ranked = sorted(symbol_quality, key=itemgetter(1), reverse=True)
             
-            return [symbol for symbol, _ in symbol_quality]
+            return [symbol for symbol, _ in ranked]
             
         except Exception as e:
             logger.error(f"Error ranking symbols: {str(e)}")
             return symbols
     
-    def _calculate_symbol_quality(self, symbol: str) -> float:
+    def _calculate_symbol_quality(self, symbol: str, symbol_info=None) -> float:
         """
         Calcular puntuación de calidad para un símbolo
         
         Args:
             symbol: Nombre del símbolo
+            symbol_info: SymbolInfo ya obtenido; si es None se consulta a MT5 (symbol_info + tick)
             
         Returns:
             Puntuación de calidad (0-100)
         """
         try:
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
+            if symbol_info is None:
+                symbol_info = mt5.symbol_info(symbol)
+                if not symbol_info:
+                    return 0
+                
+                tick_info = mt5.symbol_info_tick(symbol)
+                if not tick_info:
+                    return 0
+            elif not (symbol_info.time > 0 or symbol_info.bid > 0):
+                # SymbolInfo ya incluye la última cotización: sin cotización equivale a no tener tick
                 return 0
             
-            tick_info = mt5.symbol_info_tick(symbol)
-            if not tick_info:
-                return 0
+            if self._symbol_has_volume is None:
+                self._symbol_has_volume = hasattr(symbol_info, 'volume')
+                self._symbol_has_session_deals = hasattr(symbol_info, 'session_deals')
             
             quality_score = 0
             
@@ -1040,13 +2011,13 @@ class MT5Connector:
                 quality_score += (50 - spread_penalty)
             
             # Factor 2: Volumen (mayor es mejor)
-            volume = getattr(symbol_info, 'volume', 0)
+            volume = symbol_info.volume if self._symbol_has_volume else 0
             if volume > 0:
                 volume_score = min(25, volume / 1000)  # Normalizar volumen
                 quality_score += volume_score
             
             # Factor 3: Actividad (número de deals)
-            deals = getattr(symbol_info, 'session_deals', 0)
+            deals = symbol_info.session_deals if self._symbol_has_session_deals else 0
             if deals > 0:
                 deals_score = min(15, deals / 100)  # Normalizar deals
                 quality_score += deals_score
@@ -1058,8 +2029,8 @@ class MT5Connector:
             
             return quality_score
             
-        except Exception as e:
-            logger.error(f"Error calculating quality for {symbol}: {str(e)}")
+        except (AttributeError, TypeError) as e:
+            logger.error("Error calculating quality for %s: %s", symbol, e)
             return 0
 
     def get_symbol_specifications(self, symbol: str) -> Optional[Dict]:
@@ -1073,78 +2044,116 @@ class MT5Connector:
             Dictionary with comprehensive symbol specifications or None
         """
         try:
-            if not self.connected:
-                logger.error("MT5 not connected")
+            spec = self.get_symbol_spec(symbol)
+            if spec is None:
                 return None
+            specs = spec.to_dict()
             
-            symbol_info = mt5.symbol_info(symbol)
-            if not symbol_info:
-                logger.error(f"Failed to get symbol info for {symbol}")
-                return None
-            
-            # Get current tick for spread and prices
+            # Get current tick for spread and prices (siempre fresco, es la llamada barata)
             tick = mt5.symbol_info_tick(symbol)
-            
-            return {
-                'name': symbol_info.name,
-                'description': symbol_info.description,
-                'currency_base': symbol_info.currency_base,
-                'currency_profit': symbol_info.currency_profit,
-                'currency_margin': symbol_info.currency_margin,
-                'point': symbol_info.point,
-                'digits': symbol_info.digits,
-                'spread': symbol_info.spread,
-                'spread_float': symbol_info.spread_float,
-                'trade_mode': symbol_info.trade_mode,
-                'trade_stops_level': symbol_info.trade_stops_level,
-                'trade_freeze_level': symbol_info.trade_freeze_level,
-                'min_lot': symbol_info.volume_min,
-                'max_lot': symbol_info.volume_max,
-                'lot_step': symbol_info.volume_step,
-                'contract_size': symbol_info.trade_contract_size,
-                'tick_value': symbol_info.trade_tick_value,
-                'tick_size': symbol_info.trade_tick_size,
-                'swap_long': symbol_info.swap_long,
-                'swap_short': symbol_info.swap_short,
-                'margin_initial': symbol_info.margin_initial,
-                'margin_maintenance': symbol_info.margin_maintenance,
-                'session_deals': symbol_info.session_deals,
-                'session_buy_orders': symbol_info.session_buy_orders,
-                'session_sell_orders': symbol_info.session_sell_orders,
-                'visible': symbol_info.visible,
-                'select': symbol_info.select,
-                'tradeable': symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL,
-                # Obtener el mejor modo de llenado y los modos válidos
-                'filling_mode': self._get_filling_mode(symbol_info)[0],  # El mejor modo
-                'valid_filling_modes': self._get_filling_mode(symbol_info)[1],  # Lista de modos válidos
+            specs.update({
                 'current_bid': tick.bid if tick else None,
                 'current_ask': tick.ask if tick else None,
-                'current_spread_points': (tick.ask - tick.bid) / symbol_info.point if tick else None
-            }
+                'current_spread_points': (tick.ask - tick.bid) / specs['point'] if tick else None
+            })
+            return specs
             
-        except Exception as e:
-            logger.error(f"Error getting symbol specifications for {symbol}: {str(e)}")
+        except (AttributeError, RuntimeError, OSError, ZeroDivisionError) as e:
+            logger.error("Error getting symbol specifications for %s: %s", symbol, e)
+            return None
+
+    def get_symbol_spec(self, symbol: str) -> Optional[SymbolSpec]:
+        """
+        Especificaciones del símbolo (sin tick) cacheadas durante SYMBOL_SPEC_TTL_SECONDS
+        
+        Args:
+            symbol: Symbol name
+            
+        Returns:
+            SymbolSpec or None
+        """
+        if not self.connected:
+            logger.error("MT5 not connected")
+            return None
+        
+        now = time.monotonic()
+        cached = self._spec_cache.get(symbol)
+        if cached is not None and now - cached[0] < SYMBOL_SPEC_TTL_SECONDS:
+            return cached[1]
+        spec = self._build_symbol_specifications(symbol)
+        if spec is not None:
+            self._spec_cache[symbol] = (now, spec)
+        return spec
+
+    def _build_symbol_specifications(self, symbol: str) -> Optional[SymbolSpec]:
+        """
+        Consulta mt5.symbol_info y construye las especificaciones sin los campos del tick
+        
+        Args:
+            symbol: Symbol name
+            
+        Returns:
+            SymbolSpec or None
+        """
+        symbol_info = mt5.symbol_info(symbol)
+        if not symbol_info:
+            logger.error(f"Failed to get symbol info for {symbol}")
             return None
+        
+        # Obtener el mejor modo de llenado y los modos válidos
+        best_filling_mode, valid_filling_modes = self._get_filling_mode(symbol_info)
+        return SymbolSpec(
+            name=symbol_info.name,
+            description=symbol_info.description,
+            currency_base=symbol_info.currency_base,
+            currency_profit=symbol_info.currency_profit,
+            currency_margin=symbol_info.currency_margin,
+            point=symbol_info.point,
+            digits=symbol_info.digits,
+            spread=symbol_info.spread,
+            spread_float=symbol_info.spread_float,
+            trade_mode=symbol_info.trade_mode,
+            trade_stops_level=symbol_info.trade_stops_level,
+            trade_freeze_level=symbol_info.trade_freeze_level,
+            min_lot=symbol_info.volume_min,
+            max_lot=symbol_info.volume_max,
+            lot_step=symbol_info.volume_step,
+            contract_size=symbol_info.trade_contract_size,
+            tick_value=symbol_info.trade_tick_value,
+            tick_size=symbol_info.trade_tick_size,
+            swap_long=symbol_info.swap_long,
+            swap_short=symbol_info.swap_short,
+            margin_initial=symbol_info.margin_initial,
+            margin_maintenance=symbol_info.margin_maintenance,
+            session_deals=symbol_info.session_deals,
+            session_buy_orders=symbol_info.session_buy_orders,
+            session_sell_orders=symbol_info.session_sell_orders,
+            visible=symbol_info.visible,
+            select=symbol_info.select,
+            tradeable=symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL,
+            is_jpy='JPY' in symbol_info.name,
+            pip_factor=pip_factor(symbol_info.name, symbol_info.digits, symbol_info.point),
+            filling_mode=best_filling_mode,  # El mejor modo
+            valid_filling_modes=valid_filling_modes  # Lista de modos válidos
+        )
 
-    def _get_filling_mode(self, symbol_info) -> int:
+    # Resultado fijo de _get_filling_mode: (mejor modo, modos válidos). La lista es compartida: no modificar
+    _FILLING_MODES = (mt5.ORDER_FILLING_IOC, [mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN])
+
+    def _get_filling_mode(self, symbol_info) -> Tuple[int, List[int]]:
         """
         Devuelve una lista de filling modes válidos para Libertex MT5.
         Siempre retorna [ORDER_FILLING_IOC, ORDER_FILLING_RETURN] en ese orden.
         Nunca incluye FOK.
         """
-        try:
-            import MetaTrader5 as mt5
-            modes = [mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN]
+        if logger.isEnabledFor(logging.DEBUG):
             symbol_name = getattr(symbol_info, 'name', 'unknown') if symbol_info else 'unknown'
-            logger.info(f"[FILLING MODES] {symbol_name} (Libertex MT5). Usando modos: {modes}")
-            return modes[0], modes
-        except Exception as e:
-            logger.error(f"Error determining filling mode: {str(e)}")
-            return mt5.ORDER_FILLING_IOC, [mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN]
+            logger.debug(f"[FILLING MODES] {symbol_name} (Libertex MT5). Usando modos: {self._FILLING_MODES[1]}")
+        return self._FILLING_MODES
 
     def calculate_dynamic_sl_tp(self, symbol: str, signal_type: str, entry_price: float, 
                                atr_value: float, sl_multiplier: float = 1.5, 
-                               tp_multiplier: float = 2.5) -> Dict:
+                               tp_multiplier: float = 2.5, spec: Optional[SymbolSpec] = None) -> Dict:
         """
         Calculate dynamic SL and TP based on symbol specifications and ATR
         
@@ -1155,20 +2164,23 @@ class MT5Connector:
             atr_value: ATR value for the symbol
             sl_multiplier: SL distance multiplier
             tp_multiplier: TP distance multiplier
+            spec: Especificaciones ya obtenidas con get_symbol_spec (opcional).
+                  Si se pasan no se vuelven a consultar; su frescura es responsabilidad del llamador
             
         Returns:
-            Dictionary with calculated SL and TP values
+            Dictionary with calculated SL and TP values; 'spec' contiene el SymbolSpec
+            usado para poder reenviarlo a validate_order_parameters
         """
         try:
-            symbol_info = self.get_symbol_specifications(symbol)
+            symbol_info = spec if spec is not None else self.get_symbol_spec(symbol)
             if not symbol_info:
                 logger.error(f"Cannot get symbol info for {symbol}")
                 return {}
             
             # Get minimum stops level
-            stops_level = symbol_info['trade_stops_level']
-            point = symbol_info['point']
-            digits = symbol_info['digits']
+            stops_level = symbol_info.trade_stops_level
+            point = symbol_info.point
+            digits = symbol_info.digits
             
             # Calculate SL and TP distances
             sl_distance = atr_value * sl_multiplier
@@ -1190,7 +2202,8 @@ class MT5Connector:
             sl = round(sl, digits)
             tp = round(tp, digits)
             
-            logger.info(f"Calculated SL: {sl}, TP: {tp} for symbol {symbol}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Calculated SL: {sl}, TP: {tp} for symbol {symbol}")
             
             return {
                 'stop_loss': sl,
@@ -1198,15 +2211,17 @@ class MT5Connector:
                 'sl_distance_points': sl_distance / point,
                 'tp_distance_points': tp_distance / point,
                 'risk_reward_ratio': tp_distance / sl_distance,
-                'min_stops_level': stops_level
+                'min_stops_level': stops_level,
+                'spec': symbol_info
             }
             
-        except Exception as e:
-            logger.error(f"Error calculating dynamic SL/TP for symbol {symbol}: {str(e)}")
+        except (AttributeError, TypeError, ZeroDivisionError) as e:
+            logger.error("Error calculating dynamic SL/TP for symbol %s: %s", symbol, e)
             return {}
 
     def validate_order_parameters(self, symbol: str, order_type: int, volume: float, 
-                                 price: float, sl: float, tp: float) -> Tuple[bool, str]:
+                                 price: float, sl: float, tp: float,
+                                 spec: Optional[SymbolSpec] = None) -> Tuple[bool, str]:
         """
         Validate order parameters against symbol specifications
         
@@ -1217,35 +2232,36 @@ class MT5Connector:
             price: Order price
             sl: Stop loss
             tp: Take profit
+            spec: Especificaciones ya obtenidas (e.g. el 'spec' devuelto por calculate_dynamic_sl_tp).
+                  Si se pasan no se vuelven a consultar; su frescura es responsabilidad del llamador
             
         Returns:
             Tuple of (is_valid, error_message)
         """
         try:
-            symbol_info = self.get_symbol_specifications(symbol)
+            # SymbolSpec y SymbolInfoLite exponen los mismos atributos de validación
+            symbol_info = spec if spec is not None else self._get_symbol_info_lite(symbol)
             if not symbol_info:
                 return False, f"Cannot get symbol info for {symbol}"
             
             # Check if symbol is tradeable
-            if not symbol_info['tradeable']:
+            if not symbol_info.tradeable:
                 return False, f"Symbol {symbol} is not tradeable"
             
             # Validate volume
-            if volume < symbol_info['min_lot']:
-                return False, f"Volume {volume} below minimum {symbol_info['min_lot']}"
+            if volume < symbol_info.min_lot:
+                return False, f"Volume {volume} below minimum {symbol_info.min_lot}"
             
-            if volume > symbol_info['max_lot']:
-                return False, f"Volume {volume} above maximum {symbol_info['max_lot']}"
+            if volume > symbol_info.max_lot:
+                return False, f"Volume {volume} above maximum {symbol_info.max_lot}"
             
             # Check volume step
-            lot_step = symbol_info['lot_step']
+            lot_step = symbol_info.lot_step
             if abs(volume % lot_step) > 1e-8:
                 return False, f"Volume {volume} not multiple of lot step {lot_step}"
             
             # Validate stops level
-            stops_level = symbol_info['trade_stops_level']
-            point = symbol_info['point']
-            min_distance = stops_level * point
+            min_distance = symbol_info.trade_stops_level * symbol_info.point
             
             if order_type == mt5.ORDER_TYPE_BUY:
                 sl_distance = abs(price - sl)
@@ -1260,13 +2276,51 @@ class MT5Connector:
             if tp_distance < min_distance:
                 return False, f"TP distance {tp_distance} below minimum {min_distance}"
             
-            logger.info(f"Order parameters validated successfully for symbol {symbol}")
+            logger.info("Order parameters validated successfully for symbol %s", symbol)
             return True, "Order parameters valid"
             
-        except Exception as e:
-            logger.error(f"Error validating order parameters for symbol {symbol}: {str(e)}")
+        except (AttributeError, KeyError, TypeError, ZeroDivisionError) as e:
+            logger.error("Error validating order parameters for symbol %s: %s", symbol, e)
             return False, f"Validation error: {str(e)}"
     
+    def _get_symbol_info_lite(self, symbol: str) -> Optional[SymbolInfoLite]:
+        """
+        Versión reducida de get_symbol_specifications para validar órdenes
+        
+        Solo consulta mt5.symbol_info (sin tick ni filling modes) y se cachea
+        durante SYMBOL_SPEC_TTL_SECONDS.
+        
+        Args:
+            symbol: Symbol name
+            
+        Returns:
+            SymbolInfoLite or None if error
+        """
+        if not self.connected:
+            logger.error("MT5 not connected")
+            return None
+        
+        now = time.monotonic()
+        cached = self._symbol_lite_cache.get(symbol)
+        if cached is not None and now - cached[0] < SYMBOL_SPEC_TTL_SECONDS:
+            return cached[1]
+        
+        symbol_info = mt5.symbol_info(symbol)
+        if not symbol_info:
+            logger.error(f"Failed to get symbol info for {symbol}")
+            return None
+        
+        lite = SymbolInfoLite(
+            tradeable=symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL,
+            min_lot=symbol_info.volume_min,
+            max_lot=symbol_info.volume_max,
+            lot_step=symbol_info.volume_step,
+            trade_stops_level=symbol_info.trade_stops_level,
+            point=symbol_info.point,
+        )
+        self._symbol_lite_cache[symbol] = (now, lite)
+        return lite
+    
     def get_market_hours(self, symbol: str) -> Dict:
         """
         Get market hours for a symbol
@@ -1285,16 +2339,12 @@ class MT5Connector:
             if not symbol_info:
                 return {}
             
-            # Get trading sessions
+            # Get trading sessions (0=Sunday, 6=Saturday); se reutilizan durante el día de trading
             sessions = []
-            for day in range(7):  # 0=Sunday, 6=Saturday
-                session = mt5.symbol_info_sessionsquotes(symbol, day, 0)
-                if session:
-                    sessions.append({
-                        'day': day,
-                        'from': session[0].from_time,
-                        'to': session[0].to_time
-                    })
+            if hasattr(mt5, 'symbol_info_sessionsquotes'):
+                today = datetime.now().date()
+                for day in range(7):
+                    sessions.extend(self._get_day_sessions(symbol, day, today))
             
             return {
                 'sessions': sessions,
@@ -1308,6 +2358,34 @@ class MT5Connector:
             logger.error(f"Error getting market hours for {symbol}: {str(e)}")
             return {}
     
+    def _get_day_sessions(self, symbol: str, day: int, today: date) -> List[Dict]:
+        """
+        Sesiones de cotización de un día de la semana, cacheadas hasta que cambie la fecha
+        
+        Args:
+            symbol: Trading symbol
+            day: Día de la semana (0=Sunday, 6=Saturday)
+            today: Fecha actual (las sesiones cacheadas de otra fecha se vuelven a consultar)
+            
+        Returns:
+            Lista de sesiones {'day', 'from', 'to'} (puede haber varias por día)
+        """
+        cached = self._session_cache.get((symbol, day))
+        if cached is not None and cached[0] == today:
+            return cached[1]
+        sessions = []
+        for session_index in range(MAX_SESSIONS_PER_DAY):
+            session = mt5.symbol_info_sessionsquotes(symbol, day, session_index)
+            if not session:
+                break
+            sessions.append({
+                'day': day,
+                'from': session[0].from_time,
+                'to': session[0].to_time
+            })
+        self._session_cache[(symbol, day)] = (today, sessions)
+        return sessions
+    
     def get_adaptive_strategy_params(self, symbol: str) -> Dict:
         """
         Obtener parámetros de estrategia adaptativa basados en características del símbolo
@@ -1326,7 +2404,7 @@ class MT5Connector:
             # Calcular características del símbolo
             spread = symbol_info.get('spread', 0)
             point = symbol_info.get('point', 0.00001)
-            spread_in_pips = spread * point * 10000 if symbol.endswith('JPY') else spread * point * 100000
+            spread_in_pips = spread * point / pip_factor(symbol, symbol_info.get('digits'), point)
             
             # Obtener datos históricos para análisis de volatilidad
             volatility_data = self._analyze_symbol_volatility(symbol)
@@ -1337,7 +2415,7 @@ class MT5Connector:
             # Generar parámetros adaptativos
             strategy_params = self._generate_adaptive_params(symbol, symbol_class, spread_in_pips, volatility_data)
             
-            logger.info(f"Adaptive strategy for {symbol}: Class={symbol_class['category']}, "
+            logger.info(f"Adaptive strategy for {symbol}: Class={symbol_class.category}, "
                        f"Spread={spread_in_pips:.1f} pips, Volatility={volatility_data['classification']}")
             
             return strategy_params
@@ -1351,56 +2429,41 @@ class MT5Connector:
         Analizar la volatilidad histórica del símbolo
         """
         try:
-            # Obtener datos de diferentes timeframes
-            timeframes = [mt5.TIMEFRAME_M15, mt5.TIMEFRAME_H1, mt5.TIMEFRAME_H4, mt5.TIMEFRAME_D1]
+            # Una sola descarga M15; H1/H4/D1 se reconstruyen localmente agrupando por hora del servidor
+            timeframes = (('atr_15m', mt5.TIMEFRAME_M15, 900), ('atr_1h', mt5.TIMEFRAME_H1, 3600),
+                          ('atr_4h', mt5.TIMEFRAME_H4, 14400), ('atr_daily', mt5.TIMEFRAME_D1, 86400))
             volatility_analysis = {
                 'atr_15m': 0, 'atr_1h': 0, 'atr_4h': 0, 'atr_daily': 0,
                 'daily_range': 0, 'weekly_range': 0, 'classification': 'normal'
             }
             
-            for i, tf in enumerate(timeframes):
-                rates = mt5.copy_rates_from_pos(symbol, tf, 0, 100)
-                if rates is not None and len(rates) > 14:
-                    # Calcular ATR
-                    highs = rates['high']
-                    lows = rates['low']
-                    closes = rates['close']
-                    
-                    tr_values = []
-                    for j in range(1, len(rates)):
-                        tr1 = highs[j] - lows[j]
-                        tr2 = abs(highs[j] - closes[j-1])
-                        tr3 = abs(lows[j] - closes[j-1])
-                        tr_values.append(max(tr1, tr2, tr3))
-                    
-                    atr = sum(tr_values[-14:]) / 14 if len(tr_values) >= 14 else sum(tr_values) / len(tr_values)
-                    
+            rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M15, 0, VOLATILITY_M15_BARS)
+            missing = []
+            for key, tf, seconds in timeframes:
+                atr = None
+                if rates is not None and len(rates) > VOLATILITY_ATR_PERIOD:
+                    if seconds == 900:
+                        atr = _last_atr(rates['high'], rates['low'], rates['close'])
+                    else:
+                        atr = _last_atr(*_resample_hlc(rates, seconds))
+                if atr is None:
+                    missing.append((key, tf))
+                else:
                     # Almacenar ATR para cada timeframe
-                    if i == 0: volatility_analysis['atr_15m'] = atr
-                    elif i == 1: volatility_analysis['atr_1h'] = atr
-                    elif i == 2: volatility_analysis['atr_4h'] = atr
-                    elif i == 3: volatility_analysis['atr_daily'] = atr
+                    volatility_analysis[key] = atr
+            
+            # Historial M15 insuficiente: pedir directamente el timeframe
+            for key, tf in missing:
+                tf_rates = mt5.copy_rates_from_pos(symbol, tf, 0, 100)
+                if tf_rates is not None and len(tf_rates) > VOLATILITY_ATR_PERIOD:
+                    volatility_analysis[key] = _last_atr(tf_rates['high'], tf_rates['low'], tf_rates['close'])
             
             # Clasificar volatilidad
-            daily_atr = volatility_analysis['atr_daily']
-            point = self.get_symbol_info(symbol).get('point', 0.00001)
-            daily_atr_pips = daily_atr / point
+            symbol_info = self.get_symbol_info(symbol)
+            daily_atr_pips = volatility_analysis['atr_daily'] / pip_factor(
+                symbol, symbol_info.get('digits'), symbol_info.get('point'))
             
-            if symbol.endswith('JPY'):
-                daily_atr_pips *= 0.01
-            else:
-                daily_atr_pips *= 0.0001
-            
-            if daily_atr_pips > 150:
-                volatility_analysis['classification'] = 'high'
-            elif daily_atr_pips > 80:
-                volatility_analysis['classification'] = 'medium-high'
-            elif daily_atr_pips > 50:
-                volatility_analysis['classification'] = 'normal'
-            elif daily_atr_pips > 30:
-                volatility_analysis['classification'] = 'low-medium'
-            else:
-                volatility_analysis['classification'] = 'low'
+            volatility_analysis['classification'] = _VOLATILITY_CLASSES[bisect_left(_VOLATILITY_LIMITS, daily_atr_pips)]
             
             return volatility_analysis
             
@@ -1408,272 +2471,84 @@ class MT5Connector:
             logger.error(f"Error analyzing volatility for {symbol}: {str(e)}")
             return {'classification': 'normal', 'atr_daily': 0.001}
     
-    def _classify_symbol(self, symbol: str, symbol_info: Dict, spread_pips: float, volatility: Dict) -> Dict:
+    def _classify_symbol(self, symbol: str, symbol_info: Dict, spread_pips: float, volatility: Dict) -> SymbolClass:
         """
         Clasificar el símbolo para determinar estrategia óptima
         """
-        # Clasificación base por tipo
-        if symbol.startswith('XAU') or 'GOLD' in symbol:
-            category = 'precious_metals'
-            liquidity = 'high'
-        elif symbol.startswith('XAG') or 'SILVER' in symbol:
-            category = 'precious_metals'
-            liquidity = 'medium'
-        elif any(major in symbol for major in ['EURUSD', 'GBPUSD', 'USDJPY', 'USDCHF']):
-            category = 'major_pairs'
-            liquidity = 'very_high'
-        elif any(minor in symbol for minor in ['AUDUSD', 'USDCAD', 'NZDUSD', 'EURJPY', 'GBPJPY', 'EURGBP']):
-            category = 'minor_pairs'
-            liquidity = 'high'
-        elif symbol.endswith('JPY') or symbol.startswith('JPY'):
-            category = 'jpy_pairs'
-            liquidity = 'medium-high'
-        elif any(exotic in symbol for exotic in ['ZAR', 'TRY', 'MXN', 'NOK', 'SEK', 'PLN']):
-            category = 'exotic_pairs'
-            liquidity = 'low-medium'
-        else:
-            category = 'cross_pairs'
-            liquidity = 'medium'
+        # Clasificación base por tipo (memorizada por símbolo)
+        category, liquidity = _symbol_family(symbol)
         
         # Ajustar por spread
-        if spread_pips <= 2:
-            spread_class = 'tight'
-        elif spread_pips <= 5:
-            spread_class = 'normal'
-        elif spread_pips <= 10:
-            spread_class = 'wide'
-        else:
-            spread_class = 'very_wide'
+        spread_index = bisect_left(_SPREAD_CLASS_LIMITS, spread_pips)
         
-        # Ajustar liquidez por spread
-        if spread_class in ['wide', 'very_wide']:
-            if liquidity == 'very_high':
-                liquidity = 'high'
-            elif liquidity == 'high':
-                liquidity = 'medium'
+        # Ajustar liquidez por spread (wide o very_wide)
+        if spread_index >= 2:
+            liquidity = _LIQUIDITY_DOWNGRADE.get(liquidity, liquidity)
         
-        return {
-            'category': category,
-            'liquidity': liquidity,
-            'spread_class': spread_class,
-            'volatility': volatility['classification'],
-            'spread_pips': spread_pips
-        }
+        return SymbolClass(category, liquidity, _SPREAD_CLASSES[spread_index],
+                           volatility['classification'], spread_pips)
     
-    def _generate_adaptive_params(self, symbol: str, symbol_class: Dict, spread_pips: float, volatility: Dict) -> Dict:
+    def _generate_adaptive_params(self, symbol: str, symbol_class: SymbolClass, spread_pips: float, volatility: Dict) -> Dict:
         """
         Generar parámetros de estrategia adaptativos
         """
-        # Parámetros base
-        params = {
-            'timeframes': ['M15', 'M30', 'H1'],
-            'sl_multiplier': 1.5,
-            'tp_multiplier': 2.5,
-            'min_atr_threshold_multiplier': 2.0,
-            'confidence_threshold': 0.6,
-            'max_spread_threshold': 10,
-            'ema_periods': [20, 50, 200],
-            'rsi_period': 14,
-            'atr_period': 14,
-            'adx_threshold': 25,
-            'volume_filter': False,
-            'session_filter': False,  # Temporarily disabled for testing
-            'news_filter': False
-        }
+        # Parámetros base + sobrescrituras de la categoría en una sola mezcla
+        category = symbol_class.category
+        params = {**_ADAPTIVE_BASE_PARAMS, **_ADAPTIVE_PARAMS_BY_CATEGORY.get(category, {})}
         
-        # Adaptaciones por categoría
-        category = symbol_class['category']
-        
-        if category == 'major_pairs':
-            # Pares principales: estrategia estándar con filtros estrictos
-            params.update({
-                'sl_multiplier': 1.2,
-                'tp_multiplier': 2.0,
-                'confidence_threshold': 0.65,
-                'max_spread_threshold': 3,
-                'adx_threshold': 20,
-                'volume_filter': False  # Temporarily disabled for testing
-            })
-            
-        elif category == 'minor_pairs':
-            # Pares menores: parámetros ligeramente más conservadores
-            params.update({
-                'sl_multiplier': 1.5,
-                'tp_multiplier': 2.3,
-                'confidence_threshold': 0.6,
-                'max_spread_threshold': 5,
-                'timeframes': ['M30', 'H1'],
-            })
-            
-        elif category == 'jpy_pairs':
-            # Pares JPY: ajustar por diferente valor de pip
-            params.update({
-                'sl_multiplier': 1.0,  # JPY se mueve más
-                'tp_multiplier': 1.8,
-                'min_atr_threshold_multiplier': 1.5,
-                'confidence_threshold': 0.62,
-                'max_spread_threshold': 4
-            })
-            
-        elif category == 'precious_metals':
-            # Metales: mayor volatilidad, parámetros más amplios
-            params.update({
-                'sl_multiplier': 2.5,
-                'tp_multiplier': 4.0,
-                'confidence_threshold': 0.7,
-                'max_spread_threshold': 50,
-                'timeframes': ['M30', 'H1', 'H4'],
-                'adx_threshold': 30,
-                'min_atr_threshold_multiplier': 3.0
-            })
-            
-        elif category == 'exotic_pairs':
-            # Pares exóticos: muy conservador
-            params.update({
-                'sl_multiplier': 2.0,
-                'tp_multiplier': 3.5,
-                'confidence_threshold': 0.75,
-                'max_spread_threshold': 20,
-                'timeframes': ['H1', 'H4'],
-                'adx_threshold': 35,
-                'session_filter': False,  # Temporarily disabled for testing
-                'news_filter': True
-            })
+        sl = params['sl_multiplier']
+        tp = params['tp_multiplier']
+        confidence = params['confidence_threshold']
+        adx = params['adx_threshold']
         
         # Adaptaciones por volatilidad
         volatility_class = volatility['classification']
-        
-        if volatility_class == 'high':
-            # Alta volatilidad: aumentar SL/TP, mayor prudencia
-            params['sl_multiplier'] *= 1.4
-            params['tp_multiplier'] *= 1.3
-            params['confidence_threshold'] += 0.05
-            params['adx_threshold'] += 5
-            
-        elif volatility_class == 'low':
-            # Baja volatilidad: reducir SL/TP, ser más agresivo
-            params['sl_multiplier'] *= 0.8
-            params['tp_multiplier'] *= 0.9
-            params['confidence_threshold'] -= 0.05
-            params['adx_threshold'] -= 5
+        adjustment = _VOLATILITY_ADJUSTMENTS.get(volatility_class)
+        if adjustment is not None:
+            sl *= adjustment[0]
+            tp *= adjustment[1]
+            confidence += adjustment[2]
+            adx += adjustment[3]
         
         # Adaptaciones por spread
         if spread_pips > 5:
             # Spread alto: ser más selectivo
-            params['confidence_threshold'] += 0.1
-            params['tp_multiplier'] *= 1.2  # TP más amplio para compensar spread
+            confidence += 0.1
+            tp *= 1.2  # TP más amplio para compensar spread
             
         elif spread_pips < 2:
             # Spread bajo: ser más agresivo
-            params['confidence_threshold'] -= 0.05
-        
-        # Límites de seguridad
-        params['sl_multiplier'] = max(0.8, min(3.0, params['sl_multiplier']))
-        params['tp_multiplier'] = max(1.2, min(5.0, params['tp_multiplier']))
-        params['confidence_threshold'] = max(0.5, min(0.8, params['confidence_threshold']))
-        params['adx_threshold'] = max(15, min(40, params['adx_threshold']))
+            confidence -= 0.05
         
-        # Información adicional
+        # Límites de seguridad e información adicional
         params.update({
+            'sl_multiplier': max(_SL_MULTIPLIER_LIMITS[0], min(_SL_MULTIPLIER_LIMITS[1], sl)),
+            'tp_multiplier': max(_TP_MULTIPLIER_LIMITS[0], min(_TP_MULTIPLIER_LIMITS[1], tp)),
+            'confidence_threshold': max(_CONFIDENCE_LIMITS[0], min(_CONFIDENCE_LIMITS[1], confidence)),
+            'adx_threshold': max(_ADX_LIMITS[0], min(_ADX_LIMITS[1], adx)),
             'symbol_category': category,
-            'liquidity_class': symbol_class['liquidity'],
-            'spread_class': symbol_class['spread_class'],
+            'liquidity_class': symbol_class.liquidity,
+            'spread_class': symbol_class.spread_class,
             'volatility_class': volatility_class,
             'adapted_for_spread': spread_pips,
             'recommended_risk_per_trade': self._get_recommended_risk(symbol_class),
             'session_times': self._get_optimal_sessions(symbol),
-            'min_volume_threshold': self._get_min_volume_threshold(symbol_class)
+            'min_volume_threshold': _MIN_VOLUME_BY_CATEGORY.get(category, 100)
         })
         
         return params
     
     def _get_default_strategy_params(self) -> Dict:
-        """Parámetros de estrategia por defecto"""
-        return {
-            'timeframes': ['M15', 'M30', 'H1'],
-            'sl_multiplier': 1.5,
-            'tp_multiplier': 2.5,
-            'min_atr_threshold_multiplier': 2.0,
-            'confidence_threshold': 0.6,
-            'max_spread_threshold': 10,
-            'ema_periods': [20, 50, 200],
-            'rsi_period': 14,
-            'atr_period': 14,
-            'adx_threshold': 25,
-            'symbol_category': 'unknown',
-            'recommended_risk_per_trade': 0.01
-        }
+        """Parámetros de estrategia por defecto (copia de _DEFAULT_STRATEGY_PARAMS; las tuplas se comparten)"""
+        return _DEFAULT_STRATEGY_PARAMS.copy()
     
-    def _get_recommended_risk(self, symbol_class: Dict) -> float:
+    def _get_recommended_risk(self, symbol_class: SymbolClass) -> float:
         """Obtener riesgo recomendado por operación según la clase del símbolo"""
-        category = symbol_class['category']
-        liquidity = symbol_class['liquidity']
-        spread_class = symbol_class['spread_class']
-        
-        base_risk = 0.01  # 1% base
-        
-        # Ajustar por categoría
-        if category == 'major_pairs':
-            risk_multiplier = 1.0
-        elif category == 'minor_pairs':
-            risk_multiplier = 0.8
-        elif category == 'precious_metals':
-            risk_multiplier = 0.6
-        elif category == 'exotic_pairs':
-            risk_multiplier = 0.4
-        else:
-            risk_multiplier = 0.7
-        
-        # Ajustar por liquidez
-        if liquidity == 'very_high':
-            liquidity_multiplier = 1.0
-        elif liquidity == 'high':
-            liquidity_multiplier = 0.9
-        elif liquidity == 'medium':
-            liquidity_multiplier = 0.7
-        else:
-            liquidity_multiplier = 0.5
-        
-        # Ajustar por spread
-        if spread_class == 'tight':
-            spread_multiplier = 1.0
-        elif spread_class == 'normal':
-            spread_multiplier = 0.8
-        elif spread_class == 'wide':
-            spread_multiplier = 0.6
-        else:
-            spread_multiplier = 0.4
-        
-        final_risk = base_risk * risk_multiplier * liquidity_multiplier * spread_multiplier
-        return max(0.002, min(0.015, final_risk))  # Entre 0.2% y 1.5%
+        return _recommended_risk(symbol_class.category, symbol_class.liquidity, symbol_class.spread_class)
     
-    def _get_optimal_sessions(self, symbol: str) -> List[str]:
-        """Obtener sesiones de trading óptimas para el símbolo"""
-        # Sesiones principales para diferentes regiones
-        if any(pair in symbol for pair in ['USDJPY', 'EURJPY', 'GBPJPY', 'AUDJPY']):
-            return ['asia', 'london', 'newyork']
-        elif any(pair in symbol for pair in ['EURUSD', 'GBPUSD', 'EURGBP', 'EURCHF']):
-            return ['london', 'newyork']
-        elif any(pair in symbol for pair in ['AUDUSD', 'NZDUSD', 'AUDNZD']):
-            return ['asia', 'london']
-        elif symbol.startswith('XAU') or symbol.startswith('XAG'):
-            return ['london', 'newyork']  # Metales más activos en estas sesiones
-        else:
-            return ['london', 'newyork']  # Por defecto
-    
-    def _get_min_volume_threshold(self, symbol_class: Dict) -> int:
-        """Obtener umbral mínimo de volumen según la clase del símbolo"""
-        category = symbol_class['category']
-
-        thresholds = {
-            'major_pairs': 1000,
-            'minor_pairs': 500,
-            'exotic_pairs': 100,
-            'precious_metals': 200,
-            'indices': 300
-        }
-
-        return thresholds.get(category, 100)
+    def _get_optimal_sessions(self, symbol: str) -> Tuple[str, ...]:
+        """Obtener sesiones de trading óptimas para el símbolo (tupla compartida, no modificar)"""
+        return _optimal_sessions(symbol)
     
     def validate_and_adjust_stops(self, symbol: str, order_type: int, price: float, 
                                   sl: float, tp: float, force_adjustment: bool = False) -> Tuple[float, float, bool]:
@@ -1693,8 +2568,8 @@ class MT5Connector:
             Tupla de (SL ajustado, TP ajustado, son válidos)
         """
         try:
-            # Obtener especificaciones del símbolo
-            symbol_specs = self.get_dynamic_trading_params(symbol)
+            # Obtener especificaciones del símbolo (estáticas, cacheadas por sesión)
+            symbol_specs = self._get_stops_spec(symbol)
             if not symbol_specs:
                 logger.error(f"No se pueden obtener especificaciones para {symbol}")
                 return sl, tp, False
@@ -1714,12 +2589,9 @@ class MT5Connector:
                 return sl, tp, False
                 
             # Obtener parámetros clave
-            digits = symbol_specs.get('digits', 5)
-            point = float(symbol_specs.get('point', 0.00001))
-            stops_level = float(symbol_specs.get('trade_stops_level', 0))
-
-            # Clasificar el instrumento para aplicar lógica adecuada
-            instrument_category = self._determine_instrument_category(symbol, symbol_specs)
+            pow10 = symbol_specs.pow10
+            point = symbol_specs.point
+            stops_level = symbol_specs.trade_stops_level
 
             # Factor de seguridad adicional (aumentado para acciones y problemas reportados)
             safety_factor = 10 if force_adjustment else 6  # Incrementado sustancialmente para prevenir errores
@@ -1729,27 +2601,14 @@ class MT5Connector:
             min_distance_price = min_distance_points * point
 
             # Añadir margen de seguridad específico según tipo de instrumento (valores significativamente aumentados)
-            if instrument_category == "forex":
-                if 'JPY' in symbol:
-                    min_distance_price = max(min_distance_price, 0.20 if force_adjustment else 0.10)    # Mínimo 10-20 pips para pares JPY
-                else:
-                    min_distance_price = max(min_distance_price, 0.0020 if force_adjustment else 0.0010)  # Mínimo 10-20 pips para forex normal
-            elif instrument_category == "metal":
-                min_distance_price = max(min_distance_price, 1.0 if force_adjustment else 0.6)        # Mínimo 0.6-1.0 USD para oro/plata
-            elif instrument_category == "index":
-                min_distance_price = max(min_distance_price, 5.0 if force_adjustment else 3.0)         # Mínimo 3-5 puntos para índices
-            elif instrument_category == "stock":
-                min_distance_price = max(min_distance_price, 3.0 if force_adjustment else 2.0)        # Mínimo 2-3 USD para acciones
-            elif instrument_category == "crypto":
-                min_distance_price = max(min_distance_price, 40.0 if force_adjustment else 20.0)      # Mínimo 20-40 USD para criptomonedas
-            else:
-                min_distance_price = max(min_distance_price, 2.0 if force_adjustment else 1.0)        # Valor seguro por defecto
+            min_distances = symbol_specs.min_stop_distances
+            min_distance_price = max(min_distance_price, min_distances[1 if force_adjustment else 0])
 
             # Si el min_distance_price es mayor que el precio, usar un porcentaje del precio como fallback
             if min_distance_price >= price:
                 min_distance_price = price * 0.05  # 5% del precio como distancia mínima de emergencia
                 
-            # Obtener información actual del mercado
+            # Obtener información actual del mercado (tick de _micro_cache, vigente TICK_TTL_SECONDS)
             current_price_data = self.get_current_price(symbol)
             if current_price_data:
                 bid, ask = current_price_data
@@ -1757,145 +2616,122 @@ class MT5Connector:
                 market_price = ask if order_type == 0 else bid
                 # Si el precio de orden está alejado del mercado, usar el precio de mercado para validación
                 if abs(price - market_price) > min_distance_price * 2:
-                    logger.warning(f"Precio de orden {price} alejado del mercado {market_price}. Usando precio de mercado para validación.")
+                    logger.warning("Precio de orden %s alejado del mercado %s. Usando precio de mercado para validación.",
+                                   price, market_price)
                     price = market_price
                 
-            # Prevenir stops negativos para cualquier instrumento
-            if sl <= 0:
-                # Para stops nulos o negativos, crear un stop por defecto basado en la categoría del instrumento
-                if order_type == 0:  # BUY
-                    sl = max(price - min_distance_price, price * 0.90)
-                else:  # SELL
-                    sl = min(price + min_distance_price, price * 1.10)
-                logger.warning(f"SL ajustado para evitar valor negativo o nulo: {sl} para {symbol}")
-            
-            # Verificar y ajustar SL según tipo de orden
-            if order_type == 0:  # BUY (mt5.ORDER_TYPE_BUY)
-                # Para compras, SL debe estar por DEBAJO del precio de entrada
-                if sl >= price or price - sl < min_distance_price:
-                    sl = max(price - min_distance_price, price * 0.90)
-                    logger.warning(f"SL ajustado a {sl} para cumplir distancia mínima en {symbol}")
-            else:  # SELL (mt5.ORDER_TYPE_SELL)
-                # Para ventas, SL debe estar por ENCIMA del precio de entrada
-                if sl <= price or sl - price < min_distance_price:
-                    sl = min(price + min_distance_price, price * 1.10)
-                    logger.warning(f"SL ajustado a {sl} para cumplir distancia mínima en {symbol}")
-            
-            # Manejo similar para TP nulos o inválidos
-            if tp <= 0:
-                # Para TPs nulos o negativos, crear un TP por defecto basado en el SL (ratio 1.5)
-                if order_type == 0:  # BUY
-                    tp = price + max((price - sl) * 1.5, min_distance_price)
-                else:  # SELL
-                    tp = price - max((sl - price) * 1.5, min_distance_price)
-                logger.warning(f"TP ajustado para evitar valor negativo o nulo: {tp} para {symbol}")
-
-            # Verificar y ajustar TP según tipo de orden
-            if order_type == 0:  # BUY
-                # Para compras, TP debe estar por ENCIMA del precio de entrada
-                if tp <= price or tp - price < min_distance_price:
-                    tp = price + max(min_distance_price, abs(price - sl) * 1.5)
-                    logger.warning(f"TP ajustado a {tp} para cumplir distancia mínima en {symbol}")
-            else:  # SELL
-                # Para ventas, TP debe estar por DEBAJO del precio de entrada
-                if tp >= price or price - tp < min_distance_price:
-                    tp = price - max(min_distance_price, abs(sl - price) * 1.5)
-                    logger.warning(f"TP ajustado a {tp} para cumplir distancia mínima en {symbol}")
-
-            # Validar stops ajustados para mantener la relación riesgo-recompensa
-            if abs(tp - sl) / max(abs(price - sl), 1e-8) < 1.3:
-                if order_type == 0:
-                    tp = price + max(abs(price - sl) * 1.5, min_distance_price)
-                else:
-                    tp = price - max(abs(sl - price) * 1.5, min_distance_price)
-                logger.info(f"TP ajustado dinámicamente para mantener riesgo-recompensa en {symbol}: TP={tp}")
+            # Ajuste numérico de SL/TP (compilado con numba si está disponible)
+            sl_in, tp_in = sl, tp
+            sl, tp, adjustments = _adjust_stops(order_type, price, sl, tp, min_distance_price, pow10)
+            # Sin ajustes (caso habitual) no se formatea ningún mensaje
+            if adjustments:
+                if adjustments & STOP_SL_DEFAULTED:
+                    logger.warning("SL ajustado para evitar valor negativo o nulo: %s para %s", sl, symbol)
+                if adjustments & STOP_SL_DISTANCE:
+                    logger.warning("SL ajustado a %s para cumplir distancia mínima en %s", sl, symbol)
+                if adjustments & STOP_TP_DEFAULTED:
+                    logger.warning("TP ajustado para evitar valor negativo o nulo: %s para %s", tp, symbol)
+                if adjustments & STOP_TP_DISTANCE:
+                    logger.warning("TP ajustado a %s para cumplir distancia mínima en %s", tp, symbol)
+                if adjustments & STOP_TP_RISK_REWARD:
+                    logger.info("TP ajustado dinámicamente para mantener riesgo-recompensa en %s: TP=%s", symbol, tp)
+                if adjustments & STOP_SL_FORCED:
+                    logger.error("SL era <= 0 tras todos los ajustes, forzado a %s para %s", sl, symbol)
+                if adjustments & STOP_TP_FORCED:
+                    logger.error("TP era <= 0 tras todos los ajustes, forzado a %s para %s", tp, symbol)
 
-            # Redondear a los dígitos correctos
-            sl = round(sl, digits)
-            tp = round(tp, digits)
-
-            # Chequeo final: nunca retornar stops negativos o cero
-            if sl <= 0:
-                sl = round(price * 0.90, digits) if order_type == 0 else round(price * 1.10, digits)
-                logger.error(f"SL era <= 0 tras todos los ajustes, forzado a {sl} para {symbol}")
-            if tp <= 0:
-                tp = round(price * 1.05, digits) if order_type == 0 else round(price * 0.95, digits)
-                logger.error(f"TP era <= 0 tras todos los ajustes, forzado a {tp} para {symbol}")
-
-            logger.info(f"Stops validados para {symbol}: SL={sl}, TP={tp} (distancia mínima: {min_distance_price})")
+            # INFO solo si los stops cambiaron respecto a los recibidos; si no, DEBUG
+            level = logging.INFO if (sl != sl_in or tp != tp_in) else logging.DEBUG
+            if logger.isEnabledFor(level):
+                logger.log(level, "Stops validados para %s: SL=%s, TP=%s (distancia mínima: %s)",
+                           symbol, sl, tp, min_distance_price)
             return sl, tp, True
             
         except Exception as e:
             logger.error(f"Error validando stops para {symbol}: {str(e)}")
             return sl, tp, False
             
-    def _determine_instrument_category(self, symbol: str, symbol_specs: dict) -> str:
+    def _get_stops_spec(self, symbol: str) -> Optional[StopsSpec]:
+        """
+        Datos de stops del símbolo, cacheados durante STOPS_SPEC_TTL_SECONDS
+        
+        Los símbolos del Market Watch se precargan al conectar (preload_stops_specs); el resto
+        se construye con la primera llamada a partir de get_symbol_info. Una entrada caducada
+        o descartada con invalidate_stops_spec se reconstruye con el stops level actual.
+        
+        Args:
+            symbol: Símbolo de trading
+        Returns:
+            StopsSpec o None si no hay información del símbolo
+        """
+        now = time.monotonic()
+        cached = self._stops_spec_cache.get(symbol)
+        if cached is not None and now - cached[0] < STOPS_SPEC_TTL_SECONDS:
+            self._stops_spec_stats[0] += 1
+            return cached[1]
+        self._stops_spec_stats[1] += 1
+        info = self.get_symbol_info(symbol)
+        if not info:
+            return None
+        spec = _build_stops_spec(symbol, info.get('digits', 5), info.get('point', 0.00001),
+                                 info.get('trade_stops_level', 0))
+        self._stops_spec_cache[symbol] = (now, spec)
+        return spec
+
+    def invalidate_stops_spec(self, symbol: str) -> None:
+        """
+        Descarta los datos de stops cacheados del símbolo (p. ej. tras TRADE_RETCODE_INVALID_STOPS)
+        
+        Args:
+            symbol: Símbolo de trading
+        """
+        self._stops_spec_cache.pop(symbol, None)
+        self._symbol_info_cache.pop(symbol, None)
+    
+    def preload_stops_specs(self) -> int:
+        """
+        Precarga los datos de stops de los símbolos visibles con una sola llamada a mt5.symbols_get()
+        
+        Returns:
+            Número de símbolos precargados
+        """
+        try:
+            symbols = mt5.symbols_get()
+        except Exception as e:
+            logger.error(f"Error precargando especificaciones de stops: {str(e)}")
+            return 0
+        if not symbols:
+            return 0
+        cache = self._stops_spec_cache
+        now = time.monotonic()
+        count = 0
+        for s in symbols:
+            if s.visible:
+                cache[s.name] = (now, _build_stops_spec(s.name, s.digits, s.point, s.trade_stops_level))
+                count += 1
+        logger.debug("Especificaciones de stops precargadas para %d símbolos", count)
+        return count
+    
+    def stops_spec_cache_info(self) -> Dict[str, int]:
+        """Estadísticas de la caché de especificaciones de stops: {'hits', 'misses', 'size'}"""
+        hits, misses = self._stops_spec_stats
+        return {'hits': hits, 'misses': misses, 'size': len(self._stops_spec_cache)}
+    
+    def _determine_instrument_category(self, symbol: str, symbol_specs: Dict) -> str:
         """
         Determina la categoría del instrumento basado en su símbolo y propiedades
         
         Args:
             symbol: Símbolo del instrumento
-            symbol_specs: Información del símbolo de MT5
+            symbol_specs: Información del símbolo como dict (formato de get_symbol_info)
             
         Returns:
             Categoría del instrumento: "forex", "index", "stock", "metal", "crypto", "unknown"
         """
         try:
-            # Determinar por path si está disponible
-            path = ''
-            
-            # Manejar diferentes tipos de entradas (dict o objeto)
-            if isinstance(symbol_specs, dict) and 'path' in symbol_specs:
-                path = str(symbol_specs['path']).lower()
-            elif hasattr(symbol_specs, 'path') and symbol_specs.path:
-                path = str(symbol_specs.path).lower()
-            
-            # Determinar categoría por path si disponible
-            if path:
-                if any(keyword in path for keyword in ['forex', 'currencies', 'fx', 'major', 'minor']):
-                    return 'forex'
-                elif any(keyword in path for keyword in ['indices', 'index', 'indice']):
-                    return 'index'
-                elif any(keyword in path for keyword in ['metals', 'commodities', 'xau', 'gold', 'xag']):
-                    return 'metal'
-                else:
-                    return 'unknown'
-            
-            # Determinar por patrones en el símbolo
-            symbol_upper = symbol.upper()
-            
-            # Detección de FOREX mejorada
-            forex_currencies = ['USD', 'EUR', 'JPY', 'GBP', 'AUD', 'NZD', 'CAD', 'CHF', 'CNY', 'MXN', 'SEK', 'NOK']
-            if len(symbol_upper) <= 8 and any(symbol_upper.startswith(curr) or symbol_upper.endswith(curr) for curr in forex_currencies):
-                # Verificar que tenga al menos dos códigos de moneda
-                if sum(1 for curr in forex_currencies if curr in symbol_upper) >= 2:
-                    return "forex"
-            
-            # Detección de metales más robusta
-            metal_patterns = ['XAU', 'GOLD', 'XAG', 'SILVER', 'PLAT', 'PLATINUM', 'COPPER', 'PALLADIUM', 'XPD', 'XPT']
-            if any(pattern in symbol_upper for pattern in metal_patterns):
-                return "metal"
-                
-            # Detección de índices más amplia
-            index_patterns = ['US30', 'SPX', 'SP500', 'NAS100', 'NDX', 'DAX', 'UK100', 'FTSE', 'CAC', 'IBEX', 'N225', 'HSI']
-            if any(pattern in symbol_upper for pattern in index_patterns):
-                return "index"
-                
-            # Detección de criptomonedas
-            crypto_patterns = ['BTC', 'ETH', 'LTC', 'XRP', 'DOGE', 'BCH', 'BNB', 'USDT']
-            if any(pattern in symbol_upper for pattern in crypto_patterns):
-                return "crypto"
-                
-            # Lógica adicional para símbolos específicos
-            if 'USD' in symbol_upper and len(symbol_upper) >= 3 and len(symbol_upper) <= 8:
-                return "forex"  # Probable par de divisas
-                
-            # Por defecto asumimos acciones si no se puede categorizar y parece tener formato de ticker
-            if len(symbol_upper) <= 5 and symbol_upper.isalpha():
-                return "stock"
-                
-            # Último recurso
-            return "unknown"
+            # Determinar por path si está disponible (get_symbol_info ya entrega un dict)
+            path = str(symbol_specs.get('path') or '').lower()
+            return _instrument_category(symbol, path)
             
         except Exception as e:
             logger.error(f"Error determinando categoría para {symbol}: {str(e)}")
@@ -1949,61 +2785,55 @@ class MT5Connector:
             float: Exposición total en la moneda de la cuenta
         """
         try:
-            positions = self.get_positions()
-            if not positions:
+            positions = self.get_positions_array()
+            if positions.size == 0:
                 return 0.0
 
-            total_risk = 0.0
-            for position in positions:
-                symbol = position.get('symbol', '')
-                volume = position.get('volume', 0.0)
-                entry_price = position.get('price_open', 0.0)
-                sl = position.get('sl', 0.0)
-                # Si no hay SL, no se puede calcular el riesgo
-                if not sl or sl <= 0 or entry_price <= 0:
-                    continue
-                symbol_info = self.get_symbol_info(symbol)
-                if not symbol_info:
-                    logger.warning(f"No se pudo obtener información para {symbol}")
-                    continue
-                contract_size = symbol_info.get('contract_size', 100000.0)
-                point = symbol_info.get('point', 0.0001)
-                digits = symbol_info.get('digits', 5)
-                pip_size = 0.01 if symbol.endswith('JPY') else 0.0001
-                sl_distance = abs(entry_price - sl)
-                sl_pips = sl_distance / pip_size
-                pip_value_per_lot = pip_size * contract_size
-                pip_value = symbol_info.get('tick_value', pip_value_per_lot)
-                risk = sl_pips * pip_value * volume
-                # Conversión a moneda de cuenta si es necesario
-                if symbol_info.get('currency_profit') != self.account_currency:
-                    conversion_pair = f"{symbol_info.get('currency_profit')}{self.account_currency}"
-                    alt_conversion_pair = f"{self.account_currency}{symbol_info.get('currency_profit')}"
-                    conversion_rate = 1.0
-                    conversion_tick = mt5.symbol_info_tick(conversion_pair)
-                    if conversion_tick:
-                        conversion_rate = conversion_tick.bid
-                    else:
-                        alt_conversion_tick = mt5.symbol_info_tick(alt_conversion_pair)
-                        if alt_conversion_tick and alt_conversion_tick.bid > 0:
-                            conversion_rate = 1.0 / alt_conversion_tick.bid
-                    risk *= conversion_rate
-                total_risk += risk
-            logger.info(f"Exposición total actual (riesgo real): {total_risk:.2f} {self.account_currency}")
+            # Si no hay SL, no se puede calcular el riesgo
+            with_sl = positions[(positions['sl'] > 0) & (positions['price_open'] > 0)]
+            if with_sl.size == 0:
+                total_risk = 0.0
+            else:
+                # Parámetros por símbolo distinto (una consulta por símbolo, no por posición)
+                symbols, inverse = np.unique(with_sl['symbol'], return_inverse=True)
+                pip_size = np.empty(len(symbols))
+                pip_value = np.empty(len(symbols))
+                conversion = np.empty(len(symbols))
+                conversion_rates: Dict[str, float] = {}
+                for i, symbol in enumerate(symbols.tolist()):
+                    symbol_info = self.get_symbol_info(symbol)
+                    if not symbol_info:
+                        logger.warning(f"No se pudo obtener información para {symbol}")
+                        pip_size[i] = pip_value[i] = conversion[i] = np.nan
+                        continue
+                    pip_size[i] = pip_factor(symbol, symbol_info.get('digits'), symbol_info.get('point'))
+                    pip_value[i] = symbol_info.get('tick_value', pip_size[i] * symbol_info.get('contract_size', 100000.0))
+                    # Conversión a moneda de cuenta si es necesario (un tick por divisa distinta)
+                    currency_profit = symbol_info.get('currency_profit')
+                    if currency_profit == self.account_currency:
+                        conversion[i] = 1.0
+                        continue
+                    if currency_profit not in conversion_rates:
+                        conversion_rate = 1.0
+                        conversion_tick = self._get_tick(f"{currency_profit}{self.account_currency}")
+                        if conversion_tick:
+                            conversion_rate = conversion_tick.bid
+                        else:
+                            alt_conversion_tick = self._get_tick(f"{self.account_currency}{currency_profit}")
+                            if alt_conversion_tick and alt_conversion_tick.bid > 0:
+                                conversion_rate = 1.0 / alt_conversion_tick.bid
+                        conversion_rates[currency_profit] = conversion_rate
+                    conversion[i] = conversion_rates[currency_profit]
+                
+                risks = (np.abs(with_sl['price_open'] - with_sl['sl']) / pip_size[inverse]
+                         * pip_value[inverse] * with_sl['volume'] * conversion[inverse])
+                total_risk = float(risks[np.isfinite(risks)].sum())
+            logger.info("Exposición total actual (riesgo real): %.2f %s", total_risk, self.account_currency)
             return total_risk
         except Exception as e:
             logger.error(f"Error calculando exposición total: {str(e)}")
             return 0.0
     
-    def adjust_stops(entry_price: float, sl: float, tp: float, min_distance: float) -> Tuple[float, float]:
-        if abs(sl - entry_price) < min_distance:
-            sl = entry_price - min_distance
-        if abs(tp - entry_price) < min_distance:
-            tp = entry_price + min_distance
-        if abs(tp - sl) / abs(entry_price - sl) < 1.5:  # Mantener riesgo-recompensa mínimo
-            tp = sl + abs(entry_price - sl) * 1.5
-        return sl, tp
-
     def get_symbol_leverage(self, symbol: str) -> float:
         """
         Retrieve the leverage for a given symbol.
@@ -2029,13 +2859,30 @@ class MT5Connector:
         """
         Propagate leverage information to the RiskManager.
 
+        Hace una sola llamada a mt5.symbols_get() y entrega todo el mapa
+        símbolo -> apalancamiento al RiskManager de una vez. Se usa la misma
+        regla que _symbol_leverage: apalancamiento del símbolo si el
+        terminal lo expone, si no el de la cuenta, y 100 como último recurso.
+
         Args:
             risk_manager: Instance of RiskManager.
         """
         try:
-            for symbol in self.get_all_symbols():
-                leverage = self.get_symbol_leverage(symbol)
-                risk_manager.update_symbol_leverage(symbol, leverage)
-                logger.info(f"Leverage for {symbol} propagated to RiskManager: {leverage}")
+            symbols = mt5.symbols_get()
+            if not symbols:
+                logger.warning("No symbols available to propagate leverage")
+                return
+
+            account_info = mt5.account_info()
+            account_leverage = float(getattr(account_info, 'leverage', 0) or 0)
+            default_leverage = account_leverage if account_leverage > 0 else 100.0
+
+            leverage_map = {}
+            for s in symbols:
+                leverage = getattr(s, 'leverage', 0) or 0
+                leverage_map[s.name] = float(leverage) if leverage > 0 else default_leverage
+
+            risk_manager.update_symbol_leverage_bulk(leverage_map)
+            logger.info(f"Leverage propagated to RiskManager for {len(leverage_map)} symbols")
         except Exception as e:
             logger.error(f"Error propagating leverage to RiskManager: {str(e)}")
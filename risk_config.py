@@ -6,7 +6,22 @@
 # RISK_MODE = "percent_margin"  # Arriesga un % del balance/margen
 # RISK_MODE = "fixed_usd"       # Arriesga un monto fijo en USD por operación
 
+from typing import NamedTuple
+
+__all__ = ("RISK_MODE", "FIXED_RISK_USD", "MAX_RISK_PER_TRADE", "RiskConfig", "CFG")
+
 RISK_MODE = "percent_margin"  # o "fixed_usd"
 FIXED_RISK_USD = 1.0     # Cambia este valor al monto deseado en USD
 # Porcentaje de riesgo por operación (para percent_margin)
-MAX_RISK_PER_TRADE = 0.02  # 2% por operación (ajustado para scalping/day trading)
\ No newline at end of file
+MAX_RISK_PER_TRADE = 0.02  # 2% por operación (ajustado para scalping/day trading)
+
+
+# --- No es necesario editar debajo de esta línea ---
+class RiskConfig(NamedTuple):
+    """Configuración de riesgo inmutable (ver risk_config_loader.get_risk_params)"""
+    mode: str           # "percent_margin" o "fixed_usd"
+    fixed_usd: float
+    max_pct: float
+
+
+CFG = RiskConfig(RISK_MODE, float(FIXED_RISK_USD), float(MAX_RISK_PER_TRADE))
@@ -0,0 +1,61 @@
+# risk_config_loader.py
+# Lectura en caliente de risk_config.py para Mr. Cashondo.
+# Los valores se cachean y solo se vuelven a leer cuando cambia la fecha de modificación del archivo,
+# así editar risk_config.py surte efecto en la siguiente operación sin reiniciar el bot
+# y sin re-ejecutar el módulo en cada decisión.
+
+import logging
+import os
+import threading
+from typing import Optional
+
+import risk_config
+from risk_config import RiskConfig
+
+logger = logging.getLogger(__name__)
+
+_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "risk_config.py")
+_lock = threading.Lock()
+# Configuración del import inicial
+_cached: RiskConfig = risk_config.CFG
+_mtime: Optional[int] = None
+
+
+def get_risk_params() -> RiskConfig:
+    """
+    Devuelve la configuración de riesgo vigente.
+
+    Solo hace un os.stat() por llamada; el archivo se vuelve a ejecutar únicamente si su
+    mtime cambió. Si la nueva versión no se puede leer (p. ej. guardada a medias), se
+    mantienen los últimos valores válidos.
+
+    Returns:
+        RiskConfig (mode, fixed_usd, max_pct); se puede desempaquetar como tupla
+    """
+    global _cached, _mtime
+    try:
+        mtime = os.stat(_PATH).st_mtime_ns
+    except OSError:
+        return _cached
+    if mtime == _mtime:
+        return _cached
+    with _lock:
+        if mtime == _mtime:
+            return _cached
+        try:
+            with open(_PATH, encoding="utf-8") as f:
+                source = f.read()
+            namespace: dict = {}
+            exec(compile(source, _PATH, "exec"), namespace)
+            _cached = RiskConfig(
+                namespace.get("RISK_MODE", _cached.mode),
+                float(namespace.get("FIXED_RISK_USD", _cached.fixed_usd)),
+                float(namespace.get("MAX_RISK_PER_TRADE", _cached.max_pct)),
+            )
+            if _mtime is not None:
+                logger.info(f"[RISK] risk_config.py recargado: modo={_cached.mode}, "
+                            f"fixed_usd={_cached.fixed_usd}, max_risk={_cached.max_pct}")
+        except Exception as e:
+            logger.warning(f"[RISK] No se pudo recargar risk_config.py, se mantienen los valores anteriores: {e}")
+        _mtime = mtime
+    return _cached
@@ -5,18 +5,25 @@ Handles position sizing, risk calculation, and trade management
 import logging
 import math
 import numpy as np
-from typing import Dict, Optional, Tuple
+from typing import Dict, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+try:
+    from numba import njit
+except ImportError:
+    # numba es opcional: sin él se usa la versión en Python puro
+    njit = None
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    # Nivel configurable por entorno (LOG_LEVEL=WARNING en producción evita formatear los INFO)
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler('risk_manager.log'),
@@ -25,6 +32,102 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _dynamic_sl_tp_py(closes: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                      entry: float, atr: float, is_buy: bool) -> Tuple[float, float]:
+    """
+    Núcleo de RiskManager.calculate_dynamic_tp_sl en una sola pasada por los fractales
+    
+    El nivel más cercano a entry es el swing low más alto por debajo y el swing high más
+    bajo por encima, así que se mantiene el mejor valor sin construir listas intermedias.
+    
+    Args:
+        closes: Precios de cierre (float64)
+        highs: Índices de swing highs (int64)
+        lows: Índices de swing lows (int64)
+        entry: Precio de entrada
+        atr: ATR actual
+        is_buy: True para BUY, False para SELL
+    Returns:
+        (stop_loss, take_profit)
+    """
+    # Swing low más cercano por debajo de entry
+    found_below = False
+    below = 0.0
+    for k in range(lows.shape[0]):
+        value = closes[lows[k]]
+        if value < entry and (not found_below or value > below):
+            below = value
+            found_below = True
+    # Swing high más cercano por encima de entry
+    found_above = False
+    above = 0.0
+    for k in range(highs.shape[0]):
+        value = closes[highs[k]]
+        if value > entry and (not found_above or value < above):
+            above = value
+            found_above = True
+    if is_buy:
+        # SL: último swing low; TP: resistencia más cercana si no está a más de 3*ATR
+        sl_atr = entry - 1.2 * atr
+        stop_loss = max(below, sl_atr) if found_below else sl_atr
+        if found_above and abs(above - entry) <= 3 * atr:
+            take_profit = above
+        else:
+            take_profit = entry + 2 * atr
+    else:
+        # SL: último swing high; TP: soporte más cercano si no está a más de 3*ATR
+        sl_atr = entry + 1.2 * atr
+        stop_loss = min(above, sl_atr) if found_above else sl_atr
+        if found_below and abs(below - entry) <= 3 * atr:
+            take_profit = below
+        else:
+            take_profit = entry - 2 * atr
+    return stop_loss, take_profit
+
+_dynamic_sl_tp = njit(cache=True)(_dynamic_sl_tp_py) if njit is not None else _dynamic_sl_tp_py
+
+# Entradas (series de cierres distintas) que guarda RiskManager.bar_features
+BAR_FEATURES_CACHE_SIZE = 256
+
+# Patrones de get_exposure_limit (símbolo en mayúsculas)
+_EXPOSURE_METALS = ('XAU', 'XAG', 'GOLD', 'SILVER', 'PLATINUM', 'PALLADIUM')
+_EXPOSURE_FX_CURRENCIES = ('EUR', 'USD', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'NZD')
+
+@lru_cache(maxsize=1024)
+def _exposure_limit_pct(symbol: str) -> float:
+    """Fracción del balance permitida como exposición según el tipo de instrumento"""
+    if any(x in symbol for x in _EXPOSURE_METALS):
+        return 0.25  # Metales
+    if any(x in symbol for x in _EXPOSURE_FX_CURRENCIES):
+        return 0.40  # Majors FOREX
+    return 0.20  # Índices u otros
+
+class PipProfile(NamedTuple):
+    """Tamaño de pip y valor de pip de emergencia de un símbolo (ver _pip_profile)"""
+    pip_size: float
+    fallback_pip_value: float
+
+@lru_cache(maxsize=2048)
+def _pip_profile(symbol: str) -> PipProfile:
+    """Tamaño de pip según el símbolo y valor de pip a usar si el broker no informa ninguno"""
+    if 'JPY' in symbol:
+        return PipProfile(0.01, 1000.0)
+    if any(metal in symbol for metal in ('XAU', 'XAG')):
+        return PipProfile(0.1, 100.0)
+    if any(metal in symbol for metal in ('GOLD', 'SILVER')):
+        return PipProfile(0.1, 10.0)
+    return PipProfile(0.0001, 10.0)
+
+@dataclass(frozen=True, slots=True)
+class BarFeatures:
+    """Fractales y EMA de una serie de cierres (ver RiskManager.bar_features)"""
+    close_prices: np.ndarray  # float64 contiguo
+    highs: np.ndarray  # índices de swing highs (int64)
+    lows: np.ndarray  # índices de swing lows (int64)
+    ema: np.ndarray  # vacío si hay menos cierres que el periodo
+    high_closes: np.ndarray  # cierres en los swing highs
+    low_closes: np.ndarray  # cierres en los swing lows
+
 @dataclass
 class RiskParameters:
     """Risk management parameters optimized for SFO strategy"""
@@ -71,14 +174,11 @@ class RiskManager:
         try:
             balance = account_info.get('balance', 0)
             symbol = symbol_info.get('symbol', '').upper()
-            if any(x in symbol for x in ['XAU', 'XAG', 'GOLD', 'SILVER', 'PLATINUM', 'PALLADIUM']):
-                limit_pct = 0.25  # Metales
-            elif any(x in symbol for x in ['EUR', 'USD', 'GBP', 'JPY', 'AUD', 'CAD', 'CHF', 'NZD']):
-                limit_pct = 0.40  # Majors FOREX
-            else:
-                limit_pct = 0.20  # Índices u otros
+            limit_pct = _exposure_limit_pct(symbol)
             exposure_limit = balance * limit_pct
-            logger.info(f"[RISK] Exposure limit calculado: {exposure_limit} (balance={balance}, symbol={symbol}, limit_pct={limit_pct})")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[RISK] Exposure limit calculado: %s (balance=%s, symbol=%s, limit_pct=%s)",
+                            exposure_limit, balance, symbol, limit_pct)
             return exposure_limit
         except Exception as e:
             logger.error(f"[RISK] Error calculando exposure limit: {str(e)}")
@@ -101,8 +201,10 @@ class RiskManager:
                 leverage = 100  # Valor por defecto si no está disponible
             margin = (contract_size * volume * entry_price) / leverage
             if margin <= 0:
-                logger.warning(f"[RISK] Margin calculado <= 0 para {symbol}. contract_size={contract_size}, volume={volume}, entry_price={entry_price}, leverage={leverage}")
-            logger.info(f"[RISK] Margin requerido para {symbol}: {margin}")
+                logger.warning("[RISK] Margin calculado <= 0 para %s. contract_size=%s, volume=%s, entry_price=%s, leverage=%s",
+                               symbol, contract_size, volume, entry_price, leverage)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[RISK] Margin requerido para %s: %s", symbol, margin)
             return margin
         except Exception as e:
             logger.error(f"[RISK] Error calculando margen requerido para {symbol}: {str(e)}")
@@ -195,12 +297,12 @@ class RiskManager:
         Returns:
             (bool, str): True si se puede abrir, False y motivo si no.
         """
-        count = self.open_positions_by_symbol.get(symbol, 0)
-        if count >= 1:
-            logger.warning(f"[RISK] Rechazo apertura: Ya existe una posición abierta para {symbol} (máximo 1 permitido)")
+        if symbol in self.open_positions_by_symbol:
+            logger.warning("[RISK] Rechazo apertura: Ya existe una posición abierta para %s (máximo 1 permitido)", symbol)
             return False, f"Ya existe una posición abierta para {symbol} (máximo 1 permitido)"
         if self.positions_count >= self.risk_params.max_open_positions:
-            logger.warning(f"[RISK] Rechazo apertura: Se alcanzó el máximo global de posiciones abiertas ({self.risk_params.max_open_positions})")
+            logger.warning("[RISK] Rechazo apertura: Se alcanzó el máximo global de posiciones abiertas (%s)",
+                           self.risk_params.max_open_positions)
             return False, f"Se alcanzó el máximo global de posiciones abiertas ({self.risk_params.max_open_positions})"
         return True, "Permiso concedido"
 
@@ -209,25 +311,23 @@ class RiskManager:
         Registra la apertura de una posición para el símbolo dado.
         Limita a 1 posición por símbolo.
         """
-        if self.open_positions_by_symbol.get(symbol, 0) >= 1:
-            logger.warning(f"[RISK] Intento de abrir más de una posición en {symbol}. Operación bloqueada.")
+        if symbol in self.open_positions_by_symbol:
+            logger.warning("[RISK] Intento de abrir más de una posición en %s. Operación bloqueada.", symbol)
             return False
         self.open_positions_by_symbol[symbol] = 1
         self.positions_count += 1
-        logger.info(f"[RISK] Posición registrada para {symbol}. Total posiciones abiertas: {self.positions_count}")
+        logger.info("[RISK] Posición registrada para %s. Total posiciones abiertas: %s", symbol, self.positions_count)
         return True
 
     def register_close_position(self, symbol: str):
         """
         Registra el cierre de una posición para el símbolo dado.
         """
-        if self.open_positions_by_symbol.get(symbol, 0) > 0:
-            self.open_positions_by_symbol[symbol] = 0
+        if self.open_positions_by_symbol.pop(symbol, 0) > 0:
             self.positions_count = max(0, self.positions_count - 1)
-            logger.info(f"[RISK] Posición cerrada para {symbol}. Total posiciones abiertas: {self.positions_count}")
+            logger.info("[RISK] Posición cerrada para %s. Total posiciones abiertas: %s", symbol, self.positions_count)
         else:
-            logger.warning(f"[RISK] Intento de cerrar posición inexistente en {symbol}.")
-        self.positions_count = max(0, self.positions_count - 1)
+            logger.warning("[RISK] Intento de cerrar posición inexistente en %s.", symbol)
 
     def calculate_sl_tp(self, entry_price: float, atr: float, signal_type: str) -> Tuple[float, float]:
         """
@@ -266,7 +366,8 @@ class RiskManager:
                                    broker_api,
                                    r_partial: float = 1.0,
                                    r_trailing: float = 1.5,
-                                   trailing_period: int = 20) -> None:
+                                   trailing_period: int = 20,
+                                   features: Optional['BarFeatures'] = None) -> None:
         """
         Gestiona el cierre parcial y trailing stop para una posición abierta.
         - Si el precio alcanza el TP parcial (por defecto 1R), cierra la mitad de la posición.
@@ -287,6 +388,8 @@ class RiskManager:
             r_partial (float): Multiplicador de R para TP parcial (por defecto 1.0).
             r_trailing (float): Multiplicador de R para activar trailing (por defecto 1.0).
             trailing_period (int): Periodo para el cálculo de trailing estructural.
+            features (BarFeatures): Fractales y EMA de esta vela, si el llamador ya los calculó
+                (ver bar_features); se comparten con calculate_dynamic_tp_sl.
         """
         # 1. Cierre parcial si corresponde (TP1 = 1R)
         r1 = abs(entry_price - stop_loss)
@@ -297,24 +400,26 @@ class RiskManager:
                 partial_vol, runner_vol = self.split_position_for_partial(volume)
                 if broker_api.is_partial_close_allowed(position_id):
                     broker_api.close_partial(position_id, partial_vol)
-                    logger.info(f"[PARTIAL CLOSE] Posición {position_id}: Cerrada mitad ({partial_vol}) en TP1 {current_price:.5f}")
+                    logger.info("[PARTIAL CLOSE] Posición %s: Cerrada mitad (%s) en TP1 %.5f", position_id, partial_vol, current_price)
                     # Mover SL a break even
                     break_even = entry_price
                     broker_api.modify_stop_loss(position_id, break_even)
-                    logger.info(f"[BREAKEVEN] SL movido a entrada para runner de posición {position_id}")
+                    logger.info("[BREAKEVEN] SL movido a entrada para runner de posición %s", position_id)
 
         # 2. Trailing stop para el runner (a partir de 1.5R)
         r15 = 1.5 * abs(entry_price - stop_loss)
         tp_trailing = entry_price + r15 if signal_type == 'BUY' else entry_price - r15
         if (signal_type == 'BUY' and current_price >= tp_trailing) or (signal_type == 'SELL' and current_price <= tp_trailing):
-            trailing_stop = self.calculate_trailing_stop(
+            # calculate_trailing_stop es el trailing por ATR (ver más abajo): aquí va el estructural
+            trailing_stop = self.calculate_trailing_stop_structural(
                 close_prices=close_prices,
                 entry_price=entry_price,
                 current_price=current_price,
                 stop_loss=stop_loss,
                 signal_type=signal_type,
                 atr=atr,
-                period=trailing_period
+                period=trailing_period,
+                features=features
             )
             if trailing_stop is not None:
                 broker_api.modify_stop_loss(position_id, trailing_stop)
@@ -339,43 +444,20 @@ class RiskManager:
     # - close_position(position_id)
     #
     # Esto asegura la integración perfecta de la lógica de cierre parcial y trailing.
-    def calculate_dynamic_tp_sl(self, close_prices: np.ndarray, entry_price: float, signal_type: str, atr: float) -> Tuple[float, float]:
+    def calculate_dynamic_tp_sl(self, close_prices: np.ndarray, entry_price: float, signal_type: str, atr: float,
+                                features: Optional['BarFeatures'] = None) -> Tuple[float, float]:
         """
         Calcula SL y TP dinámicos usando fractales y estructura de mercado.
         El TP prioriza el swing high/low relevante (resistencia/soporte) más cercano.
         Si no hay, usa múltiplo de ATR.
+        Si se pasa features (ver bar_features), se reutilizan sus fractales en lugar de recalcularlos.
         """
-        from signal_generator import TechnicalIndicators
-        highs, lows = TechnicalIndicators.find_fractals(close_prices)
-        if signal_type == 'BUY':
-            # SL: último swing low
-            swing_lows = [close_prices[i] for i in lows if close_prices[i] < entry_price]
-            sl_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_lows)
-            sl_atr = entry_price - 1.2 * atr
-            stop_loss = max(sl_fractal, sl_atr) if swing_lows else sl_atr
-            # TP: resistencia/swing high más cercano por encima de entry
-            swing_highs = [close_prices[i] for i in highs if close_prices[i] > entry_price]
-            tp_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_highs)
-            tp_atr = entry_price + 2 * atr
-            # Si el swing high está demasiado lejos (>3*ATR), usar tp_atr
-            if swing_highs and abs(tp_fractal - entry_price) <= 3 * atr:
-                take_profit = tp_fractal
-            else:
-                take_profit = tp_atr
-        else:
-            # SL: último swing high
-            swing_highs = [close_prices[i] for i in highs if close_prices[i] > entry_price]
-            sl_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_highs)
-            sl_atr = entry_price + 1.2 * atr
-            stop_loss = min(sl_fractal, sl_atr) if swing_highs else sl_atr
-            # TP: soporte/swing low más cercano por debajo de entry
-            swing_lows = [close_prices[i] for i in lows if close_prices[i] < entry_price]
-            tp_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_lows)
-            tp_atr = entry_price - 2 * atr
-            if swing_lows and abs(tp_fractal - entry_price) <= 3 * atr:
-                take_profit = tp_fractal
-            else:
-                take_profit = tp_atr
+        if features is None:
+            features = self.bar_features(close_prices)
+        stop_loss, take_profit = _dynamic_sl_tp(
+            features.close_prices, features.highs, features.lows,
+            float(entry_price), float(atr), signal_type == 'BUY'
+        )
         return stop_loss, take_profit
 
     def calculate_trailing_stop_structural(
@@ -386,7 +468,8 @@ class RiskManager:
         stop_loss: float,
         signal_type: str,
         atr: float,
-        period: int = 20
+        period: int = 20,
+        features: Optional['BarFeatures'] = None
     ) -> float:
         """
         Calcula el nivel de trailing stop usando fractales recientes o EMA20.
@@ -399,37 +482,90 @@ class RiskManager:
             signal_type (str): 'BUY' o 'SELL'.
             atr (float): Valor actual del ATR.
             period (int): Ventana para buscar fractales y calcular EMA.
+            features (BarFeatures): Fractales y EMA ya calculados para esta vela (opcional).
         Returns:
             float: Nivel sugerido para el trailing stop, o None si no corresponde moverlo.
         """
-        from signal_generator import TechnicalIndicators
-        highs, lows = TechnicalIndicators.find_fractals(close_prices)
-        closes_np = np.array(close_prices)
-        ema = TechnicalIndicators.ema(closes_np, period)
         risk = abs(entry_price - stop_loss)
+        # Solo trail si el precio avanzó al menos 1R (se comprueba antes de calcular fractales y EMA)
         if signal_type == 'BUY':
-            # Solo trail si el precio avanzó al menos 1R
             if current_price < entry_price + risk:
                 return None
+        elif current_price > entry_price - risk:
+            return None
+        if features is None:
+            features = self.bar_features(close_prices, period)
+        trailing_ema = features.ema[-1] if len(features.ema) > 0 else None
+        low_values = features.low_closes
+        high_values = features.high_closes
+        if signal_type == 'BUY':
             # Buscar el swing low más reciente por debajo del precio actual
-            swing_lows = [close_prices[i] for i in lows if close_prices[i] < current_price]
-            trailing_fractal = TechnicalIndicators.find_nearest_level(current_price, swing_lows) if swing_lows else None
-            trailing_ema = ema[-1] if len(ema) > 0 else None
+            # (el más cercano por debajo es el mayor de ellos)
+            swing_lows = low_values[low_values < current_price]
+            trailing_fractal = swing_lows.max() if swing_lows.size else None
             # El trailing más conservador (más alto)
-            trailing_stop = max(filter(lambda x: x is not None, [trailing_fractal, trailing_ema, entry_price + 0.1 * risk]))
+            trailing_stop = entry_price + 0.1 * risk
+            if trailing_fractal is not None and trailing_fractal > trailing_stop:
+                trailing_stop = trailing_fractal
+            if trailing_ema is not None and trailing_ema > trailing_stop:
+                trailing_stop = trailing_ema
             # Nunca bajar el SL por debajo del entry
             trailing_stop = max(trailing_stop, entry_price)
             return trailing_stop if trailing_stop > stop_loss else None
         else:
-            if current_price > entry_price - risk:
-                return None
-            swing_highs = [close_prices[i] for i in highs if close_prices[i] > current_price]
-            trailing_fractal = TechnicalIndicators.find_nearest_level(current_price, swing_highs) if swing_highs else None
-            trailing_ema = ema[-1] if len(ema) > 0 else None
-            trailing_stop = min(filter(lambda x: x is not None, [trailing_fractal, trailing_ema, entry_price - 0.1 * risk]))
+            # Swing high más cercano por encima del precio actual (el menor de ellos)
+            swing_highs = high_values[high_values > current_price]
+            trailing_fractal = swing_highs.min() if swing_highs.size else None
+            trailing_stop = entry_price - 0.1 * risk
+            if trailing_fractal is not None and trailing_fractal < trailing_stop:
+                trailing_stop = trailing_fractal
+            if trailing_ema is not None and trailing_ema < trailing_stop:
+                trailing_stop = trailing_ema
             trailing_stop = min(trailing_stop, entry_price)
             return trailing_stop if trailing_stop < stop_loss else None
 
+    def bar_features(self, close_prices: np.ndarray, period: int = 20) -> 'BarFeatures':
+        """
+        Fractales y EMA de una serie de cierres, calculados una vez por vela
+        
+        calculate_dynamic_tp_sl y calculate_trailing_stop_structural comparten este resultado
+        (se les puede pasar con features=...). Dentro de una misma vela se repiten las llamadas
+        con la misma serie, así que se memoriza con una huella O(1): (número de velas, primer
+        cierre, último cierre, periodo). Una vela nueva desplaza la ventana y cambia el primer
+        cierre; una vela en formación o reemplazada cambia el último.
+        
+        Args:
+            close_prices: Precios de cierre
+            period: Periodo de la EMA
+        Returns:
+            BarFeatures compartido entre llamadas; no modificar sus arrays
+        """
+        closes_np = np.ascontiguousarray(close_prices, dtype=np.float64)
+        n = closes_np.shape[0]
+        key = (n, closes_np[0], closes_np[-1], period) if n else (0, period)
+        cache = self._bar_features_cache
+        features = cache.pop(key, None)
+        if features is None:
+            from signal_generator import TechnicalIndicators
+            highs, lows = TechnicalIndicators.find_fractals(closes_np)
+            highs = np.asarray(highs, dtype=np.int64)
+            lows = np.asarray(lows, dtype=np.int64)
+            features = BarFeatures(
+                close_prices=closes_np,
+                highs=highs,
+                lows=lows,
+                # Con menos velas que el periodo no hay EMA (calculate_ema lanzaría ValueError)
+                ema=(np.asarray(TechnicalIndicators.ema(closes_np, period)) if n >= period
+                     else np.empty(0, dtype=np.float64)),
+                high_closes=closes_np[highs],
+                low_closes=closes_np[lows],
+            )
+            if len(cache) >= BAR_FEATURES_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+        # Reinsertar al final: el primero del dict es siempre el menos usado recientemente
+        cache[key] = features
+        return features
+
     def calculate_partial_tp(
         self,
         entry_price: float,
@@ -455,19 +591,6 @@ class RiskManager:
         else:
             return entry_price - r_multiple * r
 
-    def calculate_trailing_stop(self, close_prices: np.ndarray, entry_price: float, current_price: float, stop_loss: float, signal_type: str, atr: float, period: int = 20) -> float:
-        """
-        Wrapper para trailing estructural. Devuelve el nuevo SL sugerido o None si no corresponde moverlo.
-        """
-        return self.calculate_trailing_stop_structural(
-            close_prices=close_prices,
-            entry_price=entry_price,
-            current_price=current_price,
-            stop_loss=stop_loss,
-            signal_type=signal_type,
-            atr=atr,
-            period=period
-        )
     def should_take_partial_profit(self, entry_price: float, stop_loss: float, current_price: float, signal_type: str, r_multiple: float = 1.0) -> bool:
         """
         Determina si se debe tomar ganancia parcial (por ejemplo, en 1R o 1.5R).
@@ -494,6 +617,38 @@ class RiskManager:
             return entry_price + r_multiple * r
         else:
             return entry_price - r_multiple * r
+
+    def compute_all_levels(self, entry_prices: np.ndarray, stop_losses: np.ndarray, atrs: np.ndarray,
+                           is_buy: np.ndarray, r_multiple: float = 1.0) -> Dict[str, np.ndarray]:
+        """
+        Versión por lotes de calculate_sl_tp, calculate_partial_tp y calculate_break_even
+        para todas las posiciones abiertas (un array por campo, una fila por posición).
+        Args:
+            entry_prices: Precios de entrada
+            stop_losses: Stop loss actuales (para R)
+            atrs: ATR actual de cada posición (> 0)
+            is_buy: True para BUY, False para SELL
+            r_multiple: Multiplicador de R para TP parcial y break-even
+        Returns:
+            Dict con arrays 'atr_stop_loss', 'atr_take_profit', 'partial_tp' y 'break_even'
+        """
+        entry = np.asarray(entry_prices, dtype=np.float64)
+        sl = np.asarray(stop_losses, dtype=np.float64)
+        atr = np.asarray(atrs, dtype=np.float64)
+        sign = np.where(np.asarray(is_buy, dtype=bool), 1.0, -1.0)
+        params = self.risk_params
+        # SL/TP por ATR con ratio mínimo (calculate_sl_tp)
+        sl_dist = params.sl_atr_multiplier * atr
+        tp_dist = np.maximum(params.tp_atr_multiplier * atr, sl_dist * params.min_risk_reward_ratio)
+        # TP parcial y break-even a r_multiple * R de la entrada (misma fórmula en ambos)
+        r_level = entry + sign * (r_multiple * np.abs(entry - sl))
+        return {
+            'atr_stop_loss': entry - sign * sl_dist,
+            'atr_take_profit': entry + sign * tp_dist,
+            'partial_tp': r_level,
+            'break_even': r_level.copy(),
+        }
+
     def calculate_position_size_fixed_usd(self, symbol: str, entry_price: float, stop_loss: float,
                                          symbol_info: Dict, fixed_risk_usd: float) -> Optional[PositionSize]:
         """
@@ -517,13 +672,9 @@ class RiskManager:
                 stop_loss = entry_price - emergency_distance
                 sl_distance = emergency_distance
             contract_size = symbol_info.get('contract_size', 100000.0)
-            # Determinar pip_size según el símbolo
-            if 'JPY' in symbol:
-                pip_size = 0.01
-            elif any(metal in symbol for metal in ['XAU', 'XAG', 'GOLD', 'SILVER']):
-                pip_size = 0.1
-            else:
-                pip_size = 0.0001
+            # Determinar pip_size según el símbolo (memorizado por símbolo)
+            profile = _pip_profile(symbol)
+            pip_size = profile.pip_size
             if sl_distance <= 0:
                 sl_distance = pip_size * 10
                 logger.warning(f"[POSITION SIZE USD] sl_distance era 0, ajustado a {sl_distance}")
@@ -535,12 +686,7 @@ class RiskManager:
             else:
                 pip_value = pip_value_per_lot
             if pip_value <= 0:
-                if 'JPY' in symbol:
-                    pip_value = 1000.0
-                elif any(metal in symbol for metal in ['XAU', 'XAG']):
-                    pip_value = 100.0
-                else:
-                    pip_value = 10.0
+                pip_value = profile.fallback_pip_value
                 logger.warning(f"[POSITION SIZE USD] pip_value era 0, usando fallback: {pip_value}")
             if sl_pips <= 0:
                 sl_pips = 10.0
@@ -884,8 +1030,34 @@ class RiskManager:
         self.daily_pnl = 0.0
         self.daily_trades = 0
         self.positions_count = 0
+        # Dict[str, int]: símbolo -> posiciones abiertas (solo símbolos con posición; ver register_open_position)
+        self.open_positions_by_symbol: Dict[str, int] = {}
+        # Fractales y EMA por serie de cierres (ver bar_features), en orden de uso
+        self._bar_features_cache: Dict[tuple, BarFeatures] = {}
         self.symbol_leverage = {}  # New attribute to store symbol-specific leverage
 
+    def update_symbol_leverage(self, symbol: str, leverage: float) -> None:
+        """
+        Registra el apalancamiento de un símbolo.
+
+        Args:
+            symbol: Símbolo de trading
+            leverage: Apalancamiento (se ignora si no es positivo)
+        """
+        if leverage and leverage > 0:
+            self.symbol_leverage[symbol] = float(leverage)
+
+    def update_symbol_leverage_bulk(self, leverage_map: Dict[str, float]) -> None:
+        """
+        Registra el apalancamiento de muchos símbolos en una sola actualización.
+
+        Args:
+            leverage_map: Diccionario símbolo -> apalancamiento
+        """
+        self.symbol_leverage.update(
+            {symbol: float(lev) for symbol, lev in leverage_map.items() if lev and lev > 0}
+        )
+
     def calculate_position_size(self, symbol: str, entry_price: float, stop_loss: float, 
                                account_balance: float, symbol_info: Dict, free_margin: float = None, 
                                take_profit: float = None, signal_type: str = None) -> Optional[PositionSize]:
@@ -894,14 +1066,15 @@ class RiskManager:
         Si el modo es 'fixed_usd', usa el monto fijo configurado en risk_config.py.
         Si el modo es 'percent_margin', usa el cálculo clásico (1% del margen disponible).
         """
-        from risk_config import RISK_MODE, FIXED_RISK_USD
-        if RISK_MODE == "fixed_usd":
+        from risk_config_loader import get_risk_params
+        risk_mode, fixed_risk_usd, _ = get_risk_params()
+        if risk_mode == "fixed_usd":
             return self.calculate_position_size_fixed_usd(
                 symbol=symbol,
                 entry_price=entry_price,
                 stop_loss=stop_loss,
                 symbol_info=symbol_info,
-                fixed_risk_usd=FIXED_RISK_USD
+                fixed_risk_usd=fixed_risk_usd
             )
         # --- MODO CLÁSICO: porcentaje de margen ---
         try:
@@ -1322,6 +1495,11 @@ class RiskManager:
             self.positions_count -= 1
         logger.info(f"Open positions: {self.positions_count}")
     
+    def reset_positions(self) -> None:
+        """Olvida todas las posiciones abiertas (contador global y registro por símbolo)"""
+        self.positions_count = 0
+        self.open_positions_by_symbol.clear()
+    
     def reset_daily_stats(self) -> None:
         """Reset daily statistics (call at start of new trading day)"""
         self.daily_pnl = 0.0
@@ -571,7 +571,6 @@ Estas reglas buscan evitar entradas débiles y operar solo en condiciones óptim
 """
 
 import numpy as np
-import pandas as pd
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
@@ -723,6 +722,7 @@ class TechnicalIndicators:
     @staticmethod
     def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
         # Si tienes un módulo externo para ATR, usa aquí. Si no, usa la implementación previa.
+        import pandas as pd
         tr = np.maximum(high[1:] - low[1:], np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1]))
         atr = pd.Series(tr).rolling(window=period).mean().values
         atr = np.concatenate([np.full(period, np.nan), atr])
@@ -738,10 +738,12 @@ class TechnicalIndicators:
         close = np.array(market_data.close)
         high = np.array(market_data.high)
         low = np.array(market_data.low)
+        # Reutilizar las EMA calculadas junto con la descarga (get_market_data_with_features) si existen
+        precomputed_ema = getattr(market_data, 'ema', None) or {}
         indicators = {
-            'ema_20': calculate_ema(close, 20),
-            'ema_50': calculate_ema(close, 50),
-            'ema_200': calculate_ema(close, 200),
+            'ema_20': precomputed_ema[20] if 20 in precomputed_ema else calculate_ema(close, 20),
+            'ema_50': precomputed_ema[50] if 50 in precomputed_ema else calculate_ema(close, 50),
+            'ema_200': precomputed_ema[200] if 200 in precomputed_ema else calculate_ema(close, 200),
             'rsi': calculate_rsi(close, 14),
             'atr': TechnicalIndicators.atr(high, low, close, 14),
             'adx': TechnicalIndicators.adx(high, low, close, 14),
@@ -1267,13 +1269,19 @@ class SignalGenerator:
             logger.warning("No symbols to scan")
             return signals
         logger.info(f"[SCAN START] Scanning {len(self.symbols)} symbols: {self.symbols}")
+        tradeable_symbols = []
         for symbol in self.symbols:
             if not self.is_symbol_tradeable(symbol):
                 logger.info(f"[SKIP] {symbol} - not tradeable")
                 continue
+            tradeable_symbols.append(symbol)
+        # Descargar todos los datos primero (con la caché de velas del conector) y analizar después
+        all_market_data = mt5_connector.get_market_data_many(tradeable_symbols, timeframes, 500,
+                                                             ema_periods=(20, 50, 200))
+        for symbol in tradeable_symbols:
             for timeframe in timeframes:
                 try:
-                    market_data = mt5_connector.get_market_data(symbol, timeframe, 500)
+                    market_data = all_market_data.get((symbol, timeframe))
                     if market_data is None:
                         logger.info(f"[NO DATA] No market data for {symbol} {timeframe}")
                         continue
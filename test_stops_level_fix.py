@@ -40,8 +40,35 @@ def test_stops_level_fix():
         print(f"❌ Error during testing: {str(e)}")
         return False
 
+def test_adjust_stops_kernel():
+    """Test the module-level SL/TP adjustment kernel used by validate_and_adjust_stops"""
+    print("🔧 Testing SL/TP adjustment kernel...")
+    from mt5_connector import _adjust_stops, STOP_SL_DISTANCE, STOP_TP_DEFAULTED
+    
+    # Stops válidos: sin ajustes
+    sl, tp, adjustments = _adjust_stops(0, 1.10000, 1.09000, 1.12000, 0.0010, 1e5)
+    assert (sl, tp, adjustments) == (1.09, 1.12, 0)
+    
+    # Compra con SL demasiado cerca y sin TP: SL a la distancia mínima y TP con ratio 1.5
+    sl, tp, adjustments = _adjust_stops(0, 1.10000, 1.09950, 0.0, 0.0010, 1e5)
+    assert (sl, tp) == (1.099, 1.1015)
+    assert adjustments & STOP_SL_DISTANCE and adjustments & STOP_TP_DEFAULTED
+    
+    # Venta: SL por encima y TP por debajo del precio
+    sl, tp, _ = _adjust_stops(1, 150.000, 149.000, 151.000, 0.10, 1e3)
+    assert sl > 150.0 > tp
+    
+    print("✅ SL/TP adjustment kernel behaves as expected")
+
 if __name__ == "__main__":
     success = test_stops_level_fix()
+    if success:
+        # Las aserciones del kernel deben fallar bajo pytest; aquí solo se informan
+        try:
+            test_adjust_stops_kernel()
+        except AssertionError as e:
+            print(f"❌ SL/TP adjustment kernel check failed: {e!r}")
+            success = False
     if success:
         print("\n✨ Fix verification completed successfully!")
     else:
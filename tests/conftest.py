@@ -0,0 +1,49 @@
+"""
+Configuración común de los tests de tests/
+
+El paquete MetaTrader5 solo existe en Windows: si no está instalado se registra en sys.modules
+un módulo mínimo con las constantes que usa el bot (mismos valores que la librería oficial) y
+funciones de terminal que no hacen nada, para poder importar mt5_connector, signal_generator y
+risk_manager. Cada test sustituye con monkeypatch las funciones de terminal que necesita.
+"""
+import sys
+import types
+
+# Constantes de MetaTrader5 que referencia el bot (valores de la librería oficial)
+_MT5_CONSTANTS = {
+    'TIMEFRAME_M1': 1, 'TIMEFRAME_M5': 5, 'TIMEFRAME_M15': 15, 'TIMEFRAME_M30': 30,
+    'TIMEFRAME_H1': 16385, 'TIMEFRAME_H4': 16388, 'TIMEFRAME_D1': 16408,
+    'ORDER_TYPE_BUY': 0, 'ORDER_TYPE_SELL': 1,
+    'ORDER_FILLING_FOK': 0, 'ORDER_FILLING_IOC': 1, 'ORDER_FILLING_RETURN': 2,
+    'SYMBOL_FILLING_FOK': 1, 'SYMBOL_FILLING_IOC': 2,
+    'ORDER_TIME_GTC': 0,
+    'TRADE_ACTION_DEAL': 1, 'TRADE_ACTION_SLTP': 6,
+    'SYMBOL_TRADE_MODE_FULL': 4, 'SYMBOL_TRADE_EXECUTION_INSTANT': 1,
+    'TRADE_RETCODE_REQUOTE': 10004, 'TRADE_RETCODE_REJECT': 10006, 'TRADE_RETCODE_PLACED': 10008,
+    'TRADE_RETCODE_DONE': 10009, 'TRADE_RETCODE_ERROR': 10011, 'TRADE_RETCODE_INVALID_STOPS': 10016,
+    'TRADE_RETCODE_MARKET_CLOSED': 10018, 'TRADE_RETCODE_NO_MONEY': 10019,
+}
+
+# Funciones de terminal: sin conexión, devuelven lo mismo que MT5 cuando falla la llamada
+_MT5_FUNCTIONS = (
+    'account_info', 'copy_rates_from_pos', 'order_send', 'positions_get', 'symbol_info',
+    'symbol_info_sessionsquotes', 'symbol_info_tick', 'symbols_get', 'time',
+)
+
+
+def _mt5_stub() -> types.ModuleType:
+    module = types.ModuleType('MetaTrader5')
+    module.__dict__.update(_MT5_CONSTANTS)
+    for name in _MT5_FUNCTIONS:
+        setattr(module, name, lambda *args, **kwargs: None)
+    module.initialize = lambda *args, **kwargs: False
+    module.login = lambda *args, **kwargs: False
+    module.shutdown = lambda: None
+    module.last_error = lambda: (-10004, 'No IPC connection')
+    return module
+
+
+try:
+    import MetaTrader5  # noqa: F401
+except ImportError:
+    sys.modules['MetaTrader5'] = _mt5_stub()
@@ -0,0 +1,56 @@
+"""
+Tests de la memoización de RiskManager.bar_features (fractales y EMA por vela)
+"""
+import numpy as np
+
+from risk_manager import RiskManager
+
+
+def _closes(n=120, seed=7):
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 1, n)) + 100.0
+
+
+def test_misma_serie_reutiliza_el_resultado():
+    rm = RiskManager()
+    closes = _closes()
+    first = rm.bar_features(closes)
+    assert rm.bar_features(closes.copy()) is first
+    assert len(rm._bar_features_cache) == 1
+
+
+def test_ultima_vela_cambiada_no_usa_la_cache():
+    rm = RiskManager()
+    closes = _closes()
+    first = rm.bar_features(closes)
+    forming = closes.copy()
+    forming[-1] += 0.5
+    second = rm.bar_features(forming)
+    assert second is not first
+    assert second.ema[-1] != first.ema[-1]
+    assert len(rm._bar_features_cache) == 2
+
+
+def test_vela_nueva_no_usa_la_cache():
+    rm = RiskManager()
+    closes = _closes(121)
+    first = rm.bar_features(closes[:-1])
+    # Ventana desplazada una vela: misma longitud, otro primer y último cierre
+    second = rm.bar_features(closes[1:])
+    assert second is not first
+    np.testing.assert_array_equal(second.close_prices, closes[1:])
+
+
+def test_periodo_distinto_no_usa_la_cache():
+    rm = RiskManager()
+    closes = _closes()
+    assert rm.bar_features(closes, 20) is not rm.bar_features(closes, 50)
+
+
+def test_serie_mas_corta_que_el_periodo_sin_ema():
+    rm = RiskManager()
+    closes = _closes(12)
+    features = rm.bar_features(closes, 20)
+    assert features.ema.size == 0
+    # Los fractales se siguen calculando y el SL/TP dinámico no depende de la EMA
+    assert rm.calculate_dynamic_tp_sl(closes, float(closes[-1]), 'BUY', 1.0, features=features)
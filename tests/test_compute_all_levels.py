@@ -0,0 +1,48 @@
+"""
+Tests de RiskManager.compute_all_levels: cada fila debe coincidir con calculate_sl_tp,
+calculate_partial_tp y calculate_break_even de la misma posición
+"""
+import numpy as np
+import pytest
+
+from risk_manager import RiskManager
+
+# (entrada, stop loss, ATR, tipo): BUY y SELL, forex, JPY y oro, ATR pequeño y grande
+POSITIONS = [
+    (1.10250, 1.10050, 0.00120, 'BUY'),
+    (1.10250, 1.10480, 0.00120, 'SELL'),
+    (151.320, 150.880, 0.350, 'BUY'),
+    (151.320, 151.900, 0.350, 'SELL'),
+    (2345.50, 2331.20, 0.80, 'BUY'),
+    (2345.50, 2360.10, 25.00, 'SELL'),
+]
+
+
+@pytest.mark.parametrize("r_multiple", [1.0, 1.5])
+def test_igual_que_los_calculos_por_posicion(r_multiple):
+    rm = RiskManager()
+    entry, sl, atr, signal = (np.array(col) for col in zip(*POSITIONS))
+    levels = rm.compute_all_levels(entry, sl, atr, signal == 'BUY', r_multiple)
+    for i, (entry_price, stop_loss, row_atr, signal_type) in enumerate(POSITIONS):
+        atr_sl, atr_tp = rm.calculate_sl_tp(entry_price, row_atr, signal_type)
+        assert levels['atr_stop_loss'][i] == pytest.approx(atr_sl)
+        assert levels['atr_take_profit'][i] == pytest.approx(atr_tp)
+        assert levels['partial_tp'][i] == pytest.approx(
+            rm.calculate_partial_tp(entry_price, stop_loss, signal_type, r_multiple))
+        assert levels['break_even'][i] == pytest.approx(
+            rm.calculate_break_even(entry_price, stop_loss, signal_type, r_multiple))
+
+
+def test_ratio_minimo_aplicado_por_fila():
+    rm = RiskManager()
+    # TP por ATR por debajo del ratio mínimo: calculate_sl_tp lo amplía a sl_dist * ratio
+    rm.risk_params.tp_atr_multiplier = rm.risk_params.sl_atr_multiplier * rm.risk_params.min_risk_reward_ratio / 2
+    levels = rm.compute_all_levels([1.1, 1.1], [1.09, 1.11], [0.001, 0.001], [True, False])
+    assert levels['atr_take_profit'][0] == pytest.approx(rm.calculate_sl_tp(1.1, 0.001, 'BUY')[1])
+    assert levels['atr_take_profit'][1] == pytest.approx(rm.calculate_sl_tp(1.1, 0.001, 'SELL')[1])
+
+
+def test_break_even_no_comparte_el_array_del_tp_parcial():
+    levels = RiskManager().compute_all_levels([1.1], [1.09], [0.001], [True])
+    levels['partial_tp'][0] = 0.0
+    assert levels['break_even'][0] == pytest.approx(1.11)
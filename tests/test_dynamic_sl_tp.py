@@ -0,0 +1,93 @@
+"""
+Tests de RiskManager.calculate_dynamic_tp_sl (núcleo _dynamic_sl_tp) frente al algoritmo
+anterior con listas filtradas y TechnicalIndicators.find_nearest_level
+"""
+import numpy as np
+import pytest
+
+from risk_manager import RiskManager
+from signal_generator import TechnicalIndicators
+
+
+def _reference_dynamic_tp_sl(close_prices, entry_price, signal_type, atr):
+    """Versión previa de calculate_dynamic_tp_sl, copiada tal cual como referencia"""
+    highs, lows = TechnicalIndicators.find_fractals(close_prices)
+    if signal_type == 'BUY':
+        swing_lows = [close_prices[i] for i in lows if close_prices[i] < entry_price]
+        sl_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_lows)
+        sl_atr = entry_price - 1.2 * atr
+        stop_loss = max(sl_fractal, sl_atr) if swing_lows else sl_atr
+        swing_highs = [close_prices[i] for i in highs if close_prices[i] > entry_price]
+        tp_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_highs)
+        tp_atr = entry_price + 2 * atr
+        if swing_highs and abs(tp_fractal - entry_price) <= 3 * atr:
+            take_profit = tp_fractal
+        else:
+            take_profit = tp_atr
+    else:
+        swing_highs = [close_prices[i] for i in highs if close_prices[i] > entry_price]
+        sl_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_highs)
+        sl_atr = entry_price + 1.2 * atr
+        stop_loss = min(sl_fractal, sl_atr) if swing_highs else sl_atr
+        swing_lows = [close_prices[i] for i in lows if close_prices[i] < entry_price]
+        tp_fractal = TechnicalIndicators.find_nearest_level(entry_price, swing_lows)
+        tp_atr = entry_price - 2 * atr
+        if swing_lows and abs(tp_fractal - entry_price) <= 3 * atr:
+            take_profit = tp_fractal
+        else:
+            take_profit = tp_atr
+    return stop_loss, take_profit
+
+
+def _assert_same_as_reference(closes, entry, signal_type, atr):
+    result = RiskManager().calculate_dynamic_tp_sl(closes, entry, signal_type, atr)
+    expected = _reference_dynamic_tp_sl(closes, entry, signal_type, atr)
+    assert result == pytest.approx(expected)
+    return result
+
+
+# Un swing high en 105 y un swing low en 97 alrededor de una entrada en 100
+STRUCTURE = np.array([100.0, 101.0, 105.0, 101.0, 100.0, 99.0, 97.0, 99.0, 100.0])
+
+
+@pytest.mark.parametrize("signal_type", ["BUY", "SELL"])
+@pytest.mark.parametrize("seed", [1, 2, 3, 4])
+@pytest.mark.parametrize("atr", [0.2, 1.0, 5.0])
+def test_series_aleatorias(signal_type, seed, atr):
+    rng = np.random.default_rng(seed)
+    closes = np.cumsum(rng.normal(0, 1, 200)) + 100.0
+    _assert_same_as_reference(closes, float(closes[-1]), signal_type, atr)
+
+
+@pytest.mark.parametrize("signal_type", ["BUY", "SELL"])
+def test_sin_fractales_por_debajo_de_la_entrada(signal_type):
+    # Todos los cierres por encima de la entrada: no hay swing lows por debajo
+    entry = float(STRUCTURE.min()) - 1.0
+    stop_loss, take_profit = _assert_same_as_reference(STRUCTURE, entry, signal_type, 1.0)
+    if signal_type == 'BUY':
+        assert stop_loss == pytest.approx(entry - 1.2)
+    else:
+        assert take_profit == pytest.approx(entry - 2.0)
+
+
+@pytest.mark.parametrize("signal_type", ["BUY", "SELL"])
+def test_sin_fractales_por_encima_de_la_entrada(signal_type):
+    # Todos los cierres por debajo de la entrada: no hay swing highs por encima
+    entry = float(STRUCTURE.max()) + 1.0
+    stop_loss, take_profit = _assert_same_as_reference(STRUCTURE, entry, signal_type, 1.0)
+    if signal_type == 'BUY':
+        assert take_profit == pytest.approx(entry + 2.0)
+    else:
+        assert stop_loss == pytest.approx(entry + 1.2)
+
+
+def test_fractal_a_mas_de_3_atr_usa_el_tp_por_atr():
+    # Swing high a 5 del precio con ATR 1 (BUY) y swing low a 3 con ATR 0.9 (SELL)
+    assert _assert_same_as_reference(STRUCTURE, 100.0, 'BUY', 1.0) == pytest.approx((98.8, 102.0))
+    assert _assert_same_as_reference(STRUCTURE, 100.0, 'SELL', 0.9) == pytest.approx((101.08, 98.2))
+
+
+def test_fractal_dentro_de_3_atr_es_el_tp():
+    # Con ATR 2 ambos fractales quedan dentro de 3*ATR; el SL sigue siendo el de 1.2*ATR, más cercano
+    assert _assert_same_as_reference(STRUCTURE, 100.0, 'BUY', 2.0) == pytest.approx((97.6, 105.0))
+    assert _assert_same_as_reference(STRUCTURE, 100.0, 'SELL', 2.0) == pytest.approx((102.4, 97.0))
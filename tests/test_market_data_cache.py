@@ -0,0 +1,153 @@
+"""
+Tests de la caché de velas de MT5Connector (get_market_data / _update_cached_bars),
+de get_market_data_many y de _resample_hlc
+
+Se sustituye mt5.copy_rates_from_pos por un terminal simulado: las series que se obtienen
+actualizando la caché deben ser idénticas a las de una descarga completa.
+"""
+import numpy as np
+import pytest
+
+import mt5_connector
+from mt5_connector import BAR_UPDATE_COUNT, MT5Connector, _resample_hlc
+
+RATES_DTYPE = np.dtype([
+    ('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+    ('tick_volume', 'u8'), ('spread', 'i4'), ('real_volume', 'u8'),
+])
+M15 = 900
+
+
+def _make_rates(n, start_time=1_700_000_000, step=M15, seed=3):
+    rng = np.random.default_rng(seed)
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    close = np.cumsum(rng.normal(0, 0.001, n)) + 1.1
+    rates['time'] = start_time + step * np.arange(n)
+    rates['open'] = np.concatenate(([close[0]], close[:-1]))
+    rates['high'] = np.maximum(rates['open'], close) + rng.random(n) * 0.0005
+    rates['low'] = np.minimum(rates['open'], close) - rng.random(n) * 0.0005
+    rates['close'] = close
+    rates['tick_volume'] = rng.integers(1, 500, n)
+    return rates
+
+
+class FakeTerminal:
+    """Historial por símbolo; copy_rates_from_pos devuelve las `count` velas más recientes en orden cronológico"""
+
+    def __init__(self, history):
+        self.history = dict(history)
+        self.requests = []
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.requests.append((symbol, count))
+        rates = self.history[symbol]
+        end = len(rates) - start_pos
+        return rates[max(0, end - count):end].copy()
+
+    def append(self, symbol, bars):
+        rates = self.history[symbol]
+        new = _make_rates(bars, start_time=int(rates['time'][-1]) + M15, seed=len(rates))
+        self.history[symbol] = np.concatenate((rates, new))
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    fake = FakeTerminal({"EURUSD": _make_rates(600), "USDJPY": _make_rates(600, seed=11)})
+    monkeypatch.setattr(mt5_connector.mt5, "copy_rates_from_pos", fake.copy_rates_from_pos)
+    monkeypatch.setenv("MT5_LOGIN", "1")
+    return fake
+
+
+def _connector():
+    connector = MT5Connector()
+    connector.connected = True
+    return connector
+
+
+def _assert_same_bars(data, expected):
+    for field in ('time', 'open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_array_equal(getattr(data, field), getattr(expected, field), err_msg=field)
+    np.testing.assert_array_equal(data.tr, expected.tr)
+    np.testing.assert_array_equal(data.ret, expected.ret)
+
+
+def test_velas_nuevas_igual_que_descarga_completa(terminal):
+    cached = _connector()
+    cached.get_market_data("EURUSD", "M15", 500)
+    terminal.append("EURUSD", 3)
+    terminal.requests.clear()
+    merged = cached.get_market_data("EURUSD", "M15", 500)
+    # Solo se pidió la cola de la serie
+    assert terminal.requests == [("EURUSD", BAR_UPDATE_COUNT)]
+    _assert_same_bars(merged, _connector().get_market_data("EURUSD", "M15", 500))
+    assert len(merged.close) == 500
+
+
+def test_vela_en_formacion_se_reemplaza(terminal):
+    cached = _connector()
+    cached.get_market_data("EURUSD", "M15", 500)
+    forming = terminal.history["EURUSD"]
+    forming['close'][-1] += 0.002
+    forming['high'][-1] = max(forming['high'][-1], forming['close'][-1])
+    forming['tick_volume'][-1] += 10
+    merged = cached.get_market_data("EURUSD", "M15", 500)
+    _assert_same_bars(merged, _connector().get_market_data("EURUSD", "M15", 500))
+    assert merged.close[-1] == forming['close'][-1]
+
+
+def test_vela_reemplazada_dentro_de_la_cola(terminal):
+    cached = _connector()
+    cached.get_market_data("EURUSD", "M15", 500)
+    # El broker corrige una vela ya cerrada que aún entra en la actualización
+    terminal.history["EURUSD"]['low'][-5] -= 0.003
+    terminal.append("EURUSD", 1)
+    merged = cached.get_market_data("EURUSD", "M15", 500)
+    _assert_same_bars(merged, _connector().get_market_data("EURUSD", "M15", 500))
+
+
+def test_hueco_mayor_que_la_cola_descarga_completa(terminal):
+    cached = _connector()
+    cached.get_market_data("EURUSD", "M15", 500)
+    terminal.append("EURUSD", BAR_UPDATE_COUNT + 5)
+    terminal.requests.clear()
+    merged = cached.get_market_data("EURUSD", "M15", 500)
+    assert terminal.requests == [("EURUSD", BAR_UPDATE_COUNT), ("EURUSD", 500)]
+    _assert_same_bars(merged, _connector().get_market_data("EURUSD", "M15", 500))
+
+
+def test_los_marketdata_entregados_no_cambian(terminal):
+    cached = _connector()
+    first = cached.get_market_data("EURUSD", "M15", 500)
+    before = first.close.copy()
+    terminal.append("EURUSD", 2)
+    cached.get_market_data("EURUSD", "M15", 500)
+    np.testing.assert_array_equal(first.close, before)
+
+
+def test_get_market_data_many_igual_que_llamadas_sueltas(terminal):
+    many = _connector().get_market_data_many(["EURUSD", "USDJPY"], ["M15", "H1"], 300)
+    assert set(many) == {(s, tf) for s in ("EURUSD", "USDJPY") for tf in ("M15", "H1")}
+    for (symbol, timeframe), data in many.items():
+        _assert_same_bars(data, _connector().get_market_data(symbol, timeframe, 300))
+
+
+def _resample_reference(rates, seconds):
+    buckets = {}
+    for rate in rates:
+        buckets.setdefault(int(rate['time']) // seconds, []).append(rate)
+    groups = [buckets[k] for k in sorted(buckets)]
+    return (np.array([max(r['high'] for r in g) for g in groups]),
+            np.array([min(r['low'] for r in g) for g in groups]),
+            np.array([g[-1]['close'] for g in groups]))
+
+
+@pytest.mark.parametrize("seconds", [3600, 14400, 86400])
+def test_resample_hlc_con_huecos(seconds):
+    rates = _make_rates(400)
+    # Quitar un bloque (fin de semana / cierre) y alguna vela suelta
+    rates = np.delete(rates, np.r_[100:180, 250, 251, 333])
+    high, low, close = _resample_hlc(rates, seconds)
+    ref_high, ref_low, ref_close = _resample_reference(rates, seconds)
+    np.testing.assert_array_equal(high, ref_high)
+    np.testing.assert_array_equal(low, ref_low)
+    np.testing.assert_array_equal(close, ref_close)
@@ -0,0 +1,26 @@
+"""
+Tests de pip_factor (mt5_connector): tamaño de pip según digits/point del broker o el nombre
+"""
+import pytest
+
+from mt5_connector import pip_factor
+
+
+@pytest.mark.parametrize("symbol", ["USDJPY", "USDJPY.m", "USDJPYm", "USDJPY-ECN", "EURJPY.pro"])
+def test_jpy_con_sufijo_del_broker(symbol):
+    # Por nombre (sin especificaciones del broker) y por digits/point
+    assert pip_factor(symbol) == 0.01
+    assert pip_factor(symbol, 3, 0.001) == pytest.approx(0.01)
+
+
+@pytest.mark.parametrize("symbol", ["EURUSD", "EURUSD.m", "GBPUSD-ECN"])
+def test_forex_no_jpy(symbol):
+    assert pip_factor(symbol) == 0.0001
+    assert pip_factor(symbol, 5, 0.00001) == pytest.approx(0.0001)
+    assert pip_factor(symbol, 4, 0.0001) == pytest.approx(0.0001)
+
+
+def test_simbolos_no_forex_usan_el_punto_del_broker():
+    # Oro a 2 decimales, índice a 1 decimal: el pip es un punto, no 0.0001
+    assert pip_factor("XAUUSD", 2, 0.01) == pytest.approx(0.01)
+    assert pip_factor("US30", 1, 0.1) == pytest.approx(0.1)
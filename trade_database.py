@@ -8,7 +8,6 @@ import sqlite3
 import json
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-import pandas as pd
 
 DB_PATH = os.getenv("TRADE_DB_PATH", "trades.db")
 
@@ -178,6 +177,7 @@ class TradeDatabase:
             return [dict(zip(columns, row)) for row in c.fetchall()]
 
     def export_signals_to_csv(self, csv_path: str) -> None:
+        import pandas as pd
         df = pd.read_sql('SELECT * FROM signals', sqlite3.connect(self.db_path))
         df.to_csv(csv_path, index=False)
 
@@ -241,6 +241,7 @@ class TradeDatabase:
             return [dict(zip(columns, row)) for row in c.fetchall()]
 
     def export_trades_to_csv(self, csv_path: str) -> None:
+        import pandas as pd
         df = pd.read_sql('SELECT * FROM trades', sqlite3.connect(self.db_path))
         df.to_csv(csv_path, index=False)
 
@@ -321,5 +322,6 @@ class TradeDatabase:
             return [dict(zip(columns, row)) for row in c.fetchall()]
 
     def export_metrics_to_csv(self, csv_path: str) -> None:
+        import pandas as pd
         df = pd.read_sql('SELECT * FROM metrics', sqlite3.connect(self.db_path))
         df.to_csv(csv_path, index=False)